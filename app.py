@@ -1,19 +1,135 @@
 # This will create API endpoints for billing agent.
 
-from fastapi import FastAPI, Form, Header, HTTPException, status
-from typing import Any, Dict, Optional
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from fastapi import FastAPI, Form, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse
+from typing import IO, Any, Callable, Dict, Optional
 
 from src.agents.billing_agent import BillingAgent
+from src.agents.payment_reconciler import PaymentReconciler
+from src.agents.reporting_agent import MAX_HASHTAG_REPORT, ReportingAgent
+from src.data.game_catalog import GameCatalog
+from src.data.related_games import RelatedGamesIndex
+from src.services.admission_control import AdmissionController
 from src.tools.logger import logger
+from src.utils.config import (
+    CATALOG_MAX_PAGE_SIZE,
+    CATALOG_PAGE_SIZE,
+    CATALOG_REFRESH_INTERVAL,
+    PAYMENT_RECONCILER_IN_GATEWAY,
+    PAYMENT_RECONCILER_LOCK_PATH,
+    RECOMMENDATION_TOP_K,
+)
+from src.utils.workers import claim_worker_lock, on_worker_start, run_worker_start_hooks
+
+# Created per worker in lifespan(): nothing may open a DB connection at import
+# time, or pre-fork servers (gunicorn --preload) would share it between workers.
+billing_agent: Optional[BillingAgent] = None
+reporting_agent: Optional[ReportingAgent] = None
+game_catalog: Optional[GameCatalog] = None
+related_games: Optional[RelatedGamesIndex] = None
+# The one thread of the worker that uses the DB connection, so the event loop stays
+# free to reject excess requests immediately instead of queueing them behind the DB
+db_executor: Optional[ThreadPoolExecutor] = None
+payment_reconciler: Optional[PaymentReconciler] = None
+payment_reconciler_lock: Optional[IO] = None
+admission = AdmissionController()
+
+# Endpoints that reach the DB and go through admission control
+CHARGE_PATH = "/api/v1/charge"
+ADMISSION_PATHS = ("/api/v1/access/", "/api/v1/get_purchased_games/", CHARGE_PATH, "/api/v1/reports/")
+
+
+@on_worker_start
+def _init_billing_agent():
+    global billing_agent, reporting_agent, game_catalog, related_games, db_executor
+    billing_agent = BillingAgent()
+    # Reports only read small rollup tables, they share the billing connection
+    reporting_agent = ReportingAgent(billing_agent.db_manager)
+    # Loaded by the first catalogue request, then polled for new games (on the DB thread)
+    game_catalog = GameCatalog(billing_agent.db_manager)
+    related_games = RelatedGamesIndex(billing_agent.db_manager)
+    db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+
+
+@on_worker_start
+def _start_payment_reconciler():
+    global payment_reconciler, payment_reconciler_lock
+    if not PAYMENT_RECONCILER_IN_GATEWAY:
+        return
+    # One reconciler per host, in the worker that takes the lock first
+    payment_reconciler_lock = claim_worker_lock(PAYMENT_RECONCILER_LOCK_PATH)
+    if payment_reconciler_lock is None:
+        return
+    try:
+        # Shares the billing agent's library cache, so applied payments update it directly
+        payment_reconciler = PaymentReconciler(library_cache=billing_agent.library_cache)
+    except ValueError as e:
+        logger.error(f"Payment reconciler not started, webhooks stay pending: {e}")
+        return
+    payment_reconciler.start()
+
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs a blocking DB call on the worker's DB thread and records its latency."""
+    def timed():
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            admission.observe_latency(time.perf_counter() - started)
+
+    return await asyncio.get_running_loop().run_in_executor(db_executor, timed)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Per-worker startup and shutdown. The server drains in-flight requests before shutdown runs."""
+    run_worker_start_hooks()
+    yield
+    if payment_reconciler is not None:
+        payment_reconciler.stop()
+    if payment_reconciler_lock is not None:
+        payment_reconciler_lock.close()
+    if db_executor is not None:
+        db_executor.shutdown(wait=True)
+    if billing_agent is not None:
+        billing_agent.close()
+    logger.close()
 
-billing_agent = BillingAgent()
 
 app = FastAPI(
     title="Game Monetization Gateway",
-    description="Secure entry point for game access and billing status."
+    description="Secure entry point for game access and billing status.",
+    lifespan=lifespan
 )
 
 
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """Per-user rate limiting and load shedding before a request reaches the DB."""
+    if not request.url.path.startswith(ADMISSION_PATHS):
+        return await call_next(request)
+
+    # Behind the proxy every client shares its address, so only the user is a usable key.
+    # The charge form carries its user in the body: that endpoint applies the limit itself.
+    key = None if request.url.path == CHARGE_PATH else request.headers.get("X-User-ID")
+    rejection = admission.admit(key, is_write=request.method != "GET")
+    if rejection is not None:
+        status_code, retry_after, reason = rejection
+        return JSONResponse(status_code=status_code, content={"detail": reason},
+                            headers={"Retry-After": str(retry_after)})
+    try:
+        return await call_next(request)
+    finally:
+        admission.release()
+
+
 @app.get("/", tags=["Health"])
 async def read_root():
     """Health check endpoint."""
@@ -33,9 +149,9 @@ async def check_game_access(
     if not x_user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User authentication required (X-User-ID).")
 
-    # This calls the BillingAgent directly without a caching layer
-    logger.info(f'Getting all the purchased games for user {x_user_id}')
-    access_result = billing_agent.get_purchased_games(x_user_id)
+    # Served from the BillingAgent's library cache; the DB (and the DB-backed
+    # logger) are only hit on a cache miss
+    access_result = await run_db(billing_agent.get_purchased_games, x_user_id)
     
     return access_result
 
@@ -55,12 +171,12 @@ async def check_game_access(
 
     # This calls the BillingAgent directly without a caching layer
     logger.info(f"Getting URL access for specific game {game_id} for user {x_user_id}")
-    access_result = billing_agent.get_access_status(x_user_id, game_id)
+    access_result = await run_db(billing_agent.get_access_status, x_user_id, game_id)
     
     return access_result
 
 
-@app.post("/api/v1/charge", tags=["Access"])
+@app.post(CHARGE_PATH, tags=["Access"])
 async def post_payment_token(
     user_id: str = Form(..., description="The ID of the user requesting access."),
     game_id: str = Form(..., description="The ID of the game being purchased."),
@@ -69,9 +185,15 @@ async def post_payment_token(
     """
     Processes the client-initiated payment (card token) and grants game access upon success.
     """
+    rejection = admission.limit_user(user_id)
+    if rejection is not None:
+        status_code, retry_after, reason = rejection
+        raise HTTPException(status_code=status_code, detail=reason, headers={"Retry-After": str(retry_after)})
+
     try:
         logger.info(f'Initiating payment for user {user_id}')
-        access_result = billing_agent.initiate_payment(
+        access_result = await run_db(
+            billing_agent.initiate_payment,
             user_id=user_id,
             game_id=game_id,
             payment_token=payment_token
@@ -85,4 +207,105 @@ async def post_payment_token(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not process payment due to a server error."
-        )
\ No newline at end of file
+        )
+
+
+@app.post("/api/v1/webhooks/payments", tags=["Payments"], status_code=status.HTTP_202_ACCEPTED)
+async def receive_payment_webhook(
+    request: Request,
+    x_webhook_signature: Optional[str] = Header(None, alias="X-Webhook-Signature")
+) -> Dict[str, Any]:
+    """
+    Stores a payment provider webhook in the inbox and acknowledges it right away.
+    The PaymentReconciler verifies and applies it in the background; clients poll
+    the event status or simply retry the access endpoint.
+    """
+    payload = (await request.body()).decode("utf-8", errors="replace")
+    try:
+        event_id = str(json.loads(payload)["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Webhook body must be a JSON event with an 'id'.")
+
+    await run_db(billing_agent.db_manager.enqueue_payment_event, event_id, payload, x_webhook_signature)
+    return {"status": "accepted", "event_id": event_id}
+
+
+@app.get("/api/v1/webhooks/payments/{event_id}", tags=["Payments"])
+async def get_payment_event_status(event_id: str) -> Dict[str, Any]:
+    """Processing status of a received payment webhook."""
+    event = await run_db(billing_agent.db_manager.get_payment_event_status, event_id)
+    if event is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown payment event.")
+    return event
+
+
+@app.get("/api/v1/reports/games/{game_id}", tags=["Reports"])
+async def get_game_report(game_id: str):
+    """Purchases, revenue and conversion (purchases per marketing post) of one game."""
+    return await run_db(reporting_agent.get_game_report, game_id)
+
+
+@app.get("/api/v1/reports/daily", tags=["Reports"])
+async def get_daily_report(start_day: Optional[date] = None, end_day: Optional[date] = None):
+    """Purchases and revenue per day; defaults to the last 30 days."""
+    end_day = end_day or date.today()
+    start_day = start_day or end_day - timedelta(days=29)
+    return await run_db(reporting_agent.get_daily_report, start_day, end_day)
+
+
+@app.get("/api/v1/reports/platforms", tags=["Reports"])
+async def get_platform_report():
+    """Marketing posts per platform."""
+    return await run_db(reporting_agent.get_platform_report)
+
+
+@app.get("/api/v1/reports/games/{game_id}/campaign", tags=["Reports"])
+async def get_campaign_status(game_id: str):
+    """Marketing posts of one game per platform and status."""
+    return await run_db(reporting_agent.get_campaign_status, game_id)
+
+
+@app.get("/api/v1/reports/hashtags", tags=["Reports"])
+async def get_hashtag_report(limit: int = Query(20, ge=1, le=MAX_HASHTAG_REPORT)):
+    """The most used hashtag sets of the marketing posts."""
+    return await run_db(reporting_agent.get_hashtag_report, limit)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+@app.get("/api/v1/games", tags=["Catalog"])
+async def list_games(
+    q: str = Query("", description="Words that must all appear in the title or description."),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page."),
+    limit: int = Query(CATALOG_PAGE_SIZE, ge=1, le=CATALOG_MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match")
+):
+    """
+    Storefront catalogue, newest games first, served from the worker's in-memory index.
+    Follow next_cursor for the next page; send the ETag back in If-None-Match to get a 304
+    when the page has not changed.
+    """
+    if game_catalog.refresh_due():
+        await run_db(game_catalog.refresh)
+    try:
+        body, etag = game_catalog.page(q, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={int(CATALOG_REFRESH_INTERVAL)}"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/api/v1/games/{game_id}/related", tags=["Catalog"])
+async def get_related_games(game_id: str, limit: int = Query(RECOMMENDATION_TOP_K, ge=1, le=RECOMMENDATION_TOP_K)):
+    """Players also bought: the games most often bought together with this one."""
+    if related_games.refresh_due():
+        await run_db(related_games.refresh)
+    return {"game_id": game_id, "related": related_games.related(game_id, limit)}
@@ -0,0 +1,82 @@
+# Runs the billing hot-path queries through DBManager against each storage backend.
+#   python -m benchmarks.db_hot_queries_bench --backends sqlite mysql --users 1000 --games 200
+# The MySQL run expects an empty schema created from sql_files/setup.sql (it inserts rows).
+import argparse
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from src.data.backends import MySQLBackend, SQLiteBackend
+from src.data.db_manager import DBManager
+
+
+def _seed(db: DBManager, users: int, games: int, purchases_per_user: int):
+    """Bulk-loads users, games and purchases with one executemany per table."""
+    run = uuid.uuid4().hex[:8]
+    cursor = db.backend.cursor(db.conn)
+    cursor.executemany(
+        db.backend.prepare("INSERT INTO users (name, email, password) VALUES (%s, %s, %s)"),
+        [(f"user {n}", f"{run}-{n}@bench.test", "x") for n in range(users)],
+    )
+    cursor.execute(db.backend.prepare("SELECT id FROM users WHERE email LIKE %s"), (f"{run}-%",))
+    user_ids = [row["id"] for row in cursor.fetchall()]
+    game_ids = [str(uuid.uuid4()) for _ in range(games)]
+    cursor.executemany(
+        db.backend.prepare(
+            "INSERT INTO games (id, title, description, html_code, file_url, deployed_url) "
+            "VALUES (%s, %s, %s, %s, %s, %s)"
+        ),
+        [(g, "Bench", "Bench game", "<html></html>", f"{g}/index.html", f"games/{g}/index.html") for g in game_ids],
+    )
+    cursor.executemany(
+        db.backend.prepare(
+            "INSERT INTO purchases (user_id, game_id, payment_method, amount, status) "
+            "VALUES (%s, %s, 'stripe', 1.0, 'paid')"
+        ),
+        [(u, g) for u in user_ids for g in random.sample(game_ids, purchases_per_user)],
+    )
+    db.conn.commit()
+    cursor.close()
+    return user_ids, game_ids
+
+
+def _time(label: str, operation, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(f"  {label:<24} {iterations / sum(samples):>10.0f} ops/s "
+          f"p50 {statistics.median(samples) * 1e6:>8.1f} us  p99 {samples[int(len(samples) * 0.99) - 1] * 1e6:>8.1f} us")
+
+
+def run(db: DBManager, users: int, games: int, iterations: int):
+    user_ids, game_ids = _seed(db, users, games, purchases_per_user=5)
+    pick_user = lambda: random.choice(user_ids)
+    pick_game = lambda: random.choice(game_ids)
+
+    print(f"{db.backend.name}: {users} users, {games} games, {users * 5} purchases")
+    _time("check_payment_status", lambda: db.check_payment_status(pick_user(), pick_game()), iterations)
+    _time("get_purchased_games", lambda: db.get_purchased_games(pick_user()), iterations)
+    _time("get_game_details", lambda: db.get_game_details(pick_game()), iterations)
+    _time("update_payments", lambda: db.update_payments(pick_user(), pick_game()), iterations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DBManager hot-query benchmark across storage backends.")
+    parser.add_argument("--backends", nargs="+", choices=["sqlite", "mysql"], default=["sqlite"])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    for name in args.backends:
+        if name == "sqlite":
+            backend = SQLiteBackend(str(Path(tempfile.mkdtemp()) / "bench.sqlite"))
+        else:
+            backend = MySQLBackend()
+        run(DBManager(backend), args.users, args.games, args.iterations)
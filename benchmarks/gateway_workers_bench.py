@@ -0,0 +1,86 @@
+# Measures requests/sec on the access endpoint as the gateway scales from 1 to N workers.
+#   python -m benchmarks.gateway_workers_bench --max-workers 4 --clients 16 --duration 10
+# Runs against whatever DB backend src/utils/config.py points to. Each client polls as its own
+# user (--user-id, --user-id + 1, ...) so the per-user rate limit does not cap the measurement.
+import argparse
+import http.client
+import multiprocessing
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from src.utils.workers import default_worker_count
+
+
+def _client(port: int, game_id: str, user_id: str, deadline: float, results):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    statuses = Counter()
+    while time.time() < deadline:
+        try:
+            conn.request("GET", f"/api/v1/access/{game_id}", headers={"X-User-ID": user_id})
+            response = conn.getresponse()
+            response.read()
+            statuses[response.status] += 1
+        except (OSError, http.client.HTTPException):
+            statuses["connection_error"] += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.close()
+    results.put(statuses)
+
+
+def _wait_until_up(port: int, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gateway did not start")
+
+
+def run(workers: int, clients: int, duration: float, port: int, game_id: str, user_id: str) -> Counter:
+    server = subprocess.Popen(
+        [sys.executable, "gateway.py", "--workers", str(workers), "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_up(port)
+        results = multiprocessing.Queue()
+        deadline = time.time() + duration
+        processes = [
+            multiprocessing.Process(target=_client, args=(port, game_id, str(int(user_id) + client), deadline, results))
+            for client in range(clients)
+        ]
+        for process in processes:
+            process.start()
+        statuses = Counter()
+        for _ in processes:
+            statuses.update(results.get())
+        for process in processes:
+            process.join()
+        return statuses
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gateway worker scaling benchmark.")
+    parser.add_argument("--max-workers", type=int, default=default_worker_count())
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--game-id", default="2384e9b6-1ab2-45be-90e8-76b3cc460ce7")
+    parser.add_argument("--user-id", default="1")
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'req/s':>9}  statuses")
+    worker_counts = sorted({1, *[2 ** n for n in range(1, args.max_workers.bit_length())], args.max_workers})
+    for workers in worker_counts:
+        statuses = run(workers, args.clients, args.duration, args.port, args.game_id, args.user_id)
+        print(f"{workers:>7} {sum(statuses.values()) / args.duration:>9.1f}  {dict(statuses)}")
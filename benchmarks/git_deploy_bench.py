@@ -0,0 +1,56 @@
+# Measures deployment throughput of GitHandler against a local bare repository.
+#   python -m benchmarks.git_deploy_bench --games 200 --batch-sizes 1 10 50 200
+import argparse
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from src.services.git_handler import GitHandler
+
+
+def run(game_count: int, batch_size: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        remote = tmp_path / "remote.git"
+        subprocess.run(["git", "init", "--quiet", "--bare", str(remote)], check=True)
+        handler = GitHandler(str(remote), "main", str(tmp_path / "work"), "")
+
+        files = []
+        for n in range(game_count):
+            path = tmp_path / "games" / f"game-{n}" / "index.html"
+            path.parent.mkdir(parents=True)
+            path.write_text(f"<html><body>game {n}</body></html>")
+            files.append((f"game-{n}", path))
+
+        start = time.perf_counter()
+        for n, (game_id, path) in enumerate(files, start=1):
+            handler.queue_game(game_id, path)
+            if handler.pending() >= batch_size or n == game_count:
+                handler.deploy_queued()
+        elapsed = time.perf_counter() - start
+
+        commits = int(subprocess.run(
+            ["git", "--git-dir", str(remote), "rev-list", "--count", "main"],
+            capture_output=True, text=True, check=True,
+        ).stdout)
+
+    return {
+        "batch_size": batch_size,
+        "games_per_sec": game_count / elapsed,
+        "ms_per_game": elapsed * 1000 / game_count,
+        "commits_per_game": commits / game_count,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GitHandler batch deployment benchmark.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    print(f"{'batch':>6} {'games/s':>9} {'ms/game':>9} {'commits/game':>13}")
+    for batch_size in args.batch_sizes:
+        result = run(args.games, batch_size)
+        print(f"{result['batch_size']:>6} {result['games_per_sec']:>9.1f} "
+              f"{result['ms_per_game']:>9.2f} {result['commits_per_game']:>13.3f}")
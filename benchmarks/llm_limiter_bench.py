@@ -0,0 +1,64 @@
+# Compares LLM throughput and 429s with and without the AdaptiveLimiter against the
+# simulated provider (quotas per scaled-down window, so a run takes seconds).
+#   python -m benchmarks.llm_limiter_bench --clients 32 --duration 10
+import argparse
+import threading
+import time
+
+from src.services.llm_simulator import SimulatedLLMProvider, SimulatedRateLimitError
+from src.services.rate_limiter import AdaptiveLimiter
+
+WINDOW = 2.0
+REQUESTS_PER_WINDOW = 40
+TOKENS_PER_WINDOW = 40 * 800
+
+
+def _naive_client(provider: SimulatedLLMProvider, tokens: int, deadline: float):
+    """Retries a throttled request after a fixed short sleep, like an unaware client."""
+    while time.monotonic() < deadline:
+        try:
+            provider.complete(tokens)
+        except SimulatedRateLimitError:
+            time.sleep(0.05)
+
+
+def _limited_client(limiter: AdaptiveLimiter, provider: SimulatedLLMProvider, tokens: int, deadline: float):
+    while time.monotonic() < deadline:
+        try:
+            limiter.call(lambda: (None, provider.complete(tokens)), tokens=tokens)
+        except SimulatedRateLimitError:
+            pass
+
+
+def run(mode: str, clients: int, duration: float, headroom: float):
+    provider = SimulatedLLMProvider(TOKENS_PER_WINDOW, REQUESTS_PER_WINDOW, latency=0.05, window=WINDOW)
+    limiter = AdaptiveLimiter(
+        tokens_per_minute=int(TOKENS_PER_WINDOW * headroom),
+        requests_per_minute=int(REQUESTS_PER_WINDOW * headroom),
+        max_concurrency=clients, window=WINDOW,
+    )
+    deadline = time.monotonic() + duration
+    target = _naive_client if mode == "naive" else _limited_client
+    args = (provider,) if mode == "naive" else (limiter, provider)
+    threads = [threading.Thread(target=target, args=args + (600, deadline)) for _ in range(clients)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    quota = REQUESTS_PER_WINDOW / WINDOW
+    print(f"{mode:>8}: {provider.completed / elapsed:6.1f} req/s of {quota:.1f} quota, "
+          f"{provider.rejected} x 429, final concurrency limit {limiter.limit if mode != 'naive' else '-'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AdaptiveLimiter vs. naive retries against the simulated provider.")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--headroom", type=float, default=0.95, help="Limiter quota as a fraction of the provider's")
+    args = parser.parse_args()
+
+    run("naive", args.clients, args.duration, args.headroom)
+    run("limited", args.clients, args.duration, args.headroom)
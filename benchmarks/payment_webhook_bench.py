@@ -0,0 +1,120 @@
+# Load-tests payment webhook ingestion with a mock payment provider: client processes post
+# signed payment.succeeded events to the gateway as fast as it acknowledges them, then the
+# benchmark waits for the in-gateway PaymentReconciler to apply the inbox.
+#   python -m benchmarks.payment_webhook_bench --workers 2 --clients 16 --duration 10
+# Runs against whatever DB backend src/utils/config.py points to (it inserts users and a game).
+import argparse
+import http.client
+import json
+import multiprocessing
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+
+from benchmarks.gateway_workers_bench import _wait_until_up
+from src.data.db_manager import DBManager
+from src.services.stripe_service import StripeService
+
+
+def _seed(db: DBManager, users: int):
+    run = uuid.uuid4().hex[:8]
+    cursor = db.backend.cursor(db.conn)
+    cursor.executemany(
+        db.backend.prepare("INSERT INTO users (name, email, password) VALUES (%s, %s, %s)"),
+        [(f"user {n}", f"{run}-{n}@bench.test", "x") for n in range(users)],
+    )
+    cursor.execute(db.backend.prepare("SELECT id FROM users WHERE email LIKE %s"), (f"{run}-%",))
+    user_ids = [row["id"] for row in cursor.fetchall()]
+    game_ids = [str(uuid.uuid4()) for _ in range(users)]
+    cursor.executemany(
+        db.backend.prepare(
+            "INSERT INTO games (id, title, description, html_code, file_url, deployed_url) "
+            "VALUES (%s, %s, %s, %s, %s, %s)"
+        ),
+        [(g, "Bench", "Bench game", "<html></html>", f"{g}/index.html", f"games/{g}/index.html") for g in game_ids],
+    )
+    db.conn.commit()
+    cursor.close()
+    return user_ids, game_ids
+
+
+def _provider(port: int, user_ids, game_ids, client: int, deadline: float, results):
+    """Mock payment provider: one connection sending signed events back to back."""
+    stripe = StripeService()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    statuses = Counter()
+    sent = 0
+    while time.time() < deadline:
+        # Every event is a distinct purchase: user i buys game (client + sent)
+        user_id = user_ids[(client * 7919 + sent) % len(user_ids)]
+        game_id = game_ids[(client + sent) % len(game_ids)]
+        payload = json.dumps({
+            "id": f"evt_{uuid.uuid4().hex}", "type": "payment.succeeded",
+            "data": {"user_id": user_id, "game_id": game_id},
+        }).encode("utf-8")
+        try:
+            conn.request("POST", "/api/v1/webhooks/payments", body=payload, headers={
+                "Content-Type": "application/json", "X-Webhook-Signature": stripe.sign_webhook_payload(payload),
+            })
+            response = conn.getresponse()
+            response.read()
+            statuses[response.status] += 1
+        except (OSError, http.client.HTTPException):
+            statuses["connection_error"] += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        sent += 1
+    conn.close()
+    results.put(statuses)
+
+
+def _pending(db: DBManager) -> int:
+    row = db._execute_query(
+        "SELECT COUNT(*) AS pending FROM payment_inbox WHERE status IN ('pending', 'processing')", fetch_one=True
+    )
+    return row["pending"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Payment webhook ingestion benchmark.")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    db = DBManager()
+    user_ids, game_ids = _seed(db, args.users)
+    server = subprocess.Popen(
+        [sys.executable, "gateway.py", "--workers", str(args.workers), "--port", str(args.port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_up(args.port)
+        results = multiprocessing.Queue()
+        deadline = time.time() + args.duration
+        processes = [
+            multiprocessing.Process(target=_provider, args=(args.port, user_ids, game_ids, n, deadline, results))
+            for n in range(args.clients)
+        ]
+        for process in processes:
+            process.start()
+        statuses = Counter()
+        for _ in processes:
+            statuses.update(results.get())
+        for process in processes:
+            process.join()
+        accepted = statuses[202]
+        print(f"ingested {accepted / args.duration:9.1f} events/s  {dict(statuses)}")
+
+        backlog = _pending(db)
+        start = time.time()
+        while _pending(db):
+            time.sleep(0.2)
+        print(f"drained backlog of {backlog} events in {time.time() - start:.1f}s after ingestion ended")
+    finally:
+        server.terminate()
+        server.wait()
@@ -0,0 +1,32 @@
+# Runs the billing gateway (app.py) with one worker process per CPU core.
+#   python gateway.py [--workers N] [--host 0.0.0.0] [--port 8000]
+import argparse
+
+import uvicorn
+
+from src.utils.config import GATEWAY_GRACEFUL_TIMEOUT
+from src.utils.workers import default_worker_count, share_library_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game Monetization Gateway")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes, 0 sizes to the CPU cores.")
+    args = parser.parse_args()
+
+    # uvicorn spawns fresh worker processes that each import app.py and run its
+    # lifespan, so every worker opens its own DB connections.
+    workers = args.workers or default_worker_count()
+    share_library_cache(workers)  # The spawned workers inherit the environment
+    uvicorn.run(
+        "app:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        timeout_graceful_shutdown=GATEWAY_GRACEFUL_TIMEOUT,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# gunicorn configuration for the billing gateway:
+#   gunicorn app:app -c gunicorn.conf.py
+# app.py opens no connections at import time and the logger drops inherited
+# connections after fork, so preload_app is safe; each worker initializes its
+# own BillingAgent in the FastAPI lifespan.
+from src.utils.config import GATEWAY_GRACEFUL_TIMEOUT
+from src.utils.workers import default_worker_count, share_library_cache
+
+bind = "0.0.0.0:8000"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = default_worker_count()
+preload_app = True
+graceful_timeout = GATEWAY_GRACEFUL_TIMEOUT
+
+
+def post_fork(server, worker):
+    # The final worker count (-w on the command line overrides the one above), before
+    # the worker's lifespan creates its library cache
+    share_library_cache(server.cfg.workers)
@@ -1,13 +1,32 @@
-
+import argparse
+import signal
 
 from src.orchestrator.scheduler import GameCreationOrchestrator
+from src.utils.config import ORCHESTRATOR_BATCH_SIZE, ORCHESTRATOR_INTERVAL
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Automated game creation pipeline.")
+    parser.add_argument("--forever", action="store_true", help="Keep running the pipeline until SIGTERM/SIGINT.")
+    parser.add_argument("--interval", type=float, default=ORCHESTRATOR_INTERVAL, help="Seconds between runs.")
+    parser.add_argument("--batch-size", type=int, default=ORCHESTRATOR_BATCH_SIZE, help="Games per run.")
+    args = parser.parse_args()
+
     orchestrator = GameCreationOrchestrator()
-    orchestrator.run_pipeline()
+    if not args.forever:
+        try:
+            orchestrator.run_pipeline()
+        finally:
+            orchestrator.close()
+        return
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: orchestrator.stop())
+    try:
+        orchestrator.run_forever(interval=args.interval, batch_size=args.batch_size)
+    finally:
+        orchestrator.close()
 
 
 if __name__ == "__main__":
     main()
-
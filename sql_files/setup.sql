@@ -16,9 +16,21 @@ CREATE TABLE games (
     title VARCHAR(255) NOT NULL,
     description TEXT COMMENT 'Small description of the game',
     html_code LONGTEXT NOT NULL COMMENT 'Contains the HTML structure of the game',
+    original_size INT COMMENT 'Size in bytes of the generated HTML before minification',
+    minified_size INT COMMENT 'Size in bytes of the stored (minified) HTML',
     file_url VARCHAR(255) COMMENT 'Local path where the combined file is saved',
     deployed_url VARCHAR(255) COMMENT 'Mock URL where the game is published',
-    created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    INDEX idx_games_created (created, id) COMMENT 'Keyset scans of new games by the storefront catalogue'
+);
+
+CREATE TABLE game_fingerprints (
+    game_id VARCHAR(36) PRIMARY KEY,
+    category VARCHAR(100) COMMENT 'Game category the game was generated from, if any',
+    signature VARBINARY(256) NOT NULL COMMENT 'MinHash signature of the normalized title and HTML',
+
+    FOREIGN KEY (game_id) REFERENCES games(id)
 );
 
 CREATE TABLE purchases (
@@ -35,6 +47,23 @@ CREATE TABLE purchases (
     FOREIGN KEY (game_id) REFERENCES games(id)
 );
 
+-- Payment webhooks, stored as received and applied in batches by PaymentReconciler
+CREATE TABLE payment_inbox (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    event_id VARCHAR(255) NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    signature VARCHAR(255),
+    status ENUM('pending', 'processing', 'applied', 'duplicate', 'rejected', 'failed') NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    claim VARCHAR(32),
+    claimed_at DOUBLE COMMENT 'Unix time the batch was claimed, to release claims of crashed workers',
+    received DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    processed DATETIME,
+
+    INDEX idx_payment_inbox_status (status, id),
+    INDEX idx_payment_inbox_claim (claim)
+);
+
 CREATE TABLE marketing_post (
     id INT AUTO_INCREMENT PRIMARY KEY,
     game_id varchar(36) NOT NULL,
@@ -43,11 +72,62 @@ CREATE TABLE marketing_post (
     post_url VARCHAR(255) COMMENT 'The mock URL of the posted content',
     status ENUM('draft', 'posted', 'failed') NOT NULL,
     created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    
+    -- Generated from the PlatformPost payload for analytics; NULL when the payload has no such field.
+    -- On an existing database, add them and the indexes below with ALTER TABLE marketing_post
+    -- (MySQL then drops the index it created for the foreign key on its own).
+    headline VARCHAR(255) AS (LEFT(JSON_UNQUOTE(JSON_EXTRACT(payload_json, '$.headline')), 255)) VIRTUAL,
+    hashtags VARCHAR(255) AS (LEFT(JSON_UNQUOTE(JSON_EXTRACT(payload_json, '$.hashtags')), 255)) VIRTUAL,
+
+    -- Covers the per-game campaign status query, and the foreign key below
+    INDEX idx_marketing_post_campaign (game_id, platform, status),
+    INDEX idx_marketing_post_headline (headline),
+    INDEX idx_marketing_post_hashtags (hashtags),
+
     -- Constraint to link to the games table
     FOREIGN KEY (game_id) REFERENCES games(id)
 );
 
+-- Reporting rollups, maintained incrementally by DBManager on every purchase and
+-- marketing post, and rebuilt from history by `python -m src.agents.reporting_agent backfill`.
+CREATE TABLE rollup_game (
+    game_id VARCHAR(36) PRIMARY KEY,
+    purchases INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    marketing_posts INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE rollup_day (
+    day DATE PRIMARY KEY,
+    purchases INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(12, 2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE rollup_platform (
+    platform VARCHAR(50) PRIMARY KEY,
+    posts INT NOT NULL DEFAULT 0
+);
+
+-- "Players also bought": the top neighbours of every game in the co-purchase graph,
+-- written by src/agents/recommendation_agent.py
+CREATE TABLE game_related (
+    game_id VARCHAR(36) NOT NULL,
+    position TINYINT NOT NULL COMMENT '0 for the game bought together most often',
+    related_game_id VARCHAR(36) NOT NULL,
+    purchases INT NOT NULL COMMENT 'Players who bought both games',
+    build INT NOT NULL COMMENT 'Recommendation job run that wrote the row',
+
+    PRIMARY KEY (game_id, position),
+    INDEX idx_game_related_build (build)
+);
+
+-- One row: bumped by every write to game_related (deletes included), so gateway
+-- workers can tell that their copy is stale
+CREATE TABLE related_games_build (
+    id TINYINT PRIMARY KEY,
+    build INT NOT NULL COMMENT 'Latest recommendation job run that changed game_related'
+);
+INSERT INTO related_games_build (id, build) VALUES (1, 0);
+
 CREATE TABLE logs (
     id INT AUTO_INCREMENT PRIMARY KEY,
     level ENUM('debug', 'info', 'warning', 'error', 'critical') DEFAULT 'info',
@@ -0,0 +1,27 @@
+-- Schema of one purchases shard (see src/data/shards.py): run it on every database
+-- listed in DB_SHARDS. Users, games and everything else stay in the main database,
+-- so purchases cannot reference them with foreign keys here.
+CREATE DATABASE IF NOT EXISTS game_company;
+USE game_company;
+
+CREATE TABLE purchases (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    game_id varchar(36) NOT NULL,
+    payment_method VARCHAR(50),
+    amount DECIMAL(10, 2) NOT NULL,
+    status ENUM('paid', 'failed', 'refund') NOT NULL,
+    created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    INDEX idx_purchases_user_game (user_id, game_id)
+);
+
+-- Purchases copied here from another shard by src/data/shard_migration.py, recorded
+-- in the same transaction as the copy, so a redone batch never copies a row twice.
+-- Empty it once DB_SHARDS_PREVIOUS_COUNT is unset.
+CREATE TABLE purchase_moves (
+    source_shard INT NOT NULL COMMENT 'Index of the shard the purchase was moved from',
+    source_id INT NOT NULL COMMENT 'Its purchases.id there',
+
+    PRIMARY KEY (source_shard, source_id)
+);
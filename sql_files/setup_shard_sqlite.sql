@@ -0,0 +1,19 @@
+-- SQLite version of setup_shard.sql, for local shard stand-ins (SQLITE_SHARDS).
+-- Applied automatically by SQLiteBackend on connect; keep it in sync with setup_shard.sql.
+
+CREATE TABLE IF NOT EXISTS purchases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    game_id VARCHAR(36) NOT NULL,
+    payment_method VARCHAR(50),
+    amount DECIMAL(10, 2) NOT NULL,
+    status TEXT NOT NULL CHECK (status IN ('paid', 'failed', 'refund')),
+    created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_purchases_user_game ON purchases (user_id, game_id);
+
+CREATE TABLE IF NOT EXISTS purchase_moves (
+    source_shard INTEGER NOT NULL,
+    source_id INTEGER NOT NULL,
+    PRIMARY KEY (source_shard, source_id)
+);
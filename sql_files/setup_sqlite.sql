@@ -0,0 +1,124 @@
+-- SQLite version of setup.sql for the embedded storage backend (DB_BACKEND = "sqlite").
+-- Applied automatically by SQLiteBackend on connect; keep it in sync with setup.sql.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    created_date DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS games (
+    id VARCHAR(36) PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    description TEXT,
+    html_code TEXT NOT NULL,
+    original_size INTEGER,
+    minified_size INTEGER,
+    file_url VARCHAR(255),
+    deployed_url VARCHAR(255),
+    created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_games_created ON games (created, id);
+
+CREATE TABLE IF NOT EXISTS game_fingerprints (
+    game_id VARCHAR(36) PRIMARY KEY,
+    category VARCHAR(100),
+    signature BLOB NOT NULL,
+
+    FOREIGN KEY (game_id) REFERENCES games(id)
+);
+
+CREATE TABLE IF NOT EXISTS purchases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    game_id VARCHAR(36) NOT NULL,
+    payment_method VARCHAR(50),
+    amount DECIMAL(10, 2) NOT NULL,
+    status TEXT NOT NULL CHECK (status IN ('paid', 'failed', 'refund')),
+    created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (user_id) REFERENCES users(id),
+    FOREIGN KEY (game_id) REFERENCES games(id)
+);
+-- MySQL indexes foreign keys implicitly, SQLite does not
+CREATE INDEX IF NOT EXISTS idx_purchases_user_game ON purchases (user_id, game_id);
+CREATE INDEX IF NOT EXISTS idx_purchases_game ON purchases (game_id);
+
+-- Payment webhooks, stored as received and applied in batches by PaymentReconciler
+CREATE TABLE IF NOT EXISTS payment_inbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id VARCHAR(255) NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    signature VARCHAR(255),
+    status TEXT NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'processing', 'applied', 'duplicate', 'rejected', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    claim VARCHAR(32),
+    claimed_at REAL,
+    received DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    processed DATETIME
+);
+CREATE INDEX IF NOT EXISTS idx_payment_inbox_status ON payment_inbox (status, id);
+CREATE INDEX IF NOT EXISTS idx_payment_inbox_claim ON payment_inbox (claim);
+
+CREATE TABLE IF NOT EXISTS marketing_post (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_id VARCHAR(36) NOT NULL,
+    platform VARCHAR(50) NOT NULL,
+    payload_json TEXT NOT NULL CHECK (json_valid(payload_json)),
+    post_url VARCHAR(255),
+    status TEXT NOT NULL CHECK (status IN ('draft', 'posted', 'failed')),
+    created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    headline TEXT GENERATED ALWAYS AS (json_extract(payload_json, '$.headline')) VIRTUAL,
+    hashtags TEXT GENERATED ALWAYS AS (json_extract(payload_json, '$.hashtags')) VIRTUAL,
+
+    FOREIGN KEY (game_id) REFERENCES games(id)
+);
+CREATE INDEX IF NOT EXISTS idx_marketing_post_campaign ON marketing_post (game_id, platform, status);
+CREATE INDEX IF NOT EXISTS idx_marketing_post_headline ON marketing_post (headline);
+CREATE INDEX IF NOT EXISTS idx_marketing_post_hashtags ON marketing_post (hashtags);
+
+CREATE TABLE IF NOT EXISTS rollup_game (
+    game_id VARCHAR(36) PRIMARY KEY,
+    purchases INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    marketing_posts INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS rollup_day (
+    day DATE PRIMARY KEY,
+    purchases INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12, 2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS rollup_platform (
+    platform VARCHAR(50) PRIMARY KEY,
+    posts INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS game_related (
+    game_id VARCHAR(36) NOT NULL,
+    position INTEGER NOT NULL,
+    related_game_id VARCHAR(36) NOT NULL,
+    purchases INTEGER NOT NULL,
+    build INTEGER NOT NULL,
+    PRIMARY KEY (game_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_game_related_build ON game_related (build);
+
+CREATE TABLE IF NOT EXISTS related_games_build (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    build INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO related_games_build (id, build) VALUES (1, 0);
+
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    level TEXT DEFAULT 'info' CHECK (level IN ('debug', 'info', 'warning', 'error', 'critical')),
+    service VARCHAR(100) NOT NULL,
+    message TEXT NOT NULL,
+    timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -1,6 +1,7 @@
 from typing import Any, Dict, List
 
-from db_manager import DBManager
+from src.data.db_manager import DBManager
+from src.data.library_cache import LibraryCache
 from src.services.stripe_service import StripeService
 from src.tools.logger import logger
 
@@ -13,10 +14,23 @@ class BillingAgent:
         self.logger = logger
         self.db_manager = DBManager()
         self.payment_service = StripeService()
+        self.library_cache = LibraryCache()
+
+    def close(self):
+        """Releases the agent's DB connection."""
+        self.db_manager.close()
 
     def get_purchased_games(self, user_id: str) -> List[Dict[str, str]]:
+        """Returns the user's library, from the cache when possible."""
+        games, version = self.library_cache.get(user_id)
+        if games is not None:
+            return games
+
         self.logger.info('Getting all purchased games from db for user')
-        return self.db_manager.get_purchased_games(user_id=user_id)
+        # From the primary: a lagging replica's copy would be cached for the whole TTL
+        games = self.db_manager.get_purchased_games(user_id=user_id, from_primary=True)
+        self.library_cache.fill(user_id, games, version)
+        return games
 
     def get_access_status(self, user_id: str, game_id: str) -> Dict[str, Any]:
         """
@@ -65,6 +79,10 @@ class BillingAgent:
             
             # Retrieve the final deployed URL to grant access
             details = self.db_manager.get_game_details(game_id)
+
+            # Write-through: keep the cached library in sync with the new purchase
+            self.library_cache.add_purchase(user_id, {"game_id": game_id, "deployed_url": details.get("deployed_url")})
+
             return {
                 "status": "ACCESS_GRANTED",
                 "deployed_url": details.get("deployed_url")
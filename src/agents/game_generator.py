@@ -1,36 +1,51 @@
-import random
 import uuid
-from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 
 # --- External Service and Schema Imports (Assume these files exist) ---
 from src.services.git_handler import GitHandler
+from src.tools.game_fingerprint import GameFingerprint, GameFingerprintIndex, infer_category
+from src.tools.html_minifier import byte_size, minify_html
 from src.tools.logger import logger
 
 from src.data.db_manager import DBManager
+from src.data.game_store import OUTPUT_DIR, GameStore
 from src.schemas.game_schemas import GameCreationSchema
 from src.services.llm_service import LLMService
+from src.services.rate_limiter import LANE_INTERACTIVE
+from src.utils.config import (
+    GAME_DUPLICATE_THRESHOLD,
+    GAME_GENERATION_MAX_ATTEMPTS,
+    GAME_HTML_BYTE_BUDGET,
+    GIT_DEPLOY_BATCH_SIZE,
+    GIT_DEPLOY_MAX_DELAY,
+)
 
 # --- Configuration ---
-# Directory where generated HTML and JS files will be stored
-OUTPUT_DIR = Path("./server/games")
+GAME_CATEGORIES = ['Tic-Tac-Toe', 'Minesweeper', 'Connect Four', 'Battleship', 'Snake' , 'Breakout/Arkanoid', 'Space Shooter (Top-Down)', 'Flappy Bird Clone', 'Hangman', 'Word Scramble/Unscramble' , 'Typing Speed Test', 'Text Adventure/Interactive Fiction', 'Number Guessing Game', 'Simon Says', 'Sudoku (Basic 3x3 or 4x4)' , 'Memory Card Match', 'Rock, Paper, Scissors', 'Coin Flip/Roulette', 'Clicker/Idle Game', 'Trivia Quiz' ]
 
 class GameGeneratorAgent:
     """
     Handles the entire process of generating game code using an LLM, 
     saving files into a UUID-specific directory, and logging metadata 
-    in a single database transaction.
+    in a single database transaction (see GameStore).
     """
-    def __init__(self, llm_service: LLMService = LLMService()):
+    def __init__(self, llm_service: Optional[LLMService] = None, db_manager: Optional[DBManager] = None):
         # Correcting access for mock service
         self.logger = logger
-        self.llm_client = llm_service.get_client() 
-        self.db_manager = DBManager()
+        # A generated page is typically well under the byte budget, at ~4 bytes per token
+        self.llm_client = (llm_service or LLMService()).get_client(lane=LANE_INTERACTIVE, completion_tokens=GAME_HTML_BYTE_BUDGET // 8)
+        self.db_manager = db_manager or DBManager()
         self.git_handler = GitHandler()
         self._ensure_output_dir()
+        self.game_store = GameStore(self.db_manager, OUTPUT_DIR)
+        # Clean up anything a crash left half-persisted before generating new games
+        self.game_store.reconcile()
+        self.fingerprint_index = GameFingerprintIndex(threshold=GAME_DUPLICATE_THRESHOLD)
+        self._load_fingerprints()
+        self._queue_undeployed_games()
         # The parser is no longer needed here as it's handled by with_structured_output
 
     def _ensure_output_dir(self):
@@ -38,6 +53,37 @@ class GameGeneratorAgent:
         OUTPUT_DIR.mkdir(exist_ok=True)
         self.logger.info(f"Output directory ensured at: {OUTPUT_DIR.resolve()}")
 
+    def _load_fingerprints(self):
+        """Builds the near-duplicate index from the DB, fingerprinting older games once."""
+        backfill = [
+            (
+                game["id"],
+                infer_category(GAME_CATEGORIES, game["title"], game["description"]),
+                GameFingerprint.from_game(game["title"], game["html_code"]).to_bytes(),
+            )
+            for game in self.db_manager.get_games_without_fingerprint()
+        ]
+        if backfill:
+            self.db_manager.save_game_fingerprints(backfill)
+            self.logger.info(f"Fingerprinted {len(backfill)} older games")
+
+        self.fingerprint_index.load(
+            (row["game_id"], GameFingerprint.from_bytes(row["signature"]), row["category"])
+            for row in self.db_manager.get_game_fingerprints()
+        )
+        self.logger.info(f"Loaded {len(self.fingerprint_index)} game fingerprints")
+
+    def _queue_undeployed_games(self):
+        """Queues games persisted by an earlier run that exited before deploying them."""
+        if not self.git_handler.repo_url:
+            return  # The mock deployment keeps the local path as URL, there is nothing to redeploy
+        for game in self.db_manager.get_undeployed_games():
+            file_path = OUTPUT_DIR / game["file_url"]
+            if file_path.exists():
+                self.git_handler.queue_game(game["id"], file_path)
+        if self.git_handler.pending():
+            self.logger.info(f"Queued {self.git_handler.pending()} games left undeployed by an earlier run")
+
     def generate_game(self, user_prompt: Optional[str] = None) -> str:
         """
         The main function that orchestrates the generation process. If user_prompt is None,
@@ -49,9 +95,6 @@ class GameGeneratorAgent:
         Returns:
             The path to the generated HTML file.
         """
-        # 1. Automate Prompt Generation if not provided
-        GAME_CATEGORIES = ['Tic-Tac-Toe', 'Minesweeper', 'Connect Four', 'Battleship', 'Snake' , 'Breakout/Arkanoid', 'Space Shooter (Top-Down)', 'Flappy Bird Clone', 'Hangman', 'Word Scramble/Unscramble' , 'Typing Speed Test', 'Text Adventure/Interactive Fiction', 'Number Guessing Game', 'Simon Says', 'Sudoku (Basic 3x3 or 4x4)' , 'Memory Card Match', 'Rock, Paper, Scissors', 'Coin Flip/Roulette', 'Clicker/Idle Game', 'Trivia Quiz' ]
-
         # 2. Define LLM Prompt and Structure
         system_instruction = (
             "You are an expert game developer that generates a **single, self-contained HTML file** "
@@ -62,18 +105,141 @@ class GameGeneratorAgent:
             "ALL JAVASCRIPT (in a <script> block, typically before </body>). The generated file must be immediately runnable. Also Make sure to provide instruction on same html page that how to play that game "
         )
 
-        random_game_category = random.choice(GAME_CATEGORIES)
+        # 1. Automate Prompt Generation if not provided, steering towards under-represented categories
+        category = None if user_prompt else self.fingerprint_index.pick_category(GAME_CATEGORIES)
+        rejected_categories = []
+
+        # Regenerate until the minified page fits the byte budget and is not a near-duplicate
+        for attempt in range(1, GAME_GENERATION_MAX_ATTEMPTS + 1):
+            user_message = f"Generate a simple game based on the following idea: {user_prompt or category}"
+            if attempt > 1:
+                user_message += (
+                    f" Keep the complete HTML file compact, well under {GAME_HTML_BYTE_BUDGET} bytes."
+                )
+
+            game_data = self._request_game(system_instruction, user_message)
+
+            # Minify inline CSS/JS and strip comments before anything is persisted
+            original_size = byte_size(game_data.html_code)
+            minified_html = minify_html(game_data.html_code)
+            minified_size = byte_size(minified_html)
+            self.logger.info(f"Minified game HTML from {original_size} to {minified_size} bytes")
+
+            if minified_size > GAME_HTML_BYTE_BUDGET:
+                self.logger.warning(
+                    f"Game exceeds byte budget ({minified_size} > {GAME_HTML_BYTE_BUDGET} bytes), "
+                    f"attempt {attempt}/{GAME_GENERATION_MAX_ATTEMPTS}"
+                )
+                continue
+
+            fingerprint = GameFingerprint.from_game(game_data.title, minified_html)
+            duplicate = self.fingerprint_index.find_duplicate(fingerprint)
+            if duplicate is None:
+                break
+
+            duplicate_id, similarity = duplicate
+            self.logger.warning(
+                f"Rejected near-duplicate of game {duplicate_id} (similarity {similarity:.2f}), "
+                f"attempt {attempt}/{GAME_GENERATION_MAX_ATTEMPTS}"
+            )
+            if category:
+                rejected_categories.append(category)
+                category = self.fingerprint_index.pick_category(GAME_CATEGORIES, exclude=rejected_categories)
+        else:
+            raise RuntimeError(
+                f"LLM failed to generate a unique game within {GAME_HTML_BYTE_BUDGET} bytes "
+                f"after {GAME_GENERATION_MAX_ATTEMPTS} attempts."
+            )
+
+        # 3. Generate UUID and Define Path (SINGLE CALL ENABLED)
+        game_id_uuid = str(uuid.uuid4())
+        # User-prompted games still count towards their category when it can be recognised
+        category = category or infer_category(GAME_CATEGORIES, game_data.title, game_data.description)
+
+        # 4. Standardized File Path within the game's dedicated subdirectory
+        html_filepath = self.game_store.game_path(game_id_uuid)
+
+        # 5. Single DB record with all final data
+        final_log_data = {
+            "id": game_id_uuid, 
+            "title": game_data.title,
+            "description": game_data.description,
+            # This field now contains all code (HTML, CSS, JS), minified
+            "html_code": minified_html,
+            "original_size": original_size,
+            "minified_size": minified_size,
+            "file_url": str(html_filepath.relative_to(OUTPUT_DIR)), 
+            "deployed_url": str(html_filepath.relative_to(OUTPUT_DIR)), 
+        }
+
+        # 6. Atomic file write + DB transaction (game row and fingerprint together)
+        try:
+            self.game_store.persist(
+                game_id_uuid,
+                minified_html,
+                final_log_data,
+                on_insert=lambda: self.db_manager.save_game_fingerprint(
+                    game_id_uuid, category, fingerprint.to_bytes()
+                ),
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to persist game {game_id_uuid}: {e}")
+
+        self.fingerprint_index.add(game_id_uuid, fingerprint, category)
+        self.logger.info("Game is created in database")
+        self.git_handler.queue_game(game_id_uuid, html_filepath)
+        self.logger.info("Game file is queued for deployment")
+        self.deploy_if_due()
+
+        self.logger.info(f"--- Generation Complete! Game ID: {game_id_uuid} ---")
+        return game_id_uuid
+
+    def pending_deployments(self) -> int:
+        """Games generated but not deployed yet."""
+        return self.git_handler.pending()
+
+    def deploy_if_due(self) -> Dict[str, str]:
+        """
+        Deploys the queue once it holds GIT_DEPLOY_BATCH_SIZE games or its oldest game has
+        waited GIT_DEPLOY_MAX_DELAY seconds, and right away with the (free) mock deployment.
+
+        Returns:
+            A mapping of game_id to deployed URL, empty when nothing was due.
+        """
+        if (
+            not self.git_handler.repo_url
+            or self.git_handler.pending() >= GIT_DEPLOY_BATCH_SIZE
+            or self.git_handler.oldest_wait() >= GIT_DEPLOY_MAX_DELAY
+        ):
+            return self.deploy_pending_games()
+        return {}
+
+    def deploy_pending_games(self) -> Dict[str, str]:
+        """
+        Deploys every queued game in one git commit/push and stores the
+        deployed URLs with a single bulk update.
 
+        Returns:
+            A mapping of game_id to deployed URL.
+        """
+        deployed_urls = self.git_handler.deploy_queued()
+        if deployed_urls:
+            self.db_manager.update_deployed_urls(deployed_urls)
+            self.logger.info(f"Deployed {len(deployed_urls)} games")
+        return deployed_urls
+
+    def _request_game(self, system_instruction: str, user_message: str) -> GameCreationSchema:
+        """Calls the LLM once and returns the parsed game."""
         prompt = ChatPromptTemplate.from_messages(
             [
                 ("system", system_instruction),
-                ("user", f"Generate a simple game based on the following idea: {random_game_category}"),
+                ("user", user_message),
             ]
         )
 
         # Pass the Pydantic class (GameCreationSchema) directly
         structured_chain = prompt | self.llm_client.with_structured_output(GameCreationSchema)
-        
+
         self.logger.info("--- Calling LLM for game content generation... ---")
         try:
             # LLM Call and Parsing
@@ -84,46 +250,4 @@ class GameGeneratorAgent:
             self.logger.error(f"An error occurred during LLM invocation or parsing: {e}")
             raise RuntimeError("LLM failed to generate structured output.")
 
-        # 3. Generate UUID and Define Path (SINGLE CALL ENABLED)
-        game_id_uuid = str(uuid.uuid4())
-        
-        # 4. Create Game's dedicated subdirectory based on the UUID
-        game_dir = OUTPUT_DIR / game_id_uuid
-        game_dir.mkdir(exist_ok=True)
-        self.logger.info(f"Created dedicated directory: {game_dir}")
-
-        # 5. Create Standardized File Paths within the new folder
-        html_filename = "index.html" # Only one file to save
-        html_filepath = game_dir / html_filename
-
-        # 6. The LLM now provides the final_html_content directly in game_data.html_code
-
-        # 7. Save Single Combined HTML File
-        try:
-            # Saving the complete, runnable HTML file directly
-            with open(html_filepath, 'w', encoding='utf-8') as f:
-                f.write(game_data.html_code)
-            self.logger.info(f"Saved combined HTML/JS/CSS to: {html_filepath}")
-
-        except IOError as e:
-            self.logger.error(f"Failed to save file: {e}")
-            # Log the failure to the DB
-            raise RuntimeError("File system error during game saving.")
-
-        # 8. Single DB Insertion with all final data
-        final_log_data = {
-            "id": game_id_uuid, 
-            "title": game_data.title,
-            "description": game_data.description,
-            # This field now contains all code (HTML, CSS, JS)
-            "html_code": game_data.html_code, 
-            "file_url": str(html_filepath.relative_to(OUTPUT_DIR)), 
-            "deployed_url": str(html_filepath.relative_to(OUTPUT_DIR)), 
-        }
-        self.db_manager.insert_new_game(final_log_data)
-        self.logger.info("Game is created in database")
-        self.git_handler.push_file_to_repo(html_filename)
-        self.logger.info("Game file is updated on git repo")
-
-        self.logger.info(f"--- Generation Complete! Game ID: {game_id_uuid} ---")
-        return game_id_uuid
\ No newline at end of file
+        return game_data
\ No newline at end of file
@@ -1,39 +1,100 @@
-from typing import Dict
+import json
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain_core.prompts import ChatPromptTemplate
+from pydantic import ValidationError
 
 from src.tools.logger import logger
-from src.schemas.marketing_schemas import MarketingCampaignSchema
+from src.schemas.marketing_schemas import GameCampaignSchema, MarketingBatchSchema, MarketingCampaignSchema
 from src.services.linkedin_service import LinkedInService
 from src.services.llm_service import LLMService
+from src.services.rate_limiter import LANE_BULK, estimate_tokens
 from src.services.reddit_service import RedditService
 from src.services.twitter_service import TwitterService
 from src.data.db_manager import DBManager
+from src.utils.config import MARKETING_BATCH_MAX_GAMES, MARKETING_BATCH_TOKEN_BUDGET, MARKETING_CAMPAIGN_TOKENS
 
+CAMPAIGN_PROMPT = (
+    "You are a master social media strategist. Generate a full marketing campaign for the game described below. "
+    "Tailor the tone, content, and hashtags for each platform (Twitter/X, Reddit, LinkedIn). "
+    "CRITICAL: The generated content MUST adhere strictly to the MarketingCampaignSchema."
+    "\n\nGAME TITLE: {title}\nDESCRIPTION: {description}\n\n"
+)
+
+BATCH_CAMPAIGN_PROMPT = (
+    "You are a master social media strategist. Generate a full marketing campaign for EACH game listed below. "
+    "Tailor the tone, content, and hashtags for each platform (Twitter/X, Reddit, LinkedIn). "
+    "CRITICAL: Return one entry per game with its GAME ID copied exactly, and every campaign MUST adhere "
+    "strictly to the MarketingCampaignSchema."
+    "\n\n{games}\n\n"
+)
+
+# (marketing_post.platform, MarketingCampaignSchema field)
+PLATFORM_FIELDS = (("twitter", "twitter_x"), ("linkedin", "linkedin"), ("reddit", "reddit"))
 
 
 class MarketingAgent:
     """
     Orchestrates the marketing campaign based on a single game ID.
     Retrieves data, generates platform-specific content, and executes posts.
+    run_batch_campaign() does the same for many games with a few multi-game LLM requests.
     """
-    def __init__(self, llm_service: LLMService = LLMService()):
+    def __init__(self, llm_service: Optional[LLMService] = None, db_manager: Optional[DBManager] = None):
         self.logger = logger
-        self.llm_client = llm_service.get_client() 
-        self.db_manager = DBManager()
-        
+        self.llm_service = llm_service or LLMService()
+        # Marketing is background work: it yields to interactive game generation
+        self.llm_client = self.llm_service.get_client(lane=LANE_BULK, completion_tokens=MARKETING_CAMPAIGN_TOKENS)
+        self.db_manager = db_manager or DBManager()
+
         # Instantiate mock social services
         self.twitter_service = TwitterService()
         self.reddit_service = RedditService()
         self.linkedin_service = LinkedInService()
 
+    def _generate_campaign(self, game_details: Dict[str, Any]) -> MarketingCampaignSchema:
+        """One LLM call producing the campaign of a single game."""
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", CAMPAIGN_PROMPT),
+            ("user", "Generate the content now.")
+        ])
+
+        # Pass the Pydantic class directly
+        structured_chain = prompt | self.llm_client.with_structured_output(MarketingCampaignSchema)
+        return structured_chain.invoke({
+            "title": game_details['title'],
+            "description": game_details['description']
+        })
+
+    def _publish(self, game_details: Dict[str, Any], campaign_data: MarketingCampaignSchema) -> Dict[str, str]:
+        """Posts a generated campaign on the (mock) social services."""
+        deployed_url = game_details["deployed_url"]
+
+        # Convert Pydantic object to dict for service consumption
+        twitter_data = campaign_data.twitter_x.model_dump()
+        reddit_data = campaign_data.reddit.model_dump()
+        linkedin_data = campaign_data.linkedin.model_dump()
+
+        results = {}
+        results['twitter_x'] = self.twitter_service.post_campaign(twitter_data, deployed_url)
+        results['reddit'] = self.reddit_service.post_campaign(reddit_data, deployed_url)
+        results['linkedin'] = self.linkedin_service.post_campaign(linkedin_data, deployed_url)
+        return results
+
+    @staticmethod
+    def _posts(game_id: str, campaign_data: MarketingCampaignSchema) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """marketing_post rows (game_id, platform, data) of a campaign."""
+        return [
+            (game_id, platform, getattr(campaign_data, field).model_dump())
+            for platform, field in PLATFORM_FIELDS
+        ]
+
     def run_campaign(self, game_id: str) -> Dict[str, str]:
         """
         The main orchestration function for the marketing campaign.
-        
+
         Args:
             game_id: The UUID of the fully generated and deployed game.
-            
+
         Returns:
             A dictionary summarizing the campaign status.
         """
@@ -47,56 +108,135 @@ class MarketingAgent:
         if not game_details or not game_details.get("deployed_url"):
             return {"status": "FAILED", "reason": "Game data or deployed_url not found in database."}
 
-        deployed_url = game_details["deployed_url"]
-        
         self.logger.info(f"Marketing Agent starting for Game ID: {game_id}")
         self.logger.info(f"Game Title: {game_details['title']}")
-        self.logger.info(f"Deployed URL: {deployed_url}")
+        self.logger.info(f"Deployed URL: {game_details['deployed_url']}")
 
         # 2. Generate Platform-Specific Content via LLM
-        prompt_template = (
-            "You are a master social media strategist. Generate a full marketing campaign for the game described below. "
-            "Tailor the tone, content, and hashtags for each platform (Twitter/X, Reddit, LinkedIn). "
-            "CRITICAL: The generated content MUST adhere strictly to the MarketingCampaignSchema."
-            "\n\nGAME TITLE: {title}\nDESCRIPTION: {description}\n\n"
-        )
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", prompt_template),
-            ("user", "Generate the content now.")
-        ])
-        
-        # Pass the Pydantic class directly
-        structured_chain = prompt | self.llm_client.with_structured_output(MarketingCampaignSchema)
-
         try:
-            # LLM Call for content generation
-            llm_output = structured_chain.invoke({
-                "title": game_details['title'], 
-                "description": game_details['description']
-            })
-            campaign_data: MarketingCampaignSchema = llm_output
-
-
+            campaign_data = self._generate_campaign(game_details)
         except Exception as e:
             self.logger.error(f"LLM content generation failed: {e}")
             return {"status": "FAILED", "reason": f"LLM generation error: {e}"}
 
         # 3. Execute Campaign on Mock Services
-        results = {}
-        
-        # Convert Pydantic object to dict for service consumption
-        twitter_data = campaign_data.twitter_x.model_dump()
-        reddit_data = campaign_data.reddit.model_dump()
-        linkedin_data = campaign_data.linkedin.model_dump()
+        self.db_manager.save_marketing_posts(self._posts(game_id, campaign_data))
+        results = self._publish(game_details, campaign_data)
 
-        self.db_manager.save_twitter_post(game_id, twitter_data)
-        self.db_manager.save_linkedin_post(game_id, twitter_data)
-        self.db_manager.save_reddit_post(game_id, twitter_data)
-
-        results['twitter_x'] = self.twitter_service.post_campaign(twitter_data, deployed_url)
-        results['reddit'] = self.reddit_service.post_campaign(reddit_data, deployed_url)
-        results['linkedin'] = self.linkedin_service.post_campaign(linkedin_data, deployed_url)
-        
         self.logger.info("status : COMPLETED campaign_results")
-        return {"status": "COMPLETED", "campaign_results": results}
\ No newline at end of file
+        return {"status": "COMPLETED", "campaign_results": results}
+
+    @staticmethod
+    def _game_block(game_details: Dict[str, Any]) -> str:
+        return (
+            f"GAME ID: {game_details['id']}\nGAME TITLE: {game_details['title']}\n"
+            f"DESCRIPTION: {game_details['description']}\n"
+        )
+
+    def _chunk_games(self, games: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Splits games into batch requests whose estimated prompt plus completion
+        tokens stay under MARKETING_BATCH_TOKEN_BUDGET.
+        """
+        base_tokens = estimate_tokens(BATCH_CAMPAIGN_PROMPT)
+        chunks, chunk, chunk_tokens = [], [], base_tokens
+        for game in games:
+            game_tokens = estimate_tokens(self._game_block(game)) + MARKETING_CAMPAIGN_TOKENS
+            if chunk and (chunk_tokens + game_tokens > MARKETING_BATCH_TOKEN_BUDGET
+                          or len(chunk) >= MARKETING_BATCH_MAX_GAMES):
+                chunks.append(chunk)
+                chunk, chunk_tokens = [], base_tokens
+            chunk.append(game)
+            chunk_tokens += game_tokens
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    @staticmethod
+    def _raw_entries(output: Dict[str, Any]) -> List[Any]:
+        """Campaign entries of a batch response, before per-entry validation."""
+        if output.get("parsed") is not None:
+            return list(output["parsed"].campaigns)
+        raw = output.get("raw")
+        # The whole response failed validation: fall back to the unvalidated arguments
+        try:
+            if getattr(raw, "tool_calls", None):
+                return list(raw.tool_calls[0]["args"].get("campaigns", []))
+            return list(json.loads(raw.content).get("campaigns", []))
+        except (AttributeError, TypeError, ValueError):
+            return []
+
+    def _generate_batch(self, games: List[Dict[str, Any]]) -> Dict[str, MarketingCampaignSchema]:
+        """
+        One LLM call producing the campaigns of several games. Entries are validated
+        one by one, so a malformed entry only costs that game a single-game retry.
+        """
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", BATCH_CAMPAIGN_PROMPT),
+            ("user", "Generate the content now.")
+        ])
+        # The limiter reserves completion tokens for every campaign of the batch, not just one
+        llm_client = self.llm_service.get_client(lane=LANE_BULK, completion_tokens=MARKETING_CAMPAIGN_TOKENS * len(games))
+        structured_chain = prompt | llm_client.with_structured_output(MarketingBatchSchema, include_raw=True)
+        output = structured_chain.invoke({"games": "\n".join(self._game_block(game) for game in games)})
+
+        wanted = {game["id"] for game in games}
+        campaigns = {}
+        for entry in self._raw_entries(output):
+            try:
+                entry = GameCampaignSchema.model_validate(entry)
+            except ValidationError as e:
+                self.logger.warning(f"Dropping invalid batch campaign entry: {e}")
+                continue
+            if entry.game_id in wanted:
+                campaigns.setdefault(entry.game_id, entry.campaign)
+        return campaigns
+
+    def run_batch_campaign(self, game_ids: List[str]) -> Dict[str, Any]:
+        """
+        Runs the marketing campaign of many games: game details are read with one
+        query, campaigns are generated with multi-game LLM requests sized under a
+        token budget (games a batch response misses or gets wrong are retried with
+        a single-game request), and all marketing_post rows are saved in one batch.
+
+        Returns:
+            A dictionary summarizing the campaign status of every game.
+        """
+        self.logger.info(f"Batch campaign initialized for {len(game_ids)} games")
+        details = self.db_manager.get_games_details(game_ids)
+        games = [details[game_id] for game_id in game_ids if details.get(game_id, {}).get("deployed_url")]
+
+        statuses: Dict[str, Any] = {
+            game_id: {"status": "FAILED", "reason": "Game data or deployed_url not found in database."}
+            for game_id in game_ids
+        }
+
+        campaigns: Dict[str, MarketingCampaignSchema] = {}
+        for chunk in self._chunk_games(games):
+            try:
+                campaigns.update(self._generate_batch(chunk))
+            except Exception as e:
+                self.logger.error(f"Batch LLM content generation failed for {len(chunk)} games: {e}")
+
+        for game in games:
+            if game["id"] in campaigns:
+                continue
+            try:
+                campaigns[game["id"]] = self._generate_campaign(game)
+            except Exception as e:
+                self.logger.error(f"LLM content generation failed: {e}")
+                statuses[game["id"]] = {"status": "FAILED", "reason": f"LLM generation error: {e}"}
+
+        posts = [post for game_id, campaign in campaigns.items() for post in self._posts(game_id, campaign)]
+        self.db_manager.save_marketing_posts(posts)
+
+        for game in games:
+            if game["id"] in campaigns:
+                statuses[game["id"]] = {
+                    "status": "COMPLETED",
+                    "campaign_results": self._publish(game, campaigns[game["id"]]),
+                }
+
+        completed = sum(1 for status in statuses.values() if status["status"] == "COMPLETED")
+        self.logger.info(f"Batch campaign finished: {completed}/{len(game_ids)} games completed")
+        return {"status": "COMPLETED" if completed == len(game_ids) else "PARTIAL", "campaigns": statuses}
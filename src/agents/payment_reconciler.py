@@ -0,0 +1,163 @@
+import argparse
+import json
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.data.db_manager import DBManager
+from src.data.library_cache import LibraryCache
+from src.services.stripe_service import StripeService
+from src.tools.logger import logger
+from src.utils.config import (
+    PAYMENT_INBOX_BATCH_SIZE,
+    PAYMENT_INBOX_CLAIM_TIMEOUT,
+    PAYMENT_INBOX_MAX_ATTEMPTS,
+    PAYMENT_INBOX_POLL_INTERVAL,
+    PAYMENT_INBOX_WORKERS,
+)
+
+PAYMENT_SUCCEEDED = "payment.succeeded"
+
+
+class PaymentReconciler:
+    """
+    Applies the payment webhooks stored in 'payment_inbox' in the background.
+
+    Each worker thread owns a DB connection and repeatedly claims a batch of pending
+    events, verifies them (signature, event type, provider check), drops duplicates
+    (a user who already owns the game) and records all purchases of the batch plus
+    every event's outcome in one transaction. A batch that fails to apply, or whose
+    claim goes stale, is retried up to PAYMENT_INBOX_MAX_ATTEMPTS times.
+
+    Refuses to start without a webhook secret: the events then stay pending instead
+    of being applied unverified or rejected for good.
+    """
+    def __init__(self, workers: int = PAYMENT_INBOX_WORKERS, batch_size: int = PAYMENT_INBOX_BATCH_SIZE,
+                 poll_interval: float = PAYMENT_INBOX_POLL_INTERVAL,
+                 payment_service: Optional[StripeService] = None, library_cache: Optional[LibraryCache] = None):
+        self.logger = logger
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.payment_service = payment_service or StripeService()
+        if not self.payment_service.has_webhook_secret:
+            raise ValueError("PAYMENT_WEBHOOK_SECRET is not set, payment webhooks cannot be verified")
+        self.library_cache = library_cache or LibraryCache()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _verify(self, event: Dict[str, Any]) -> Optional[Tuple[int, str]]:
+        """(user_id, game_id) of a genuine successful-payment event, None otherwise."""
+        payload = event["payload"].encode("utf-8")
+        if not self.payment_service.verify_webhook_signature(payload, event["signature"]):
+            self.logger.warning(f"Rejected payment event {event['event_id']}: bad signature")
+            return None
+        try:
+            body = json.loads(payload)
+            if body.get("type") != PAYMENT_SUCCEEDED:
+                return None
+            user_id, game_id = int(body["data"]["user_id"]), str(body["data"]["game_id"])
+        except (ValueError, KeyError, TypeError):
+            self.logger.warning(f"Rejected payment event {event['event_id']}: malformed payload")
+            return None
+        if not self.payment_service.verify_webhook_payment(user_id, game_id):
+            return None
+        return user_id, game_id
+
+    def process_batch(self, db_manager: DBManager) -> int:
+        """Claims and applies one batch of events; returns how many were processed."""
+        claim = uuid.uuid4().hex
+        events = db_manager.claim_payment_events(claim, self.batch_size)
+        if not events:
+            return 0
+
+        outcomes: Dict[int, str] = {}
+        verified: Dict[int, Tuple[int, str]] = {}
+        for event in events:
+            pair = self._verify(event)
+            if pair is None:
+                outcomes[event["id"]] = "rejected"
+            else:
+                verified[event["id"]] = pair
+
+        try:
+            already_paid = db_manager.get_paid_pairs(list(set(verified.values())))
+            purchases = []
+            for event_id, pair in verified.items():
+                if pair in already_paid:
+                    outcomes[event_id] = "duplicate"
+                else:
+                    already_paid.add(pair)
+                    purchases.append(pair)
+                    outcomes[event_id] = "applied"
+            db_manager.complete_payment_events(outcomes, purchases)
+        except Exception as e:
+            self.logger.error(f"Failed to apply {len(events)} payment events, will retry: {e}")
+            db_manager.retry_payment_events(claim, PAYMENT_INBOX_MAX_ATTEMPTS)
+            return len(events)
+
+        # Write-through, as for payments made through the charge endpoint
+        details = db_manager.get_games_details(list({game_id for _, game_id in purchases}))
+        for user_id, game_id in purchases:
+            deployed_url = details.get(game_id, {}).get("deployed_url")
+            self.library_cache.add_purchase(str(user_id), {"game_id": game_id, "deployed_url": deployed_url})
+
+        self.logger.info(f"Payment inbox: {len(purchases)} applied, {len(events) - len(purchases)} skipped")
+        return len(events)
+
+    def drain(self, db_manager: Optional[DBManager] = None) -> int:
+        """Processes pending events in the calling thread until the inbox is empty."""
+        db_manager = db_manager or DBManager()
+        total = 0
+        while True:
+            processed = self.process_batch(db_manager)
+            if not processed:
+                return total
+            total += processed
+
+    def _run(self):
+        db_manager = DBManager()
+        try:
+            while not self._stop.is_set():
+                try:
+                    if not self.process_batch(db_manager):
+                        db_manager.release_stale_payment_claims(PAYMENT_INBOX_CLAIM_TIMEOUT, PAYMENT_INBOX_MAX_ATTEMPTS)
+                        self._stop.wait(self.poll_interval)
+                except Exception as e:
+                    self.logger.error(f"Payment reconciler error: {e}")
+                    self._stop.wait(self.poll_interval)
+        finally:
+            db_manager.close()
+
+    def start(self):
+        """Starts the worker threads."""
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"payment-reconciler-{n}", daemon=True)
+            for n in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stops the worker threads after their current batch."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Payment webhook inbox reconciler.")
+    parser.add_argument("command", choices=["run", "drain"])
+    args = parser.parse_args()
+
+    reconciler = PaymentReconciler()
+    if args.command == "drain":
+        print(f"Processed {reconciler.drain()} payment events.")
+    else:
+        reconciler.start()
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            reconciler.stop()
@@ -0,0 +1,218 @@
+# recommendation_agent.py
+import argparse
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.data.db_manager import DBManager
+from src.tools.logger import logger
+from src.utils.config import (
+    RECOMMENDATION_BATCH,
+    RECOMMENDATION_MAX_USER_GAMES,
+    RECOMMENDATION_STATE_PATH,
+    RECOMMENDATION_TOP_K,
+)
+
+# Sparse game-by-game co-purchase counts in COO form: (rows, cols, counts)
+Matrix = Tuple[np.ndarray, np.ndarray, np.ndarray]
+_USERS_PER_QUERY = 500
+
+
+def copurchase_pairs(users: np.ndarray, games: np.ndarray, max_user_games: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Every ordered pair (game, other game) bought by the same user, once per user, from
+    parallel arrays of purchases (repeats allowed). Users with more than `max_user_games`
+    games are left out.
+    """
+    if users.size == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    owned = np.unique(np.stack([users, games], axis=1), axis=0)  # Sorted by user
+    _, starts, sizes = np.unique(owned[:, 0], return_index=True, return_counts=True)
+    kept = (sizes > 1) & (sizes <= max_user_games)
+    starts, sizes = starts[kept], sizes[kept]
+    if starts.size == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+
+    # Position of every kept purchase, the first purchase and the game count of its user
+    first = np.repeat(starts, sizes)
+    count = np.repeat(sizes, sizes)
+    positions = first + np.arange(count.size) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    # Each purchase is paired with every purchase of the same user (itself included, dropped below)
+    left = np.repeat(owned[positions, 1], count)
+    offsets = np.arange(left.size) - np.repeat(np.cumsum(count) - count, count)
+    right = owned[np.repeat(first, count) + offsets, 1]
+    distinct = left != right
+    return left[distinct], right[distinct]
+
+
+def count_pairs(left: np.ndarray, right: np.ndarray, game_count: int, weights: Optional[np.ndarray] = None) -> Matrix:
+    """Sums (weighted) pairs into a COO matrix without zero entries."""
+    keys, inverse = np.unique(left.astype(np.int64) * game_count + right, return_inverse=True)
+    counts = np.bincount(inverse, weights=weights, minlength=keys.size).astype(np.int64)
+    nonzero = counts != 0
+    keys, counts = keys[nonzero], counts[nonzero]
+    return keys // game_count, keys % game_count, counts
+
+
+class RecommendationAgent:
+    """
+    Batch job behind "players also bought": counts how many players bought each pair of
+    games and stores the RECOMMENDATION_TOP_K most co-purchased games of every game in
+    'game_related'.
+
+    The co-purchase counts are kept between runs (RECOMMENDATION_STATE_PATH) with a
+    purchase id watermark per purchases database, so refresh() only reads new purchases
+    and their buyers' histories: the change in counts is pairs(history with the new
+    purchases) - pairs(history before), and only the games it touches are rewritten.
+    """
+
+    def __init__(self, db_manager: Optional[DBManager] = None, top_k: int = RECOMMENDATION_TOP_K,
+                 max_user_games: int = RECOMMENDATION_MAX_USER_GAMES, state_path: str = RECOMMENDATION_STATE_PATH,
+                 batch_size: int = RECOMMENDATION_BATCH):
+        self.logger = logger
+        self.db_manager = db_manager or DBManager()
+        self.top_k = top_k
+        self.max_user_games = max_user_games
+        self.state_path = state_path
+        self.batch_size = batch_size
+
+    def _sources(self) -> List[DBManager]:
+        """The databases holding purchases: every shard, or the main database."""
+        return list(self.db_manager.shards) or [self.db_manager]
+
+    def _read_after(self, source: DBManager, after_id: int) -> List[Dict]:
+        rows = []
+        while True:
+            batch = source.get_paid_purchases_after(after_id, self.batch_size)
+            rows += batch
+            if len(batch) < self.batch_size:
+                return rows
+            after_id = batch[-1]["id"]
+
+    def _encode(self, rows: List[Dict], game_ids: List[str], index: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """(users, games) arrays of purchase rows, adding unseen games to game_ids/index."""
+        for row in rows:
+            if row["game_id"] not in index:
+                index[row["game_id"]] = len(game_ids)
+                game_ids.append(row["game_id"])
+        users = np.fromiter((int(row["user_id"]) for row in rows), np.int64, len(rows))
+        games = np.fromiter((index[row["game_id"]] for row in rows), np.int64, len(rows))
+        return users, games
+
+    def _top_k(self, matrix: Matrix, games: np.ndarray, game_ids: List[str]) -> Dict[str, List[Tuple[str, int]]]:
+        """The most co-purchased neighbours of `games` (an empty list for games that have none)."""
+        rows, cols, counts = matrix
+        selected = np.isin(rows, games)
+        rows, cols, counts = rows[selected], cols[selected], counts[selected]
+        order = np.lexsort((cols, -counts, rows))
+        rows, cols, counts = rows[order], cols[order], counts[order]
+        kept = np.arange(rows.size) - np.searchsorted(rows, rows) < self.top_k
+
+        related: Dict[str, List[Tuple[str, int]]] = {game_ids[game]: [] for game in games.tolist()}
+        for game, other, count in zip(rows[kept].tolist(), cols[kept].tolist(), counts[kept].tolist()):
+            related[game_ids[game]].append((game_ids[other], count))
+        return related
+
+    def rebuild(self) -> int:
+        """Recomputes every game's neighbours from the full purchase history; returns the games written."""
+        if self.db_manager.shards.resharding:
+            self.logger.warning("RecommendationAgent: skipped while resharding, purchases may be on two shards")
+            return 0
+        game_ids: List[str] = []
+        index: Dict[str, int] = {}
+        users, games, watermarks = [], [], []
+        for source in self._sources():
+            rows = self._read_after(source, 0)
+            source_users, source_games = self._encode(rows, game_ids, index)
+            users.append(source_users)
+            games.append(source_games)
+            watermarks.append(rows[-1]["id"] if rows else 0)
+
+        left, right = copurchase_pairs(np.concatenate(users), np.concatenate(games), self.max_user_games)
+        matrix = count_pairs(left, right, max(len(game_ids), 1))
+        related = self._top_k(matrix, np.unique(matrix[0]), game_ids)
+        self.db_manager.save_related_games(related, replace_all=True)
+        self._save_state(game_ids, matrix, watermarks)
+        self.logger.info(f"RecommendationAgent: rebuilt neighbours of {len(related)} games")
+        return len(related)
+
+    def refresh(self) -> int:
+        """Applies the purchases made since the last run; returns the games rewritten."""
+        state = self._load_state()
+        if state is None:
+            return self.rebuild()
+        if self.db_manager.shards.resharding:
+            self.logger.warning("RecommendationAgent: skipped while resharding, purchases may be on two shards")
+            return 0
+        game_ids, matrix, watermarks = state
+        index = {game_id: number for number, game_id in enumerate(game_ids)}
+
+        full_users, full_games, old_users, old_games = [], [], [], []
+        new_watermarks = []
+        for source, watermark in zip(self._sources(), watermarks):
+            new_rows = self._read_after(source, watermark)
+            new_watermark = new_rows[-1]["id"] if new_rows else watermark
+            new_watermarks.append(new_watermark)
+            buyers = sorted({row["user_id"] for row in new_rows})
+            history = []
+            for start in range(0, len(buyers), _USERS_PER_QUERY):
+                history += source.get_users_paid_purchases(buyers[start:start + _USERS_PER_QUERY])
+            # Purchases after the new watermark are left for the next run
+            history = [row for row in history if row["id"] <= new_watermark]
+            users, games = self._encode(history, game_ids, index)
+            old = np.fromiter((row["id"] <= watermark for row in history), bool, len(history))
+            full_users.append(users)
+            full_games.append(games)
+            old_users.append(users[old])
+            old_games.append(games[old])
+
+        if new_watermarks == list(watermarks):
+            return 0
+        full = copurchase_pairs(np.concatenate(full_users), np.concatenate(full_games), self.max_user_games)
+        before = copurchase_pairs(np.concatenate(old_users), np.concatenate(old_games), self.max_user_games)
+        game_count = max(len(game_ids), 1)
+        delta = count_pairs(
+            np.concatenate([full[0], before[0]]), np.concatenate([full[1], before[1]]), game_count,
+            np.concatenate([np.ones(full[0].size), -np.ones(before[0].size)]),
+        )
+        matrix = count_pairs(
+            np.concatenate([matrix[0], delta[0]]), np.concatenate([matrix[1], delta[1]]), game_count,
+            np.concatenate([matrix[2], delta[2]]).astype(np.float64),
+        )
+
+        related = self._top_k(matrix, np.unique(delta[0]), game_ids)
+        if related:
+            self.db_manager.save_related_games(related)
+        self._save_state(game_ids, matrix, new_watermarks)
+        self.logger.info(f"RecommendationAgent: refreshed neighbours of {len(related)} games")
+        return len(related)
+
+    def _save_state(self, game_ids: List[str], matrix: Matrix, watermarks: List[int]):
+        temporary = f"{self.state_path}.tmp"
+        with open(temporary, "wb") as state_file:
+            np.savez(
+                state_file, game_ids=np.array(game_ids, dtype=str), rows=matrix[0], cols=matrix[1], counts=matrix[2],
+                watermarks=np.array(watermarks, dtype=np.int64), max_user_games=self.max_user_games,
+            )
+        os.replace(temporary, self.state_path)
+
+    def _load_state(self) -> Optional[Tuple[List[str], Matrix, List[int]]]:
+        """The saved counts, or None when there are none for the current purchase databases and settings."""
+        if not os.path.exists(self.state_path):
+            return None
+        with np.load(self.state_path) as state:
+            if len(state["watermarks"]) != len(self._sources()) or int(state["max_user_games"]) != self.max_user_games:
+                return None
+            return (state["game_ids"].tolist(), (state["rows"], state["cols"], state["counts"]),
+                    state["watermarks"].tolist())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Players-also-bought recommendations.")
+    parser.add_argument("command", choices=["refresh", "rebuild"])
+    args = parser.parse_args()
+
+    agent = RecommendationAgent()
+    games = agent.rebuild() if args.command == "rebuild" else agent.refresh()
+    print(f"Neighbours written for {games} games.")
@@ -0,0 +1,67 @@
+import argparse
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+from src.data.db_manager import DBManager
+from src.tools.logger import logger
+
+# Upper bound on the day range a single daily report may cover
+MAX_REPORT_DAYS = 366
+# Upper bound on the hashtag sets a hashtag report may list
+MAX_HASHTAG_REPORT = 100
+
+
+class ReportingAgent:
+    """
+    Serves revenue and conversion dashboards from the rollup tables that DBManager
+    maintains on every purchase and marketing post, so reports never scan
+    'purchases' or 'marketing_post' on the billing hot path.
+    """
+    def __init__(self, db_manager: Optional[DBManager] = None):
+        self.logger = logger
+        self.db_manager = db_manager or DBManager()
+
+    def get_game_report(self, game_id: str) -> Dict[str, Any]:
+        """Purchases, revenue, marketing posts and purchases-per-post for one game."""
+        rollup = self.db_manager.get_game_rollup(game_id) or {
+            "game_id": game_id, "purchases": 0, "revenue": 0, "marketing_posts": 0
+        }
+        posts = rollup["marketing_posts"]
+        return {**rollup, "conversion": rollup["purchases"] / posts if posts else None}
+
+    def get_daily_report(self, start_day: date, end_day: date) -> Dict[str, Any]:
+        """Purchases and revenue per day, for at most MAX_REPORT_DAYS days."""
+        if end_day < start_day:
+            start_day, end_day = end_day, start_day
+        start_day = max(start_day, end_day - timedelta(days=MAX_REPORT_DAYS - 1))
+        days = self.db_manager.get_daily_rollups(start_day.isoformat(), end_day.isoformat())
+        return {"start_day": start_day, "end_day": end_day, "days": days}
+
+    def get_platform_report(self) -> Dict[str, Any]:
+        """Marketing posts per platform."""
+        return {"platforms": self.db_manager.get_platform_rollups()}
+
+    def get_campaign_status(self, game_id: str) -> Dict[str, Any]:
+        """Marketing posts of one game per platform and status, e.g. {"twitter": {"posted": 1}}."""
+        platforms: Dict[str, Dict[str, int]] = {}
+        for row in self.db_manager.get_campaign_status(game_id):
+            platforms.setdefault(row["platform"], {})[row["status"]] = row["posts"]
+        return {"game_id": game_id, "platforms": platforms}
+
+    def get_hashtag_report(self, limit: int) -> Dict[str, Any]:
+        """The most used hashtag sets across all marketing posts, at most MAX_HASHTAG_REPORT."""
+        return {"hashtags": self.db_manager.get_hashtag_counts(min(limit, MAX_HASHTAG_REPORT))}
+
+    def backfill(self):
+        """Rebuilds all rollups from history."""
+        self.logger.info("Backfilling reporting rollups")
+        self.db_manager.rebuild_rollups()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reporting rollup maintenance.")
+    parser.add_argument("command", choices=["backfill"])
+    parser.parse_args()
+
+    ReportingAgent().backfill()
+    print("Rollups rebuilt.")
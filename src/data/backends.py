@@ -0,0 +1,233 @@
+# backends.py
+import atexit
+import sqlite3
+import weakref
+from pathlib import Path
+from typing import List, Optional
+
+import mysql.connector
+
+from src.utils.config import (
+    DB_BACKEND,
+    DB_HOST,
+    DB_NAME,
+    DB_PASSWORD,
+    DB_READ_REPLICAS,
+    DB_SHARDS,
+    DB_USER,
+    SQLITE_PATH,
+    SQLITE_READ_REPLICAS,
+    SQLITE_SHARDS,
+)
+
+SQLITE_SCHEMA_PATH = Path(__file__).resolve().parents[2] / "sql_files" / "setup_sqlite.sql"
+SQLITE_SHARD_SCHEMA_PATH = SQLITE_SCHEMA_PATH.with_name("setup_shard_sqlite.sql")
+
+# (table, column, definition) added to SQLite files created before the column was part of the schema
+SQLITE_ADDED_COLUMNS = (
+    ("marketing_post", "headline", "TEXT GENERATED ALWAYS AS (json_extract(payload_json, '$.headline')) VIRTUAL"),
+    ("marketing_post", "hashtags", "TEXT GENERATED ALWAYS AS (json_extract(payload_json, '$.hashtags')) VIRTUAL"),
+)
+
+# Objects holding DB connections (DBManager, LogsDBManager), closed together at exit.
+# The references are weak: a manager that is dropped is collected with its connection
+# instead of being kept alive until exit by its cleanup callback.
+_connection_owners: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def register_connection_owner(owner):
+    """Closes `owner` (anything with close() and open_connections()) at exit if it is still alive."""
+    _connection_owners.add(owner)
+
+
+def open_connection_count() -> int:
+    """DB connections currently open in this process by registered owners."""
+    return sum(owner.open_connections() for owner in list(_connection_owners))
+
+
+def _close_connection_owners():
+    for owner in list(_connection_owners):
+        owner.close()
+
+
+atexit.register(_close_connection_owners)
+
+
+class StorageBackend:
+    """
+    Connection factory and SQL dialect details for one database engine.
+    DBManager and LogsDBManager write '%s' placeholders and dictionary rows;
+    each backend adapts them to its driver.
+    """
+    name = "base"
+    Error = Exception  # Base class of the driver's errors
+
+    def connect(self):
+        raise NotImplementedError
+
+    def is_connected(self, conn) -> bool:
+        raise NotImplementedError
+
+    def cursor(self, conn):
+        """A cursor returning rows as dictionaries."""
+        raise NotImplementedError
+
+    def prepare(self, query: str) -> str:
+        """Rewrites a '%s'-style query for the driver."""
+        return query
+
+    def upsert_increment(self, table: str, key_columns: List[str], counter_columns: List[str], source: str) -> str:
+        """
+        INSERT into `table` from `source` (a SELECT or a VALUES list) that adds the
+        counters onto the existing row when one with the same key already exists.
+        """
+        raise NotImplementedError
+
+    def insert_ignore(self, table: str, columns: List[str]) -> str:
+        """INSERT of one row that is silently skipped when it violates a unique key."""
+        raise NotImplementedError
+
+    def replication_lag(self, conn) -> Optional[float]:
+        """Seconds a replica connection lags its primary, None if replication is broken."""
+        return 0.0
+
+
+class MySQLBackend(StorageBackend):
+    name = "MySQL"
+    Error = mysql.connector.Error
+
+    def __init__(self, host: str = DB_HOST, user: str = DB_USER, password: str = DB_PASSWORD, database: str = DB_NAME):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.database = database
+
+    def connect(self):
+        return mysql.connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database
+        )
+
+    def is_connected(self, conn) -> bool:
+        return conn.is_connected()
+
+    def cursor(self, conn):
+        return conn.cursor(dictionary=True)
+
+    def upsert_increment(self, table: str, key_columns: List[str], counter_columns: List[str], source: str) -> str:
+        columns = ', '.join(key_columns + counter_columns)
+        updates = ', '.join(f"{column} = {column} + VALUES({column})" for column in counter_columns)
+        return f"INSERT INTO {table} ({columns}) {source} ON DUPLICATE KEY UPDATE {updates}"
+
+    def insert_ignore(self, table: str, columns: List[str]) -> str:
+        placeholders = ', '.join(['%s'] * len(columns))
+        return f"INSERT IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    def replication_lag(self, conn) -> Optional[float]:
+        cursor = self.cursor(conn)
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+            status = cursor.fetchone()
+        finally:
+            cursor.close()
+        if status is None:
+            return 0.0  # not a replica (e.g. the primary listed as a read host)
+        lag = status.get("Seconds_Behind_Source")
+        return float(lag) if lag is not None else None
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Embedded single-file storage. Connections run in WAL mode (readers never
+    block the writer) with pragmas tuned for a small, hot working set, and
+    the schema from sql_files/setup_sqlite.sql (or `schema_path`) is applied on connect.
+    """
+    name = "SQLite"
+    Error = sqlite3.Error
+
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",  # durable at checkpoints, no fsync per commit in WAL mode
+        "PRAGMA foreign_keys = ON",
+        "PRAGMA busy_timeout = 5000",
+        "PRAGMA cache_size = -65536",  # 64 MiB page cache
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA mmap_size = 268435456",  # 256 MiB memory-mapped reads
+    )
+
+    def __init__(self, path: str = SQLITE_PATH, schema_path: Path = SQLITE_SCHEMA_PATH):
+        self.path = path
+        self.schema_path = schema_path
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        conn.row_factory = _dict_row
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        self._add_missing_columns(conn)
+        conn.executescript(self.schema_path.read_text(encoding="utf-8"))
+        return conn
+
+    @staticmethod
+    def _add_missing_columns(conn):
+        """Brings existing tables up to date before the schema creates indexes on the new columns."""
+        for table, column, definition in SQLITE_ADDED_COLUMNS:
+            # table_xinfo, unlike table_info, lists generated columns; no rows if the table does not exist yet
+            columns = {row["name"] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+            if columns and column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def is_connected(self, conn) -> bool:
+        try:
+            conn.total_changes  # raises once the connection is closed
+            return True
+        except sqlite3.ProgrammingError:
+            return False
+
+    def cursor(self, conn):
+        return conn.cursor()
+
+    def prepare(self, query: str) -> str:
+        return query.replace("%s", "?")
+
+    def upsert_increment(self, table: str, key_columns: List[str], counter_columns: List[str], source: str) -> str:
+        # A SELECT source must have a WHERE clause, otherwise SQLite parses ON CONFLICT as a join constraint
+        columns = ', '.join(key_columns + counter_columns)
+        updates = ', '.join(f"{column} = {column} + excluded.{column}" for column in counter_columns)
+        return f"INSERT INTO {table} ({columns}) {source} ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates}"
+
+    def insert_ignore(self, table: str, columns: List[str]) -> str:
+        placeholders = ', '.join(['%s'] * len(columns))
+        return f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+def get_backend(name: Optional[str] = None, sqlite_path: str = SQLITE_PATH) -> StorageBackend:
+    """Returns the backend selected by DB_BACKEND (or `name`)."""
+    name = (name or DB_BACKEND).lower()
+    if name == "sqlite":
+        return SQLiteBackend(sqlite_path)
+    if name == "mysql":
+        return MySQLBackend()
+    raise ValueError(f"Unknown DB_BACKEND '{name}', expected 'mysql' or 'sqlite'.")
+
+
+def get_replica_backends(name: Optional[str] = None) -> List[StorageBackend]:
+    """Backends of the configured read replicas (DB_READ_REPLICAS or SQLITE_READ_REPLICAS)."""
+    name = (name or DB_BACKEND).lower()
+    if name == "sqlite":
+        return [SQLiteBackend(path) for path in SQLITE_READ_REPLICAS]
+    return [MySQLBackend(host=host) for host in DB_READ_REPLICAS]
+
+
+def get_shard_backends(name: Optional[str] = None) -> List[StorageBackend]:
+    """Backends of the configured purchase shards (DB_SHARDS or SQLITE_SHARDS), in shard order."""
+    name = (name or DB_BACKEND).lower()
+    if name == "sqlite":
+        return [SQLiteBackend(path, schema_path=SQLITE_SHARD_SCHEMA_PATH) for path in SQLITE_SHARDS]
+    return [MySQLBackend(host=host) for host in DB_SHARDS]
@@ -1,90 +1,181 @@
-import atexit
 import json
-from typing import Any, Dict, List, Optional
-import mysql.connector
-from mysql.connector import Error as MySQLError # Import specific error for clarity
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from src.data.backends import (
+    StorageBackend,
+    get_backend,
+    get_replica_backends,
+    get_shard_backends,
+    register_connection_owner,
+)
+from src.data.replicas import ReplicaPool, recent_writes
+from src.data.shards import ShardSet
 from src.tools.logger import logger
-from src.utils.config import DB_HOST, DB_USER, DB_PASSWORD, DB_NAME
+from src.utils.config import DB_SHARDS_PREVIOUS_COUNT
 
 class DBManager:
 
-    def __init__(self):
+    def __init__(self, backend: Optional[StorageBackend] = None, replicas: Optional[List[StorageBackend]] = None,
+                 shards: Optional[List[StorageBackend]] = None, previous_shard_count: int = DB_SHARDS_PREVIOUS_COUNT):
         """
         Attempts to establish a database connection and stores it on the instance.
+
+        Args:
+            backend: Storage backend to connect with, defaults to the one selected by DB_BACKEND.
+            replicas: Read replica backends, defaults to the configured read replicas (if any).
+                Replica connections are opened lazily by their first health check.
+            shards: Purchase shard backends, defaults to the configured shards (if any).
+                Without shards, purchases are stored in the main database.
+            previous_shard_count: Number of shards before the resharding in progress, 0 if none.
         """
         self.conn = None
         self.logger = logger
+        self.backend = backend or get_backend()
+        self.replicas = ReplicaPool(replicas if replicas is not None else get_replica_backends())
+        self.shards = ShardSet(
+            [DBManager(shard, replicas=[], shards=[]) for shard in (shards if shards is not None else get_shard_backends())],
+            previous_shard_count,
+        )
+        self._in_transaction = False
         try:
-            self.conn = mysql.connector.connect(
-                host=DB_HOST,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                database=DB_NAME 
-            )
-            if self.conn.is_connected():
-                print("✅ DBManager: MySQL Connection established in __init__.")
+            self.conn = self.backend.connect()
+            if self.backend.is_connected(self.conn):
+                print(f"✅ DBManager: {self.backend.name} Connection established in __init__.")
             else:
-                print("❌ DBManager: Failed to establish MySQL connection.")
+                print(f"❌ DBManager: Failed to establish {self.backend.name} connection.")
         
-        except MySQLError as err:
+        except self.backend.Error as err:
             print(f"❌ DBManager: Connection Error in __init__: {err}")
             # Ensure conn is explicitly None if connection fails
             self.conn = None 
         
-        # Register cleanup on application exit
-        atexit.register(self._close_connection)
+        # Register cleanup on application exit (without keeping this instance alive)
+        register_connection_owner(self)
 
     def _close_connection(self):
         """Closes the database connection safely."""
-        if self.conn and self.conn.is_connected():
+        if self.conn and self.backend.is_connected(self.conn):
             self.conn.close()
             self.logger.info("DBManager: Connection closed.")
 
-    def _execute_query(self, query: str, params=None, fetch_one=False):
+    def close(self):
+        """Closes the connection now instead of at exit."""
+        self._close_connection()
+        self.replicas.close()
+        self.shards.close()
+
+    def open_connections(self) -> int:
+        """Open connections of this manager: the primary and any replica (shards count their own)."""
+        primary = 1 if self.conn and self.backend.is_connected(self.conn) else 0
+        return primary + self.replicas.open_connections()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups several statements into one transaction: nothing is committed until the
+        block exits, and any error rolls everything back and is re-raised.
+        Nested blocks join the outermost transaction.
+        """
+        if self._in_transaction:
+            yield self
+            return
+
+        self._in_transaction = True
+        try:
+            yield self
+            self.conn.commit()
+        except Exception:
+            if self.conn:
+                self.conn.rollback()
+            raise
+        finally:
+            self._in_transaction = False
+
+    def _execute_query(self, query: str, params=None, fetch_one=False, raise_errors=False):
         """
         A general purpose method to execute a query (SELECT, INSERT, UPDATE, DELETE).
         Uses the instance's persistent connection.
+        Errors are logged and swallowed unless raise_errors is set or a transaction is open.
         """
         self.logger.info(f'execute query called {query}')
-        if not self.conn or not self.conn.is_connected():
+        raise_errors = raise_errors or self._in_transaction
+        if not self.conn or not self.backend.is_connected(self.conn):
             print("❌ DBManager: Cannot execute query. Connection is closed or invalid.")
+            if raise_errors:
+                raise RuntimeError("DBManager: connection is closed or invalid.")
             return None
 
         result = None
         try:
-            cursor = self.conn.cursor(dictionary=True) # Use dictionary=True for column name access
-            cursor.execute(query, params or ())
+            cursor = self.backend.cursor(self.conn) # Rows are dictionaries for column name access
+            cursor.execute(self.backend.prepare(query), params or ())
             
-            if query.strip().upper().startswith("SELECT"):
+            is_select = query.strip().upper().startswith("SELECT")
+            if is_select:
                 result = cursor.fetchone() if fetch_one else cursor.fetchall()
             
             elif query.strip().upper().startswith("INSERT"):
-                self.conn.commit()
+                if not self._in_transaction:
+                    self.conn.commit()
                 result = cursor.lastrowid
             
             else: # UPDATE, DELETE
-                self.conn.commit()
+                if not self._in_transaction:
+                    self.conn.commit()
                 result = cursor.rowcount 
 
             cursor.close()
+            if is_select and not self._in_transaction:
+                # End the read transaction, or the connection (MySQL runs REPEATABLE READ
+                # without autocommit) would keep reading the snapshot of its first SELECT
+                self.conn.rollback()
         
-        except MySQLError as err:
+        except self.backend.Error as err:
             self.logger.error(f"DBManager Query Error: {err}")
+            if raise_errors:
+                raise
             self.conn.rollback()
         
         return result
     
+    def _execute_read(self, query: str, params=None, fetch_one=False, user_id=None):
+        """
+        Runs a SELECT on a healthy read replica, falling back to the primary when there is
+        none, when it fails, inside a transaction, or when `user_id` wrote recently
+        (read-your-writes).
+        """
+        if not self.replicas or self._in_transaction or (user_id is not None and recent_writes.is_recent(user_id)):
+            return self._execute_query(query, params, fetch_one)
+        replica = self.replicas.acquire()
+        if replica is None:
+            return self._execute_query(query, params, fetch_one)
+
+        try:
+            cursor = replica.backend.cursor(replica.conn)
+            cursor.execute(replica.backend.prepare(query), params or ())
+            result = cursor.fetchone() if fetch_one else cursor.fetchall()
+            cursor.close()
+            # End the read transaction, or the next read would reuse its (older) snapshot
+            replica.conn.rollback()
+            return result
+        except replica.backend.Error as err:
+            self.logger.warning(f"DBManager: read replica failed, using the primary: {err}")
+            self.replicas.mark_down(replica)
+            return self._execute_query(query, params, fetch_one)
+
     def insert_new_game(self, data: Dict[str, Any]) -> bool:
         """
-        Inserts a complete game record into the 'games' table in a single transaction.
+        Inserts a complete game record into the 'games' table.
         Assumes 'data' dictionary keys exactly match the table columns (id, title, description, etc.).
+        Raises on failure; wrap in transaction() to group it with other writes.
         """
-        result = False
         # 1. Define the columns based on the input dictionary keys
         keys = list(data.keys())
         columns = ', '.join(keys)
         
-        # 2. Create the SQL placeholders (%s for MySQL parameterization)
+        # 2. Create the SQL placeholders (%s parameterization, adapted by the backend)
         placeholders = ', '.join(['%s'] * len(keys))
         
         # 3. Construct the dynamic SQL statement
@@ -94,46 +185,137 @@ class DBManager:
         values = tuple(data.values())
 
         try:
-            status = self._execute_query(sql, values)
-            if status is not None:
-                result = True
+            self._execute_query(sql, values, raise_errors=True)
             self.logger.info(f"Successfully inserted game: {data['title']} with ID: {data['id']}")
 
-        except mysql.connector.Error as err:
-            # Rollback in case of any database error
-            if self.conn:
-                self.conn.rollback()
-            
-            # Log the error details
-            self.logger.error(f"MySQL Error during game insertion (ID: {data.get('id')}): {err}")
+        except self.backend.Error as err:
+            # Log the error details; the caller (or transaction()) decides how to recover
+            self.logger.error(f"{self.backend.name} Error during game insertion (ID: {data.get('id')}): {err}")
             raise err
-        except ValueError as err:
-            self.logger.error(f"Data Validation Error: {err}")
 
-        return result
-    
-    def get_purchased_games(self, user_id: str) -> List[Dict[str, str]]:
+        return True
+
+    def update_deployed_urls(self, deployed_urls: Dict[str, str]) -> Optional[int]:
+        """
+        Writes the deployed URL of many games with a single UPDATE statement.
+
+        Args:
+            deployed_urls: Mapping of game_id to deployed URL.
+
+        Returns:
+            The number of updated rows.
+        """
+        if not deployed_urls:
+            return 0
+        cases = ' '.join(['WHEN %s THEN %s'] * len(deployed_urls))
+        placeholders = ', '.join(['%s'] * len(deployed_urls))
+        query = f"UPDATE games SET deployed_url = CASE id {cases} END WHERE id IN ({placeholders})"
+        params = [value for pair in deployed_urls.items() for value in pair] + list(deployed_urls)
+        return self._execute_query(query, tuple(params))
+
+    def get_undeployed_games(self) -> List[Dict[str, str]]:
+        """Returns (id, file_url) of games whose deployed URL is still their local file path."""
+        query = "SELECT id, file_url FROM games WHERE deployed_url = file_url"
+        return self._execute_query(query, raise_errors=True)
+
+    def get_existing_game_ids(self, game_ids: List[str]) -> set:
+        """Returns the subset of game_ids that have a row in 'games'."""
+        if not game_ids:
+            return set()
+        placeholders = ', '.join(['%s'] * len(game_ids))
+        query = f"SELECT id FROM games WHERE id IN ({placeholders})"
+        results = self._execute_query(query, tuple(game_ids), raise_errors=True)
+        return {row["id"] for row in results}
+
+    def get_game_files(self) -> List[Dict[str, str]]:
+        """Returns (id, file_url) for every game, used by the disk/DB consistency check."""
+        query = "SELECT id, file_url FROM games"
+        return self._execute_query(query, raise_errors=True)
+
+    def save_game_fingerprint(self, game_id: str, category: Optional[str], signature: bytes):
+        """Stores the MinHash signature used to detect near-duplicate games."""
+        query = "INSERT INTO game_fingerprints (game_id, category, signature) VALUES (%s, %s, %s)"
+        return self._execute_query(query, (game_id, category, signature))
+
+    def save_game_fingerprints(self, rows: List[Tuple[str, Optional[str], bytes]], chunk_size: int = 500):
+        """Stores many (game_id, category, signature) rows in one transaction. Raises on failure."""
+        with self.transaction():
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                placeholders = ', '.join(['(%s, %s, %s)'] * len(chunk))
+                self._execute_query(
+                    f"INSERT INTO game_fingerprints (game_id, category, signature) VALUES {placeholders}",
+                    tuple(value for row in chunk for value in row),
+                )
+
+    def get_game_fingerprints(self) -> List[Dict[str, Any]]:
+        """Returns every stored fingerprint (game_id, category, signature)."""
+        query = "SELECT game_id, category, signature FROM game_fingerprints"
+        results = self._execute_query(query)
+        return results if isinstance(results, list) else []
+
+    def get_games_without_fingerprint(self) -> List[Dict[str, Any]]:
+        """Returns games (id, title, description, html_code) generated before fingerprinting existed."""
+        query = """
+            SELECT g.id, g.title, g.description, g.html_code
+            FROM games g
+            LEFT JOIN game_fingerprints f ON f.game_id = g.id
+            WHERE f.game_id IS NULL
+        """
+        results = self._execute_query(query)
+        return results if isinstance(results, list) else []
+
+    def get_purchased_games(self, user_id: str, from_primary: bool = False) -> List[Dict[str, str]]:
         """
         Retrieves a list of games (ID and URL) that the specific user has paid for,
-        by joining the 'payments' and 'games' tables.
+        by joining the 'purchases' and 'games' tables.
+        Pass from_primary=True for results that get cached: a replica may be missing a
+        purchase made through another process, which the user's stickiness cannot see.
         """
         query = """
             SELECT 
                 p.game_id, 
                 g.deployed_url
             FROM 
-                payments p
+                purchases p
             INNER JOIN 
                 games g ON p.game_id = g.id
             WHERE 
                 p.user_id = %s;
         """
-        # Execute the query and fetch all results as a list of dictionaries
-        results = self._execute_query(query, (user_id,), fetch_one=False)
-        
+        if self.shards:
+            return self._get_sharded_purchased_games(user_id)
+
+        if from_primary:
+            results = self._execute_query(query, (user_id,))
+        else:
+            # On a replica unless the user just paid through this process
+            results = self._execute_read(query, (user_id,), fetch_one=False, user_id=user_id)
+            if not results and self.replicas:
+                # As in check_payment_status(): an empty library is confirmed on the primary
+                results = self._execute_query(query, (user_id,))
+
         # If the query fails or returns nothing, return an empty list
         return results if isinstance(results, list) else []
 
+    def _get_sharded_purchased_games(self, user_id: str) -> List[Dict[str, str]]:
+        """get_purchased_games() with shards: game ids from the user's shard(s), URLs from the main catalogue."""
+        game_ids = []
+        for shard in self.shards.read_shards(user_id):
+            game_ids += shard.get_purchased_game_ids(user_id)
+        game_ids = list(dict.fromkeys(game_ids))
+        details = self.get_games_details(game_ids)
+        return [
+            {"game_id": game_id, "deployed_url": details[game_id]["deployed_url"]}
+            for game_id in game_ids if game_id in details
+        ]
+
+    def get_purchased_game_ids(self, user_id: str) -> List[str]:
+        """Ids of the games the user bought, from this database's purchases only."""
+        query = "SELECT DISTINCT game_id FROM purchases WHERE user_id = %s"
+        results = self._execute_query(query, (user_id,))
+        return [row["game_id"] for row in results] if isinstance(results, list) else []
+
     def get_game_details(self, game_id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieves necessary game details (title, description, deployed_url) 
@@ -147,7 +329,7 @@ class DBManager:
         """
         
         # 2. Delegate execution to the helper method
-        data = self._execute_query(query, params=(game_id,), fetch_one=True)
+        data = self._execute_read(query, params=(game_id,), fetch_one=True)
 
         if data:
             # We only return the specific fields the Marketing Agent needs
@@ -161,110 +343,367 @@ class DBManager:
         self.logger.error(f"--- [DBManager] ERROR: Game ID '{game_id}' not found.")
         return None
     
-    def save_twitter_post(self,game_id, data):
-        """saving twitter post data in database"""
-        try:    
-            serialized_payload = json.dumps(data)
-            query = (
-                "INSERT INTO marketing_post (game_id, platform, payload_json, post_url, status) "
-                "VALUES (%s, %s, %s, %s, %s)"
-            )
-            
-            params = (
-                game_id,
-                "twitter",
-                serialized_payload,
-                "twitter.com/mock_url",
-                "posted"
-            )
-            
-            return self._execute_query(query, params)
-        
-        except Exception as e:
-            self.logger.error(e)
-    
-    def save_linkedin_post(self,game_id, data):
+    def get_games_details(self, game_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Same fields as get_game_details() for many games with one query, keyed by game_id."""
+        if not game_ids:
+            return {}
+        placeholders = ', '.join(['%s'] * len(game_ids))
+        query = f"SELECT id, title, description, deployed_url FROM games WHERE id IN ({placeholders})"
+        results = self._execute_read(query, tuple(game_ids))
+        return {row["id"]: row for row in results} if isinstance(results, list) else {}
+
+    def get_games_after(self, created: str, game_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Catalogue fields (id, title, description, created) of up to `limit` games that
+        come after (created, game_id), oldest first. A keyset scan of idx_games_created.
+        """
+        query = """
+            SELECT id, title, description, created
+            FROM games
+            WHERE created > %s OR (created = %s AND id > %s)
+            ORDER BY created, id
+            LIMIT %s
         """
-        Logs a new social media marketing post to the database.
+        results = self._execute_read(query, (created, created, game_id, limit))
+        if not isinstance(results, list):
+            return []
+        # MySQL returns datetimes, SQLite the stored text; both print as 'YYYY-MM-DD HH:MM:SS'
+        return [{**row, "created": str(row["created"])} for row in results]
+
+    def save_marketing_posts(self, posts: List[Tuple[str, str, Dict[str, Any]]], chunk_size: int = 500) -> int:
+        """
+        Logs marketing posts (any platform) with multi-row INSERTs of up to `chunk_size`
+        rows and updates the reporting rollups with one upsert per rollup table, all in a
+        single transaction.
 
         Args:
-            game_id: The ID of the game being marketed.
-            data: post data (e.g., 'twitter', 'facebook').
+            posts: (game_id, platform, post data) tuples.
 
         Returns:
-            True if the insertion was successful, False otherwise.
+            The number of saved posts, 0 if the batch failed.
         """
-        serialized_payload = json.dumps(data)
+        if not posts:
+            return 0
+        per_game = Counter(game_id for game_id, _, _ in posts)
+        per_platform = Counter(platform for _, platform, _ in posts)
+        try:
+            with self.transaction():
+                for start in range(0, len(posts), chunk_size):
+                    chunk = posts[start:start + chunk_size]
+                    rows = ', '.join(["(%s, %s, %s, %s, 'posted')"] * len(chunk))
+                    self._execute_query(
+                        f"INSERT INTO marketing_post (game_id, platform, payload_json, post_url, status) VALUES {rows}",
+                        tuple(
+                            value for game_id, platform, data in chunk
+                            for value in (game_id, platform, json.dumps(data), f"{platform}.com/mock_url")
+                        ),
+                    )
+                self._execute_query(
+                    self.backend.upsert_increment(
+                        "rollup_game", ["game_id"], ["marketing_posts"],
+                        "VALUES " + ', '.join(["(%s, %s)"] * len(per_game)),
+                    ),
+                    tuple(value for pair in per_game.items() for value in pair),
+                )
+                self._execute_query(
+                    self.backend.upsert_increment(
+                        "rollup_platform", ["platform"], ["posts"],
+                        "VALUES " + ', '.join(["(%s, %s)"] * len(per_platform)),
+                    ),
+                    tuple(value for pair in per_platform.items() for value in pair),
+                )
+        except self.backend.Error as err:
+            self.logger.error(f"DBManager: failed to save {len(posts)} marketing posts: {err}")
+            return 0
+        return len(posts)
+
+    def update_payments(self, user_id: str, game_id: str):
+        amount = 1.0  # The access charge of every game
         query = (
-            "INSERT INTO marketing_post (game_id, platform, payload_json, post_url, status) "
-            "VALUES (%s, %s, %s, %s, %s)"
+            "INSERT INTO purchases (user_id, game_id, payment_method, amount, status) "
+            "VALUES (%s, %s, 'stripe', %s, 'paid')"
         )
+        params = (user_id, game_id, amount)
         
-        params = (
-            game_id,
-            "linkedin",
-            serialized_payload,
-            "linkedin.com/mock_url",
-            "posted"
+        # Execute the INSERT statement and update the revenue rollups atomically.
+        # With shards the purchase is committed on the user's shard first: if the
+        # rollups then fail, the purchase stands and rebuild_rollups() repairs them.
+        with self.transaction():
+            db = self.shards.shard_for(user_id) if self.shards else self
+            purchase_id = db._execute_query(query, params, raise_errors=True)
+            self._bump_purchase_rollups(game_id, amount)
+        # The user's next reads must see this purchase, go to the primary for a while
+        recent_writes.mark(user_id)
+        return purchase_id
+
+    def _bump_purchase_rollups(self, game_id: str, amount: float):
+        """Adds one paid purchase (made now) to the per-game and per-day revenue rollups."""
+        self._execute_query(
+            self.backend.upsert_increment("rollup_game", ["game_id"], ["purchases", "revenue"], "VALUES (%s, 1, %s)"),
+            (game_id, amount),
+        )
+        self._execute_query(
+            self.backend.upsert_increment("rollup_day", ["day"], ["purchases", "revenue"], "VALUES (CURRENT_DATE, 1, %s)"),
+            (amount,),
         )
-        
-        # 4. Execute the query using the internal execution method
-        # Assuming self._execute_query is the internal method for running commands.
-        return self._execute_query(query, params)
 
-    def save_reddit_post(self,game_id, data):
+    def enqueue_payment_event(self, event_id: str, payload: str, signature: Optional[str]):
+        """
+        Stores a raw payment webhook in the inbox. A redelivered event (same event_id)
+        is ignored, so the provider's retries are idempotent.
         """
-        Logs a new social media marketing post to the database.
+        query = self.backend.insert_ignore("payment_inbox", ["event_id", "payload", "signature"])
+        self._execute_query(query, (event_id, payload, signature), raise_errors=True)
 
-        Args:
-            game_id: The ID of the game being marketed.
-            data: post data.
+    def get_payment_event_status(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """Processing status of one inbox event (for clients polling after a payment)."""
+        query = "SELECT event_id, status, received, processed FROM payment_inbox WHERE event_id = %s"
+        return self._execute_query(query, (event_id,), fetch_one=True)
 
-        Returns:
-            True if the insertion was successful, False otherwise.
+    def claim_payment_events(self, claim: str, limit: int) -> List[Dict[str, Any]]:
         """
-        serialized_payload = json.dumps(data)
+        Marks up to `limit` of the oldest pending events as being processed under `claim`
+        and returns them. Concurrent workers never claim the same event.
+        """
+        # The extra derived table lets MySQL use LIMIT on the table being updated
         query = (
-            "INSERT INTO marketing_post (game_id, platform, payload_json, post_url, status) "
-            "VALUES (%s, %s, %s, %s, %s)"
+            "UPDATE payment_inbox SET status = 'processing', claim = %s, claimed_at = %s "
+            "WHERE status = 'pending' AND id IN ("
+            "SELECT id FROM (SELECT id FROM payment_inbox WHERE status = 'pending' ORDER BY id LIMIT %s) AS batch)"
         )
-        
-        params = (
-            game_id,
-            "reddit",
-            serialized_payload,
-            "reddit.com/mock_url",
-            "posted"
+        self._execute_query(query, (claim, time.time(), limit), raise_errors=True)
+        query = "SELECT id, event_id, payload, signature, attempts FROM payment_inbox WHERE claim = %s ORDER BY id"
+        return self._execute_query(query, (claim,), raise_errors=True)
+
+    def release_stale_payment_claims(self, older_than: float, max_attempts: int) -> int:
+        """
+        Returns events claimed more than `older_than` seconds ago (by a crashed worker) to
+        the queue. That counts as an attempt, so an event that keeps crashing its worker
+        is marked failed after max_attempts.
+        """
+        query = (
+            # status first: MySQL evaluates later assignments with the already updated attempts
+            "UPDATE payment_inbox SET status = CASE WHEN attempts + 1 >= %s THEN 'failed' ELSE 'pending' END, "
+            "attempts = attempts + 1, claim = NULL WHERE status = 'processing' AND claimed_at < %s"
         )
-        
-        # 4. Execute the query using the internal execution method
-        # Assuming self._execute_query is the internal method for running commands.
-        return self._execute_query(query, params)
-    
-    def update_payments(self, user_id: str, game_id: str):
+        return self._execute_query(query, (max_attempts, time.time() - older_than))
+
+    def get_paid_pairs(self, pairs: List[Tuple[int, str]]) -> set:
+        """The (user_id, game_id) pairs among `pairs` that already have a paid purchase."""
+        if not pairs:
+            return set()
+        if self.shards:
+            paid = set()
+            for index, shard_pairs in self.shards.group_reads(pairs).items():
+                paid |= self.shards.members[index].get_paid_pairs(shard_pairs)
+            return paid
+        placeholders = ', '.join(['(%s, %s)'] * len(pairs))
         query = (
-            "INSERT INTO purchases (user_id, game_id, payment_method, amount, status) "
-            "VALUES (%s, %s, 'stripe', 1.0, 'PAID')"
+            "SELECT DISTINCT user_id, game_id FROM purchases "
+            f"WHERE status = 'paid' AND (user_id, game_id) IN ({placeholders})"
         )
-        params = (user_id, game_id)
-        
-        # Execute the INSERT statement
-        return self._execute_query(query, params)
+        results = self._execute_query(query, tuple(value for pair in pairs for value in pair), raise_errors=True)
+        return {(row["user_id"], row["game_id"]) for row in results}
+
+    def complete_payment_events(self, outcomes: Dict[int, str], purchases: List[Tuple[int, str]]):
+        """
+        Records the purchases of a processed batch (with their rollups) and the final
+        status of every inbox event in it, in one transaction. Raises on failure.
+        """
+        with self.transaction():
+            for user_id, game_id in purchases:
+                self.update_payments(user_id, game_id)
+            cases = ' '.join(['WHEN %s THEN %s'] * len(outcomes))
+            placeholders = ', '.join(['%s'] * len(outcomes))
+            query = (
+                f"UPDATE payment_inbox SET status = CASE id {cases} END, claim = NULL, "
+                f"processed = CURRENT_TIMESTAMP WHERE id IN ({placeholders})"
+            )
+            params = [value for pair in outcomes.items() for value in pair] + list(outcomes)
+            self._execute_query(query, tuple(params))
+
+    def retry_payment_events(self, claim: str, max_attempts: int) -> Optional[int]:
+        """Puts the events of a failed batch back in the queue, or marks them failed after max_attempts."""
+        query = (
+            # status first: MySQL evaluates later assignments with the already updated attempts
+            "UPDATE payment_inbox SET status = CASE WHEN attempts + 1 >= %s THEN 'failed' ELSE 'pending' END, "
+            "attempts = attempts + 1, claim = NULL WHERE claim = %s"
+        )
+        return self._execute_query(query, (max_attempts, claim))
+
+    def rebuild_rollups(self):
+        """
+        Rebuilds every reporting rollup from the full purchase and marketing history
+        with a few bulk INSERT ... SELECT statements, in one transaction.
+        Run it once after deploying the rollup tables, or to repair them.
+        """
+        with self.transaction():
+            for table in ("rollup_game", "rollup_day", "rollup_platform"):
+                self._execute_query(f"DELETE FROM {table}")
+            if self.shards:
+                self._rebuild_sharded_purchase_rollups()
+            else:
+                self._execute_query(
+                    "INSERT INTO rollup_game (game_id, purchases, revenue) "
+                    "SELECT game_id, COUNT(*), SUM(amount) FROM purchases WHERE status = 'paid' GROUP BY game_id"
+                )
+                self._execute_query(
+                    "INSERT INTO rollup_day (day, purchases, revenue) "
+                    "SELECT DATE(created), COUNT(*), SUM(amount) FROM purchases WHERE status = 'paid' GROUP BY DATE(created)"
+                )
+            self._execute_query(
+                self.backend.upsert_increment(
+                    "rollup_game", ["game_id"], ["marketing_posts"],
+                    "SELECT game_id, COUNT(*) FROM marketing_post WHERE 1 = 1 GROUP BY game_id",
+                )
+            )
+            self._execute_query(
+                "INSERT INTO rollup_platform (platform, posts) "
+                "SELECT platform, COUNT(*) FROM marketing_post GROUP BY platform"
+            )
+        self.logger.info("DBManager: reporting rollups rebuilt")
+
+    def _rebuild_sharded_purchase_rollups(self, chunk_size: int = 500):
+        """Sums the purchase totals of every shard into rollup_game and rollup_day (run it when not resharding)."""
+        for shard in self.shards:
+            for table, key, expression in (("rollup_game", "game_id", "game_id"), ("rollup_day", "day", "DATE(created)")):
+                totals = shard._execute_query(
+                    f"SELECT {expression} AS rollup_key, COUNT(*) AS purchases, SUM(amount) AS revenue "
+                    f"FROM purchases WHERE status = 'paid' GROUP BY {expression}",
+                    raise_errors=True,
+                )
+                for start in range(0, len(totals), chunk_size):
+                    chunk = totals[start:start + chunk_size]
+                    self._execute_query(
+                        self.backend.upsert_increment(
+                            table, [key], ["purchases", "revenue"], "VALUES " + ', '.join(["(%s, %s, %s)"] * len(chunk))
+                        ),
+                        tuple(value for row in chunk for value in (row["rollup_key"], row["purchases"], row["revenue"])),
+                    )
+
+    def get_game_rollup(self, game_id: str) -> Optional[Dict[str, Any]]:
+        """Purchases, revenue and marketing posts of one game (primary-key lookup)."""
+        query = "SELECT game_id, purchases, revenue, marketing_posts FROM rollup_game WHERE game_id = %s"
+        return self._execute_read(query, (game_id,), fetch_one=True)
+
+    def get_daily_rollups(self, start_day: str, end_day: str) -> List[Dict[str, Any]]:
+        """Purchases and revenue per day in [start_day, end_day] (primary-key range)."""
+        query = "SELECT day, purchases, revenue FROM rollup_day WHERE day BETWEEN %s AND %s ORDER BY day"
+        results = self._execute_read(query, (start_day, end_day))
+        return results if isinstance(results, list) else []
+
+    def get_platform_rollups(self) -> List[Dict[str, Any]]:
+        """Marketing posts per platform."""
+        query = "SELECT platform, posts FROM rollup_platform ORDER BY platform"
+        results = self._execute_read(query)
+        return results if isinstance(results, list) else []
+
+    def get_campaign_status(self, game_id: str) -> List[Dict[str, Any]]:
+        """Marketing posts of one game per (platform, status), read from the covering campaign index only."""
+        query = (
+            "SELECT platform, status, COUNT(*) AS posts FROM marketing_post "
+            "WHERE game_id = %s GROUP BY platform, status ORDER BY platform, status"
+        )
+        results = self._execute_read(query, (game_id,))
+        return results if isinstance(results, list) else []
+
+    def get_hashtag_counts(self, limit: int) -> List[Dict[str, Any]]:
+        """The `limit` most used hashtag sets with their post counts, grouped on the hashtags index."""
+        query = (
+            "SELECT hashtags, COUNT(*) AS posts FROM marketing_post WHERE hashtags IS NOT NULL "
+            "GROUP BY hashtags ORDER BY posts DESC, hashtags LIMIT %s"
+        )
+        results = self._execute_read(query, (limit,))
+        return results if isinstance(results, list) else []
+
+    def get_paid_purchases_after(self, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        """(id, user_id, game_id) of up to `limit` paid purchases with id > after_id, from this database only."""
+        query = (
+            "SELECT id, user_id, game_id FROM purchases "
+            "WHERE id > %s AND status = 'paid' ORDER BY id LIMIT %s"
+        )
+        return self._execute_query(query, (after_id, limit), raise_errors=True)
+
+    def get_users_paid_purchases(self, user_ids: List[Any]) -> List[Dict[str, Any]]:
+        """(id, user_id, game_id) of every paid purchase of these users, from this database only."""
+        if not user_ids:
+            return []
+        placeholders = ', '.join(['%s'] * len(user_ids))
+        query = f"SELECT id, user_id, game_id FROM purchases WHERE status = 'paid' AND user_id IN ({placeholders})"
+        return self._execute_query(query, tuple(user_ids), raise_errors=True)
+
+    def get_related_games_build(self) -> int:
+        """Latest recommendation job run that changed game_related, 0 if none did."""
+        result = self._execute_query("SELECT build FROM related_games_build WHERE id = 1", fetch_one=True)
+        return (result or {}).get("build") or 0
+
+    def get_related_games_after(self, game_id: str, position: int, limit: int) -> List[Dict[str, Any]]:
+        """
+        Up to `limit` game_related rows after (game_id, position), in primary key order.
+        From the primary, like get_related_games_build(): a replica may not have the build yet.
+        """
+        query = (
+            "SELECT game_id, position, related_game_id, purchases FROM game_related "
+            "WHERE game_id > %s OR (game_id = %s AND position > %s) ORDER BY game_id, position LIMIT %s"
+        )
+        results = self._execute_query(query, (game_id, game_id, position, limit))
+        return results if isinstance(results, list) else []
+
+    def save_related_games(self, related: Dict[str, List[Tuple[str, int]]], replace_all: bool = False,
+                           chunk_size: int = 500) -> int:
+        """
+        Replaces the neighbours (related_game_id, purchases) of the given games, or of every
+        game when `replace_all`, in one transaction, and returns the new build number.
+        The build is bumped even when only rows are deleted. Raises on failure.
+        """
+        game_ids = list(related)
+        with self.transaction():
+            # Row-locks the counter: concurrent jobs get distinct builds and write one after the other
+            self._execute_query("UPDATE related_games_build SET build = build + 1 WHERE id = 1")
+            build = self.get_related_games_build()
+            rows = [
+                (game_id, position, related_game_id, purchases, build)
+                for game_id, neighbours in related.items()
+                for position, (related_game_id, purchases) in enumerate(neighbours)
+            ]
+            if replace_all:
+                self._execute_query("DELETE FROM game_related")
+            else:
+                for start in range(0, len(game_ids), chunk_size):
+                    chunk = game_ids[start:start + chunk_size]
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    self._execute_query(f"DELETE FROM game_related WHERE game_id IN ({placeholders})", tuple(chunk))
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                placeholders = ', '.join(['(%s, %s, %s, %s, %s)'] * len(chunk))
+                self._execute_query(
+                    "INSERT INTO game_related (game_id, position, related_game_id, purchases, build) "
+                    f"VALUES {placeholders}",
+                    tuple(value for row in chunk for value in row),
+                )
+        return build
 
     def check_payment_status(self, user_id: str, game_id: str) -> bool:
         """
-        Checks the payments table if a successful transaction already exists.
+        Checks the purchases table if a successful transaction already exists.
         """
         query = (
-            "SELECT COUNT(*) FROM payments "
+            "SELECT COUNT(*) AS paid_count FROM purchases "
             "WHERE user_id = %s AND game_id = %s"
         )
         params = (user_id, game_id)
+        if self.shards:
+            return any(shard.check_payment_status(user_id, game_id) for shard in self.shards.read_shards(user_id))
         
         # Execute the query and fetch the single count result
-        result = self._execute_query(query, params, fetch_one=True, fetch_columns=False)
+        result = self._execute_read(query, params, fetch_one=True, user_id=user_id)
         
-        # The result is a tuple like (1,) or (0,). We check if the count > 0.
-        count = result[0] if result else 0
+        # The result is a row like {'paid_count': 1}. We check if the count > 0.
+        count = result['paid_count'] if result else 0
+        if count == 0 and self.replicas:
+            # A purchase may not have replicated yet (or was made through another worker):
+            # a denial is always confirmed on the primary
+            result = self._execute_query(query, params, fetch_one=True)
+            count = result['paid_count'] if result else 0
         
         return count > 0
\ No newline at end of file
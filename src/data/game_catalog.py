@@ -0,0 +1,172 @@
+# game_catalog.py
+import base64
+import binascii
+import bisect
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from src.utils.config import (
+    CATALOG_LOAD_BATCH,
+    CATALOG_MAX_CACHED_PAGES,
+    CATALOG_MAX_PAGE_SIZE,
+    CATALOG_MAX_QUERY_TERMS,
+    CATALOG_PAGE_SIZE,
+    CATALOG_REFRESH_INTERVAL,
+    CATALOG_REFRESH_OVERLAP,
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+_EPOCH = "1970-01-01 00:00:00"
+
+# Sort key of a game; pages list games in descending key order (newest first)
+Key = Tuple[str, str]
+# (JSON body, ETag) of a rendered page
+Page = Tuple[bytes, str]
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase alphanumeric words of a title, description or search query."""
+    return _TOKEN.findall((text or "").lower())
+
+
+def encode_cursor(key: Key) -> str:
+    return base64.urlsafe_b64encode(f"{key[0]}|{key[1]}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Key:
+    """The key encoded by encode_cursor(); ValueError if the cursor was not made by it."""
+    try:
+        created, separator, game_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().partition("|")
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if not separator or not game_id:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return created, game_id
+
+
+class GameCatalog:
+    """
+    Storefront catalogue of one gateway worker: every game (without its HTML) in memory,
+    an inverted index of title and description words, and a cache of rendered pages.
+
+    The catalogue follows new games by polling idx_games_created for games after the
+    newest one it holds, so it never scans the games table after the first load. Each poll
+    starts CATALOG_REFRESH_OVERLAP seconds back, which picks up games whose insert
+    committed after newer ones were read. Pages are newest first with keyset cursors, so a
+    page reached by cursor keeps its content as new games arrive; the ETag is a hash of
+    the page body, and a client revalidating an unchanged page gets a 304.
+    """
+
+    def __init__(self, db_manager, refresh_interval: float = CATALOG_REFRESH_INTERVAL,
+                 overlap: float = CATALOG_REFRESH_OVERLAP, max_cached_pages: int = CATALOG_MAX_CACHED_PAGES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.db_manager = db_manager
+        self.refresh_interval = refresh_interval
+        self.overlap = overlap
+        self.max_cached_pages = max_cached_pages
+        self._clock = clock
+        self._keys: List[Key] = []  # Ascending
+        self._games: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._pages: "OrderedDict[tuple, Page]" = OrderedDict()
+        self._newest: Optional[str] = None
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def refresh_due(self) -> bool:
+        return self._clock() >= self._next_refresh
+
+    def _poll_start(self) -> str:
+        if self._newest is None:
+            return _EPOCH
+        newest = datetime.strptime(self._newest[:19], _DATETIME_FORMAT)
+        return (newest - timedelta(seconds=self.overlap)).strftime(_DATETIME_FORMAT)
+
+    def refresh(self, force: bool = False) -> int:
+        """Adds the games inserted since the last refresh (if one is due); returns how many."""
+        if not force and not self.refresh_due():
+            return 0
+        self._next_refresh = self._clock() + self.refresh_interval
+
+        added = 0
+        created, game_id = self._poll_start(), ""
+        while True:
+            rows = self.db_manager.get_games_after(created, game_id, CATALOG_LOAD_BATCH)
+            new = [row for row in rows if row["id"] not in self._games]
+            if new:
+                with self._lock:
+                    for row in new:
+                        self._add(row)
+                    # Only the pages without a cursor could show the new games, but an
+                    # insert committed late can land anywhere; rendering again is cheap
+                    self._pages.clear()
+                added += len(new)
+            if len(rows) < CATALOG_LOAD_BATCH:
+                return added
+            created, game_id = rows[-1]["created"], rows[-1]["id"]
+
+    def _add(self, row: Dict[str, Any]):
+        game = {
+            "game_id": row["id"],
+            "title": row["title"],
+            "description": row["description"],
+            "created": row["created"],
+        }
+        self._games[game["game_id"]] = game
+        bisect.insort(self._keys, (game["created"], game["game_id"]))
+        for word in set(tokenize(game["title"])) | set(tokenize(game["description"])):
+            self._postings.setdefault(word, set()).add(game["game_id"])
+        if self._newest is None or game["created"] > self._newest:
+            self._newest = game["created"]
+
+    def _select(self, terms: Tuple[str, ...], after: Optional[Key], count: int) -> List[Dict[str, Any]]:
+        """Up to `count` games matching every term, newest first, strictly after the cursor key."""
+        if not terms:
+            end = bisect.bisect_left(self._keys, after) if after else len(self._keys)
+            keys = self._keys[max(end - count, 0):end][::-1]
+        else:
+            postings = sorted((self._postings.get(term, set()) for term in terms), key=len)
+            matches = set(postings[0]).intersection(*postings[1:])
+            keys = sorted(((self._games[game_id]["created"], game_id) for game_id in matches), reverse=True)
+            if after:
+                keys = [key for key in keys if key < after]
+            keys = keys[:count]
+        return [self._games[game_id] for _, game_id in keys]
+
+    def page(self, query: str = "", cursor: Optional[str] = None, limit: int = CATALOG_PAGE_SIZE) -> Page:
+        """
+        The rendered page of games matching every word of `query` (all games when empty),
+        starting after `cursor`. Raises ValueError for a cursor not issued by this catalogue.
+        """
+        terms = tuple(sorted(set(tokenize(query))))[:CATALOG_MAX_QUERY_TERMS]
+        limit = min(max(limit, 1), CATALOG_MAX_PAGE_SIZE)
+        cache_key = (terms, cursor, limit)
+        with self._lock:
+            page = self._pages.get(cache_key)
+            if page is not None:
+                self._pages.move_to_end(cache_key)
+                return page
+
+            after = decode_cursor(cursor) if cursor else None
+            games = self._select(terms, after, limit + 1)
+            next_cursor = None
+            if len(games) > limit:
+                games = games[:limit]
+                next_cursor = encode_cursor((games[-1]["created"], games[-1]["game_id"]))
+            body = json.dumps({"games": games, "next_cursor": next_cursor}, separators=(",", ":")).encode()
+            page = body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+            self._pages[cache_key] = page
+            while len(self._pages) > self.max_cached_pages:
+                self._pages.popitem(last=False)
+            return page
@@ -0,0 +1,236 @@
+# game_store.py
+import argparse
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.tools.logger import logger
+from src.utils.config import GAME_STORE_PENDING_TIMEOUT
+
+# Directory where generated HTML and JS files will be stored
+OUTPUT_DIR = Path("./server/games")
+GAME_FILENAME = "index.html"
+_TMP_SUFFIX = ".tmp"
+_JOURNAL_SUFFIX = ".journal"
+
+
+def _process_alive(pid: int) -> bool:
+    """True if a process with this id exists on this host (it may belong to another user)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _fsync_dir(path: Path):
+    """Makes a rename/creation inside `path` durable (no-op where directories can't be opened)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class GameStore:
+    """
+    Crash-safe persistence of a generated game to disk and to the 'games' table.
+
+    Every game goes through a two-phase persist recorded in an append-only journal:
+    'pending' is journaled first, then the HTML is written to a temp file, fsynced and
+    renamed into place, then the DB row is inserted in a transaction, and finally
+    'committed' (or 'aborted') is journaled. reconcile() replays the journals at startup
+    and removes whatever a crash left half-written.
+
+    Several generator processes can share the games directory: every GameStore writes its
+    own journal ('<pid>-<token>.journal' in `journal_dir`), and reconcile() only reclaims
+    the journals of processes that are gone, plus entries of running processes that have
+    been pending for longer than `pending_timeout` seconds.
+    """
+
+    def __init__(self, db_manager, output_dir: Path = OUTPUT_DIR, journal_dir: Optional[Path] = None,
+                 pending_timeout: float = GAME_STORE_PENDING_TIMEOUT):
+        self.logger = logger
+        self.db_manager = db_manager
+        self.output_dir = Path(output_dir)
+        self.pending_timeout = pending_timeout
+        # The journals live next to (not inside) the games directory so they are never deployed.
+        self.journal_dir = Path(journal_dir) if journal_dir else self.output_dir.parent / f"{self.output_dir.name}.journal"
+        self.journal_path = self.journal_dir / f"{os.getpid()}-{uuid.uuid4().hex[:8]}{_JOURNAL_SUFFIX}"
+
+    def game_path(self, game_id: str) -> Path:
+        return self.output_dir / game_id / GAME_FILENAME
+
+    def _journal(self, game_id: str, state: str, journal_path: Optional[Path] = None):
+        entry = json.dumps({"game_id": game_id, "state": state, "ts": time.time()})
+        journal_path = journal_path or self.journal_path
+        if not journal_path.parent.exists():
+            journal_path.parent.mkdir(parents=True, exist_ok=True)
+            _fsync_dir(journal_path.parent.parent)
+        # One short O_APPEND write per entry, so entries of another process never interleave
+        with open(journal_path, "a", encoding="utf-8") as journal:
+            journal.write(entry + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _write_atomic(self, path: Path, content: str):
+        """Writes content to a temp file, fsyncs it and renames it over `path`."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + _TMP_SUFFIX)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        _fsync_dir(path.parent)
+        _fsync_dir(path.parent.parent)
+
+    def _remove_game_dir(self, game_id: str):
+        shutil.rmtree(self.output_dir / game_id, ignore_errors=True)
+
+    def persist(self, game_id: str, html_code: str, record: Dict[str, Any],
+                on_insert: Optional[Callable[[], None]] = None) -> Path:
+        """
+        Writes the game file and inserts its 'games' row as one unit.
+        `on_insert` runs inside the same DB transaction (e.g. to store related rows).
+        On any failure the file is removed, the transaction rolled back and the error re-raised.
+        """
+        html_filepath = self.game_path(game_id)
+        self._journal(game_id, "pending")
+        try:
+            self._write_atomic(html_filepath, html_code)
+            self.logger.info(f"Saved combined HTML/JS/CSS to: {html_filepath}")
+
+            with self.db_manager.transaction():
+                self.db_manager.insert_new_game(record)
+                if on_insert:
+                    on_insert()
+        except Exception as e:
+            self.logger.error(f"Failed to persist game {game_id}, rolling back: {e}")
+            self._remove_game_dir(game_id)
+            self._journal(game_id, "aborted")
+            raise
+
+        self._journal(game_id, "committed")
+        return html_filepath
+
+    @staticmethod
+    def _read_journal(journal_path: Path) -> Dict[str, Tuple[str, float]]:
+        """Latest (state, timestamp) per game_id; a torn last line from a crash is ignored."""
+        states: Dict[str, Tuple[str, float]] = {}
+        with open(journal_path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                states[entry["game_id"]] = (entry["state"], entry["ts"])
+        return states
+
+    def _journal_owner_alive(self, journal_path: Path) -> bool:
+        pid = journal_path.name.split("-", 1)[0]
+        return pid.isdigit() and _process_alive(int(pid))
+
+    def _other_journals(self) -> List[Path]:
+        if self.journal_dir.is_file():
+            # Single journal written before journals were per process; its writer is gone
+            legacy = self.journal_dir.with_name(f"{self.journal_dir.name}.legacy")
+            os.replace(self.journal_dir, legacy)
+            return [legacy]
+        if not self.journal_dir.exists():
+            return []
+        return [path for path in self.journal_dir.glob(f"*{_JOURNAL_SUFFIX}") if path != self.journal_path]
+
+    def reconcile(self) -> Dict[str, List[str]]:
+        """
+        Resolves games whose persist never finished in a process that is gone (or over
+        `pending_timeout` ago): games with a DB row are kept (the crash hit after the DB
+        commit), the others have their files removed. Journals of finished processes
+        are deleted afterwards; in journals of running processes the resolution is
+        appended so the entry is not resolved again.
+        """
+        now = time.time()
+        unfinished: Dict[str, Path] = {}
+        finished_journals = []
+        for journal_path in self._other_journals():
+            owner_alive = self._journal_owner_alive(journal_path)
+            for game_id, (state, ts) in self._read_journal(journal_path).items():
+                if state == "pending" and (not owner_alive or now - ts > self.pending_timeout):
+                    unfinished[game_id] = journal_path
+            if not owner_alive:
+                finished_journals.append(journal_path)
+        committed = self.db_manager.get_existing_game_ids(list(unfinished))
+
+        report = {"recovered": [], "removed": []}
+        for game_id, journal_path in unfinished.items():
+            if game_id in committed and self.game_path(game_id).exists():
+                report["recovered"].append(game_id)
+                self.game_path(game_id).with_name(GAME_FILENAME + _TMP_SUFFIX).unlink(missing_ok=True)
+                state = "committed"
+            else:
+                self._remove_game_dir(game_id)
+                report["removed"].append(game_id)
+                state = "aborted"
+            if journal_path not in finished_journals:
+                self._journal(game_id, state, journal_path)
+
+        for journal_path in finished_journals:
+            journal_path.unlink(missing_ok=True)
+        if finished_journals:
+            _fsync_dir(self.journal_dir)
+
+        if unfinished:
+            self.logger.warning(
+                f"GameStore reconcile: recovered {len(report['recovered'])}, removed {len(report['removed'])} games"
+            )
+        return report
+
+    def check_consistency(self) -> Dict[str, List[str]]:
+        """
+        Verifies in one pass that disk and DB agree: one query for all (id, file_url)
+        rows and one directory scan, compared as sets.
+
+        Returns the game_ids with a DB row but no file ('missing_files') and the
+        directories with no DB row ('orphan_dirs').
+        """
+        db_files = {row["id"]: row["file_url"] for row in self.db_manager.get_game_files()}
+
+        disk_files = set()
+        orphan_dirs = []
+        if self.output_dir.exists():
+            with os.scandir(self.output_dir) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    file_url = db_files.get(entry.name)
+                    if file_url is None:
+                        orphan_dirs.append(entry.name)
+                    elif os.path.isfile(os.path.join(self.output_dir, file_url)):
+                        disk_files.add(entry.name)
+
+        missing_files = [game_id for game_id in db_files if game_id not in disk_files]
+        return {"missing_files": sorted(missing_files), "orphan_dirs": sorted(orphan_dirs)}
+
+
+if __name__ == "__main__":
+    from src.data.db_manager import DBManager
+
+    parser = argparse.ArgumentParser(description="Game storage maintenance.")
+    parser.add_argument("command", choices=["reconcile", "check"])
+    args = parser.parse_args()
+
+    store = GameStore(DBManager())
+    result = store.reconcile() if args.command == "reconcile" else store.check_consistency()
+    print(json.dumps({key: len(value) for key, value in result.items()}))
+    for key, game_ids in result.items():
+        for game_id in game_ids:
+            print(f"{key}: {game_id}")
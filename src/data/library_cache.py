@@ -0,0 +1,163 @@
+# library_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.utils.config import LIBRARY_CACHE_MAX_ENTRIES, LIBRARY_CACHE_SHARED_PATH, LIBRARY_CACHE_TTL
+from src.utils.workers import LIBRARY_CACHE_PATH_ENV
+
+Library = List[Dict[str, Any]]
+
+
+class LibraryCache:
+    """
+    Per-user cache of purchased games (the get_purchased_games result).
+
+    Tier 1 is an in-process LRU. Tier 2 is an optional SQLite file shared by all
+    workers on the host. Every shared entry carries a version that is bumped on
+    each purchase, so a worker only trusts its LRU copy while the versions match,
+    and a cache fill computed from a DB read that raced with a purchase is dropped
+    (compare-and-set on the version read before the DB query).
+
+    Without the shared tier the same check runs in-process: every purchase takes a
+    number from a counter, recorded for the user even when nothing is cached, and a
+    fill is dropped if the user bought something after get() returned its version.
+    Entries expire after `ttl` seconds in both tiers, as a safety net against any
+    purchase the cache never heard of.
+    """
+
+    def __init__(self, max_entries: int = LIBRARY_CACHE_MAX_ENTRIES, shared_path: Optional[str] = None,
+                 ttl: float = LIBRARY_CACHE_TTL, clock: Callable[[], float] = time.time):
+        if shared_path is None:
+            # Set by the multi-worker launchers (src/utils/workers.py) when none is configured
+            shared_path = LIBRARY_CACHE_SHARED_PATH or os.getenv(LIBRARY_CACHE_PATH_ENV, "")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._local: "OrderedDict[str, Tuple[int, Library, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Local-only mode: the purchase counter, each user's latest purchase number and
+        # the highest number forgotten when that table had to drop users
+        self._purchase_count = 0
+        self._purchases: "OrderedDict[str, int]" = OrderedDict()
+        self._forgotten_purchase = 0
+        self._shared = None
+        if shared_path:
+            self._shared = sqlite3.connect(shared_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            self._shared.execute("PRAGMA journal_mode=WAL")
+            self._shared.execute("PRAGMA synchronous=NORMAL")
+            columns = {row[1] for row in self._shared.execute("PRAGMA table_info(library)")}
+            if columns and "expires" not in columns:
+                self._shared.execute("DROP TABLE library")  # Written before entries expired; it is only a cache
+            self._shared.execute(
+                "CREATE TABLE IF NOT EXISTS library ("
+                " user_id TEXT PRIMARY KEY,"
+                " version INTEGER NOT NULL,"
+                " games TEXT,"  # NULL: version is known but the library must be reloaded from the DB
+                " expires REAL"
+                ")"
+            )
+
+    def _remember(self, user_id: str, version: int, games: Library):
+        with self._lock:
+            self._local[user_id] = (version, games, self._clock() + self.ttl)
+            self._local.move_to_end(user_id)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def get(self, user_id: str) -> Tuple[Optional[Library], int]:
+        """
+        Returns (games, version). games is None on a miss; pass the version back
+        to fill() after loading the library from the DB.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._local.get(user_id)
+            if entry is not None and entry[2] <= now:
+                del self._local[user_id]
+                entry = None
+            if entry is not None:
+                self._local.move_to_end(user_id)
+            if self._shared is None:
+                return (entry[1], entry[0]) if entry else (None, self._purchase_count)
+
+        with self._lock:
+            row = self._shared.execute(
+                "SELECT version, games, expires FROM library WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        version, payload, expires = row if row else (0, None, None)
+        if payload is None or expires <= now:
+            return None, version
+        if entry is not None and entry[0] == version:
+            return entry[1], version
+
+        games = json.loads(payload)
+        self._remember(user_id, version, games)
+        return games, version
+
+    def fill(self, user_id: str, games: Library, version: int):
+        """Caches a library loaded from the DB, unless a purchase happened since get() returned `version`."""
+        if self._shared is not None:
+            with self._lock:
+                cursor = self._shared.execute(
+                    "INSERT INTO library (user_id, version, games, expires) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET games = excluded.games, expires = excluded.expires "
+                    "WHERE library.version = excluded.version",
+                    (user_id, version, json.dumps(games), self._clock() + self.ttl),
+                )
+            if cursor.rowcount == 0:
+                return  # stale fill, another worker recorded a purchase meanwhile
+        else:
+            with self._lock:
+                if version < self._forgotten_purchase or self._purchases.get(user_id, 0) > version:
+                    return  # stale fill, a purchase was recorded after get()
+        self._remember(user_id, version, games)
+
+    def add_purchase(self, user_id: str, game: Dict[str, Any]):
+        """
+        Write-through for a newly recorded purchase: appends the game to the cached
+        library and bumps its version so other workers drop their LRU copy.
+        """
+        if self._shared is None:
+            with self._lock:
+                self._purchase_count += 1
+                self._purchases[user_id] = self._purchase_count
+                self._purchases.move_to_end(user_id)
+                while len(self._purchases) > self.max_entries:
+                    _, forgotten = self._purchases.popitem(last=False)
+                    self._forgotten_purchase = max(self._forgotten_purchase, forgotten)
+                entry = self._local.get(user_id)
+                if entry is not None:
+                    # The entry keeps its expiry: the TTL bounds how long a DB read is trusted
+                    self._local[user_id] = (self._purchase_count, entry[1] + [game], entry[2])
+            return
+
+        with self._lock:
+            self._shared.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._shared.execute("SELECT version, games FROM library WHERE user_id = ?", (user_id,)).fetchone()
+                if row is None:
+                    # Nothing cached yet: only record the version so racing fills are rejected
+                    version, games = 1, None
+                    self._shared.execute("INSERT INTO library (user_id, version, games) VALUES (?, 1, NULL)", (user_id,))
+                else:
+                    version = row[0] + 1
+                    games = json.loads(row[1]) + [game] if row[1] is not None else None
+                    self._shared.execute(
+                        "UPDATE library SET version = ?, games = ? WHERE user_id = ?",
+                        (version, json.dumps(games) if games is not None else None, user_id),
+                    )
+                self._shared.execute("COMMIT")
+            except Exception:
+                self._shared.execute("ROLLBACK")
+                raise
+
+        if games is not None:
+            self._remember(user_id, version, games)
+        else:
+            with self._lock:
+                self._local.pop(user_id, None)
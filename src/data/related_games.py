@@ -0,0 +1,103 @@
+# related_games.py
+import time
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import numpy as np
+
+from src.tools.logger import logger
+from src.utils.config import RECOMMENDATION_TOP_K, RELATED_GAMES_REFRESH_INTERVAL
+
+_LOAD_BATCH = 5000  # game_related rows per keyset query
+
+
+class _Neighbours(NamedTuple):
+    build: int
+    slots: Dict[str, int]  # game_id -> row of the arrays
+    game_ids: List[str]  # slot -> game_id
+    related: np.ndarray  # (games, top_k) slots of the related games, -1 past the last one
+    purchases: np.ndarray  # (games, top_k) players who bought both games
+
+
+_EMPTY = _Neighbours(0, {}, [], np.full((0, RECOMMENDATION_TOP_K), -1, np.int32), np.zeros((0, RECOMMENDATION_TOP_K), np.int32))
+
+
+class RelatedGamesIndex:
+    """
+    In-memory copy of 'game_related' for one gateway worker: a dict from game id to a
+    row of two fixed-width int32 arrays, so a lookup is a dict hit and a row slice.
+
+    The index checks every `refresh_interval` seconds whether the recommendation job
+    wrote a new build, and then reloads the table into new arrays that replace the old
+    ones in one assignment, so lookups never see a half-loaded index. The build and the
+    rows are read in one transaction on the primary, so they always match.
+    """
+
+    def __init__(self, db_manager, refresh_interval: float = RELATED_GAMES_REFRESH_INTERVAL,
+                 top_k: int = RECOMMENDATION_TOP_K, clock: Callable[[], float] = time.monotonic):
+        self.db_manager = db_manager
+        self.refresh_interval = refresh_interval
+        self.top_k = top_k
+        self._clock = clock
+        self._next_refresh = 0.0
+        self._neighbours = _EMPTY
+
+    def __len__(self) -> int:
+        return len(self._neighbours.slots)
+
+    def refresh_due(self) -> bool:
+        return self._clock() >= self._next_refresh
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reloads the table if a refresh is due and the job wrote since the last load; True if reloaded."""
+        if not force and not self.refresh_due():
+            return False
+        self._next_refresh = self._clock() + self.refresh_interval
+        try:
+            with self.db_manager.transaction():
+                build = self.db_manager.get_related_games_build()
+                if build == self._neighbours.build:
+                    return False
+
+                rows: List[Dict[str, Any]] = []
+                game_id, position = "", -1
+                while True:
+                    batch = self.db_manager.get_related_games_after(game_id, position, _LOAD_BATCH)
+                    rows += batch
+                    if len(batch) < _LOAD_BATCH:
+                        break
+                    game_id, position = batch[-1]["game_id"], batch[-1]["position"]
+        except Exception as e:
+            # Keep serving the loaded build; the next refresh tries again
+            logger.error(f"RelatedGamesIndex: reload failed: {e}")
+            return False
+        self._neighbours = self._build(build, rows)
+        return True
+
+    def _build(self, build: int, rows: List[Dict[str, Any]]) -> _Neighbours:
+        slots: Dict[str, int] = {}
+        game_ids: List[str] = []
+        for row in rows:
+            for game_id in (row["game_id"], row["related_game_id"]):
+                if game_id not in slots:
+                    slots[game_id] = len(game_ids)
+                    game_ids.append(game_id)
+
+        related = np.full((len(game_ids), self.top_k), -1, np.int32)
+        purchases = np.zeros((len(game_ids), self.top_k), np.int32)
+        for row in rows:
+            if row["position"] < self.top_k:
+                related[slots[row["game_id"]], row["position"]] = slots[row["related_game_id"]]
+                purchases[slots[row["game_id"]], row["position"]] = row["purchases"]
+        return _Neighbours(build, slots, game_ids, related, purchases)
+
+    def related(self, game_id: str, limit: int = RECOMMENDATION_TOP_K) -> List[Dict[str, Any]]:
+        """Games most often bought together with `game_id`, as {game_id, purchases}, best first."""
+        neighbours = self._neighbours
+        slot = neighbours.slots.get(game_id)
+        if slot is None:
+            return []
+        return [
+            {"game_id": neighbours.game_ids[other], "purchases": count}
+            for other, count in zip(neighbours.related[slot, :limit].tolist(), neighbours.purchases[slot, :limit].tolist())
+            if other >= 0
+        ]
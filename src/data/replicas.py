@@ -0,0 +1,107 @@
+# replicas.py
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.data.backends import StorageBackend
+from src.utils.config import DB_REPLICA_CHECK_INTERVAL, DB_REPLICA_MAX_LAG, DB_REPLICA_STICKINESS
+
+
+class Replica:
+    """One read replica connection and its health state."""
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+        self.conn = None
+        self.healthy = False
+        self.next_check = 0.0
+
+    def close(self):
+        if self.conn is not None and self.backend.is_connected(self.conn):
+            self.conn.close()
+        self.conn = None
+
+
+class ReplicaPool:
+    """
+    Read replicas of one DBManager, used round-robin.
+
+    A replica is (re)checked at most every `check_interval` seconds: it must be
+    reachable and, where the engine reports it, lag the primary by no more than
+    `max_lag` seconds. Replicas that fail a query are skipped until their next check.
+    """
+
+    def __init__(self, backends: List[StorageBackend], check_interval: float = DB_REPLICA_CHECK_INTERVAL,
+                 max_lag: float = DB_REPLICA_MAX_LAG):
+        self.replicas = [Replica(backend) for backend in backends]
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def _check(self, replica: Replica, now: float):
+        replica.next_check = now + self.check_interval
+        try:
+            if replica.conn is None or not replica.backend.is_connected(replica.conn):
+                replica.conn = replica.backend.connect()
+            lag = replica.backend.replication_lag(replica.conn)
+            replica.healthy = lag is not None and lag <= self.max_lag
+        except replica.backend.Error:
+            replica.close()
+            replica.healthy = False
+
+    def acquire(self) -> Optional[Replica]:
+        """The next healthy replica in round-robin order, or None when none is usable."""
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next]
+            self._next = (self._next + 1) % len(self.replicas)
+            if now >= replica.next_check:
+                self._check(replica, now)
+            if replica.healthy:
+                return replica
+        return None
+
+    def mark_down(self, replica: Replica):
+        """Takes a replica out of rotation until its next health check."""
+        replica.healthy = False
+        replica.next_check = time.monotonic() + self.check_interval
+
+    def open_connections(self) -> int:
+        return sum(1 for replica in self.replicas
+                   if replica.conn is not None and replica.backend.is_connected(replica.conn))
+
+    def close(self):
+        for replica in self.replicas:
+            replica.close()
+
+
+class RecentWrites:
+    """
+    Users who wrote in the last `window` seconds, process-wide. Their reads go to
+    the primary, so they see their own writes however far the replicas lag.
+    """
+
+    def __init__(self, window: float = DB_REPLICA_STICKINESS):
+        self.window = window
+        self._until: Dict[str, float] = {}
+        self._prune_at = 1024
+        self._lock = threading.Lock()
+
+    def mark(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            self._until[str(user_id)] = now + self.window
+            # Amortized cleanup keeps the map at about the number of writers per window
+            if len(self._until) >= self._prune_at:
+                self._until = {user: until for user, until in self._until.items() if until > now}
+                self._prune_at = max(1024, 2 * len(self._until))
+
+    def is_recent(self, user_id) -> bool:
+        until = self._until.get(str(user_id))
+        return until is not None and until > time.monotonic()
+
+
+recent_writes = RecentWrites()
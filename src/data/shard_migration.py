@@ -0,0 +1,111 @@
+# shard_migration.py
+import argparse
+from typing import Any, Dict, List, Optional
+
+from src.data.db_manager import DBManager
+from src.tools.logger import logger
+from src.utils.config import DB_SHARD_MIGRATION_BATCH
+
+_PURCHASE_COLUMNS = ["user_id", "game_id", "payment_method", "amount", "status", "created"]
+
+
+class ShardMigrator:
+    """
+    Moves users to their new shard after shards were added to DB_SHARDS.
+
+    Run it while every process uses the new shard list with DB_SHARDS_PREVIOUS_COUNT
+    set to the old count: new purchases then go to the new shards and reads check both
+    the old and new shard of a user, so users keep buying during the migration. Each
+    batch copies the purchases of up to `batch_size` moving users to their new shards,
+    then deletes them from the old one. Each copy is recorded in the target's
+    'purchase_moves' (source shard, source purchase id) in the same transaction and
+    recorded rows are skipped, so a batch interrupted between the copy and the delete
+    is simply redone by the next run. Identical purchases stay distinct rows.
+    Once it is done, unset DB_SHARDS_PREVIOUS_COUNT and empty 'purchase_moves'.
+    """
+
+    def __init__(self, db_manager: Optional[DBManager] = None, batch_size: int = DB_SHARD_MIGRATION_BATCH):
+        self.logger = logger
+        self.db_manager = db_manager or DBManager()
+        self.batch_size = batch_size
+
+    def run(self) -> int:
+        """Migrates every old shard; returns the number of users moved."""
+        shards = self.db_manager.shards
+        if not shards.resharding:
+            self.logger.info("ShardMigrator: not resharding, nothing to move")
+            return 0
+        # Users of the new shards were routed there from the start
+        moved = sum(self.migrate_shard(index) for index in range(shards.previous_count))
+        self.logger.info(f"ShardMigrator: moved {moved} users to {shards.count} shards")
+        return moved
+
+    def migrate_shard(self, index: int) -> int:
+        """Moves the users of shard `index` that now route elsewhere, in keyset batches of user ids."""
+        shards = self.db_manager.shards
+        source = shards.members[index]
+        moved, after = 0, -1
+        while True:
+            users = source._execute_query(
+                "SELECT DISTINCT user_id FROM purchases WHERE user_id > %s ORDER BY user_id LIMIT %s",
+                (after, self.batch_size), raise_errors=True,
+            )
+            moving = [row["user_id"] for row in users if shards.index_for(row["user_id"]) != index]
+            if moving:
+                self._move(index, moving)
+                moved += len(moving)
+                self.logger.info(f"ShardMigrator: moved {moved} users off shard {index}")
+            if len(users) < self.batch_size:
+                return moved
+            after = users[-1]["user_id"]
+
+    def _move(self, source_index: int, user_ids: List[Any]):
+        shards = self.db_manager.shards
+        source = shards.members[source_index]
+        placeholders = ', '.join(['%s'] * len(user_ids))
+        rows = source._execute_query(
+            f"SELECT id, {', '.join(_PURCHASE_COLUMNS)} FROM purchases WHERE user_id IN ({placeholders})",
+            tuple(user_ids), raise_errors=True,
+        )
+        by_target: Dict[int, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_target.setdefault(shards.index_for(row["user_id"]), []).append(row)
+
+        for target_index, target_rows in by_target.items():
+            target = shards.members[target_index]
+            moved = self._moved_ids(target, source_index, [row["id"] for row in target_rows])
+            missing = [row for row in target_rows if row["id"] not in moved]
+            if not missing:
+                continue
+            purchase_values = ', '.join(['(' + ', '.join(['%s'] * len(_PURCHASE_COLUMNS)) + ')'] * len(missing))
+            move_values = ', '.join(['(%s, %s)'] * len(missing))
+            with target.transaction():
+                target._execute_query(
+                    f"INSERT INTO purchases ({', '.join(_PURCHASE_COLUMNS)}) VALUES {purchase_values}",
+                    tuple(row[column] for row in missing for column in _PURCHASE_COLUMNS),
+                )
+                target._execute_query(
+                    f"INSERT INTO purchase_moves (source_shard, source_id) VALUES {move_values}",
+                    tuple(value for row in missing for value in (source_index, row["id"])),
+                )
+
+        with source.transaction():
+            source._execute_query(f"DELETE FROM purchases WHERE user_id IN ({placeholders})", tuple(user_ids))
+
+    @staticmethod
+    def _moved_ids(target: DBManager, source_index: int, source_ids: List[Any]) -> set:
+        """The ids among `source_ids` (purchases of shard `source_index`) already copied to `target`."""
+        placeholders = ', '.join(['%s'] * len(source_ids))
+        rows = target._execute_query(
+            f"SELECT source_id FROM purchase_moves WHERE source_shard = %s AND source_id IN ({placeholders})",
+            (source_index, *source_ids), raise_errors=True,
+        )
+        return {row["source_id"] for row in rows}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move users to their new purchase shard after adding shards.")
+    parser.add_argument("--batch-size", type=int, default=DB_SHARD_MIGRATION_BATCH)
+    args = parser.parse_args()
+
+    print(f"Moved {ShardMigrator(batch_size=args.batch_size).run()} users.")
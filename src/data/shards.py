@@ -0,0 +1,83 @@
+# shards.py
+import hashlib
+from typing import Dict, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach): maps a 64-bit key to one of `buckets`.
+    Going from N to N+1 buckets moves only 1/(N+1) of the keys, all to the new bucket.
+    """
+    bucket, next_bucket = -1, 0
+    while next_bucket < buckets:
+        bucket = next_bucket
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        next_bucket = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def user_key(user_id) -> int:
+    """Stable 64-bit key of a user: the same for 42 and "42", in every process."""
+    return int.from_bytes(hashlib.blake2b(str(user_id).encode(), digest_size=8).digest(), "big")
+
+
+class ShardSet:
+    """
+    The databases purchases are spread over, with user_id -> shard routing.
+
+    A user lives on shard jump_hash(user_id, len(members)). Shards are only ever added
+    at the end of the list. While resharding from `previous_count` shards, a moved user's purchases are on its old shard, its new
+    one, or (mid-batch) both: writes go to the new shard and reads check both, so the
+    migration can copy users over in batches while they keep buying.
+    """
+
+    def __init__(self, members: List[T], previous_count: Optional[int] = None):
+        self.members = members
+        self.count = len(members)
+        self.previous_count = previous_count or self.count
+        if self.previous_count > self.count:
+            raise ValueError(f"Cannot reshard from {self.previous_count} to {self.count} shards, shards can only be added.")
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __iter__(self):
+        return iter(self.members)
+
+    @property
+    def resharding(self) -> bool:
+        return self.previous_count != self.count
+
+    def index_for(self, user_id) -> int:
+        return jump_hash(user_key(user_id), self.count)
+
+    def shard_for(self, user_id) -> T:
+        """The shard `user_id` writes to."""
+        return self.members[self.index_for(user_id)]
+
+    def read_indexes(self, user_id) -> List[int]:
+        """Indexes of the shards holding `user_id`'s purchases: its shard, and its old one while resharding."""
+        key = user_key(user_id)
+        current = jump_hash(key, self.count)
+        if self.resharding:
+            previous = jump_hash(key, self.previous_count)
+            if previous != current:
+                return [current, previous]
+        return [current]
+
+    def read_shards(self, user_id) -> List[T]:
+        return [self.members[index] for index in self.read_indexes(user_id)]
+
+    def group_reads(self, pairs: Iterable[tuple]) -> Dict[int, List[tuple]]:
+        """Groups (user_id, ...) tuples by every shard index their user reads from."""
+        groups: Dict[int, List[tuple]] = {}
+        for pair in pairs:
+            for index in self.read_indexes(pair[0]):
+                groups.setdefault(index, []).append(pair)
+        return groups
+
+    def close(self):
+        for member in self.members:
+            member.close()
@@ -1,23 +1,50 @@
-from typing import Any, Dict
+import threading
+import time
+from typing import Any, Dict, List, Optional
 from src.agents.game_generator import GameGeneratorAgent
 from src.agents.marketing_agent import MarketingAgent
+from src.data.db_manager import DBManager
+from src.services.llm_service import LLMService
 from src.tools.logger import logger
+from src.tools.resource_monitor import ResourceMonitor
+from src.utils.config import ORCHESTRATOR_BATCH_SIZE, ORCHESTRATOR_INTERVAL, ORCHESTRATOR_REPORT_INTERVAL
 
 
 class GameCreationOrchestrator:
     """
     Manages the sequential execution of the automated game creation pipeline.
     Uses simple function calls since state management is handled by game_id.
+
+    Both agents share one DB connection and the process-wide LLM clients, so
+    run_forever() can repeat the pipeline without opening anything per run.
     """
-    def __init__(self):
+    def __init__(self, game_generator: Optional[GameGeneratorAgent] = None,
+                 marketing_agent: Optional[MarketingAgent] = None, db_manager: Optional[DBManager] = None):
         # Initialize the agents here
         self.logger = logger
-        self.game_generator = GameGeneratorAgent()
-        self.marketing_agent = MarketingAgent()
+        self.db_manager = db_manager or DBManager()
+        llm_service = LLMService()
+        self.game_generator = game_generator or GameGeneratorAgent(llm_service, self.db_manager)
+        self.marketing_agent = marketing_agent or MarketingAgent(llm_service, self.db_manager)
+        self._stop = threading.Event()
+        # Games of run_pipeline() waiting for their deployment batch before their campaign
+        self._awaiting_campaign: List[str] = []
+
+    def _run_deployed_campaigns(self):
+        """Runs the campaigns of the waiting games once their batch is deployed (posts link the public URL)."""
+        if not self._awaiting_campaign or self.game_generator.pending_deployments():
+            return
+        game_ids, self._awaiting_campaign = self._awaiting_campaign, []
+        if len(game_ids) == 1:
+            self.marketing_agent.run_campaign(game_ids[0])
+        else:
+            self.marketing_agent.run_batch_campaign(game_ids)
 
     def run_pipeline(self) -> Dict[str, Any]:
         """
         Executes the full pipeline: Generation followed by Marketing.
+        The game joins the deployment queue, which is pushed in batches (see
+        GameGeneratorAgent.deploy_if_due()); its campaign runs once it is deployed.
         """
         
         self.logger.info(f"*** Starting Orchestration for prompt: ***")
@@ -25,12 +52,19 @@ class GameCreationOrchestrator:
         try:
             # 1. GENERATION PHASE
             game_id = self.game_generator.generate_game()
-            # 2. MARKETING PHASE
-            self.marketing_agent.run_campaign(game_id)
+            self._awaiting_campaign.append(game_id)
+            # 2. DEPLOYMENT PHASE (only when the batch is full or has waited long enough)
+            self.game_generator.deploy_if_due()
+            # 3. MARKETING PHASE
+            deployed = not self.game_generator.pending_deployments()
+            self._run_deployed_campaigns()
             
             return {
                 "status": "SUCCESS",
-                "message": "Game created, deployed, and marketing campaign initiated.",
+                "message": (
+                    "Game created, deployed, and marketing campaign initiated." if deployed
+                    else "Game created and queued for deployment; its campaign runs once it is deployed."
+                ),
                 "game_id": game_id
             }
 
@@ -41,4 +75,93 @@ class GameCreationOrchestrator:
                 "status": "FAILURE",
                 "message": f"Pipeline failed during execution: {e}",
                 "game_id": None
-            }
\ No newline at end of file
+            }
+
+    def run_batch_pipeline(self, game_count: int) -> Dict[str, Any]:
+        """
+        Generates several games, deploys them together in one git commit/push,
+        then runs the marketing campaigns of all deployed games as one batch.
+        """
+        self.logger.info(f"*** Starting batch orchestration for {game_count} games ***")
+
+        game_ids = []
+        failures = []
+        for _ in range(game_count):
+            try:
+                game_ids.append(self.game_generator.generate_game())
+            except Exception as e:
+                self.logger.error(f"!!! GAME GENERATION FAILED: {e}")
+                failures.append(str(e))
+
+        try:
+            self.game_generator.deploy_pending_games()
+        except Exception as e:
+            self.logger.error(f"!!! BATCH DEPLOYMENT FAILED: {e}")
+            return {
+                "status": "FAILURE",
+                "message": f"Batch deployment failed: {e}",
+                "game_ids": game_ids
+            }
+
+        self.marketing_agent.run_batch_campaign(game_ids)
+        self._run_deployed_campaigns()
+
+        return {
+            "status": "SUCCESS" if not failures else "PARTIAL",
+            "message": f"{len(game_ids)} games created and deployed, {len(failures)} failed.",
+            "game_ids": game_ids
+        }
+
+    def run_forever(self, interval: float = ORCHESTRATOR_INTERVAL, batch_size: int = ORCHESTRATOR_BATCH_SIZE,
+                    iterations: Optional[int] = None, monitor: Optional[ResourceMonitor] = None,
+                    report_interval: float = ORCHESTRATOR_REPORT_INTERVAL) -> int:
+        """
+        Runs the pipeline every `interval` seconds until stop() is called (or `iterations`
+        runs are done), logging a resource report every `report_interval` seconds.
+        A failed run is logged and the next one starts on schedule.
+
+        Returns:
+            The number of pipeline runs.
+        """
+        monitor = monitor or ResourceMonitor()
+        monitor.start()
+        self._stop.clear()
+        runs = 0
+        next_report = time.monotonic() + report_interval
+        self.logger.info(f"*** Orchestrator running every {interval}s, {batch_size} game(s) per run ***")
+        try:
+            while not self._stop.is_set() and (iterations is None or runs < iterations):
+                try:
+                    if batch_size > 1:
+                        result = self.run_batch_pipeline(batch_size)
+                    else:
+                        result = self.run_pipeline()
+                    if result["status"] == "FAILURE":
+                        self.logger.warning(f"Pipeline run {runs + 1} failed: {result['message']}")
+                except Exception as e:
+                    self.logger.error(f"!!! PIPELINE RUN {runs + 1} CRASHED: {e}")
+                runs += 1
+
+                if time.monotonic() >= next_report:
+                    monitor.report()
+                    next_report = time.monotonic() + report_interval
+                if interval > 0:
+                    self._stop.wait(interval)
+        finally:
+            monitor.report()
+            monitor.stop()
+        return runs
+
+    def stop(self):
+        """Makes run_forever() return after the current run (safe from signal handlers and other threads)."""
+        self._stop.set()
+
+    def close(self):
+        """Deploys games still queued and runs their campaigns, then closes the shared DB connection."""
+        try:
+            self.game_generator.deploy_pending_games()
+            self._run_deployed_campaigns()
+        except Exception as e:
+            # Left in the DB with their local path; the next run queues them again
+            self.logger.error(f"!!! DEPLOYMENT ON CLOSE FAILED: {e}")
+        self.db_manager.close()
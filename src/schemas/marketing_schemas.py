@@ -26,4 +26,18 @@ class MarketingCampaignSchema(BaseModel):
     )
     linkedin: PlatformPost = Field(
         description="Content designed to be professional and focus on the technical achievement or educational/development aspect of the game."
-    )
\ No newline at end of file
+    )
+class GameCampaignSchema(BaseModel):
+    """Marketing campaign for one game of a batch request."""
+    game_id: str = Field(
+        description="The GAME ID exactly as given in the request."
+    )
+    campaign: MarketingCampaignSchema = Field(
+        description="The full marketing campaign for this game."
+    )
+
+class MarketingBatchSchema(BaseModel):
+    """Marketing campaigns for several games generated in a single request."""
+    campaigns: List[GameCampaignSchema] = Field(
+        description="One entry per game in the request, in the same order."
+    )
@@ -1,18 +1,113 @@
-
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 from src.tools.logger import logger
+from src.utils.config import GIT_DEPLOY_BASE_URL, GIT_DEPLOY_BRANCH, GIT_DEPLOY_REPO, GIT_DEPLOY_WORKDIR
+
+# Directory inside the deployment repository that holds one folder per game
+DEPLOY_GAMES_DIR = "games"
+
 
+class GitHandler:
+    """
+    Deploys generated games to a git repository in batches.
 
-class GitHandler: # Here actual code for pushing that html file to github will be placed
+    Games are queued as they are generated and deploy_queued() copies all of them
+    into a local clone, records one commit and does one push, so the cost of a
+    push is shared by the whole batch. Without a configured repository the
+    deployment is mocked and games keep their local path as URL.
+    """
 
-    def __init__(self):
+    def __init__(self, repo_url: str = GIT_DEPLOY_REPO, branch: str = GIT_DEPLOY_BRANCH,
+                 workdir: str = GIT_DEPLOY_WORKDIR, base_url: str = GIT_DEPLOY_BASE_URL):
         self.logger = logger
-        pass
+        self.repo_url = repo_url
+        self.branch = branch
+        self.workdir = Path(workdir)
+        self.base_url = base_url.rstrip("/")
+        self._queue: List[Tuple[str, Path]] = []
+        self._queued_since: Optional[float] = None  # When the oldest queued game was queued
+
+    def _git(self, *args: str, cwd: Optional[Path] = None) -> str:
+        result = subprocess.run(
+            ["git", "-c", "user.name=Game Platform", "-c", "user.email=games@localhost", *args],
+            cwd=cwd or self.workdir, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"git {args[0]} failed: {result.stderr.strip()}")
+        return result.stdout.strip()
+
+    def _ensure_clone(self):
+        """Clones the deployment repository once and syncs it with the remote branch."""
+        if not (self.workdir / ".git").exists():
+            self.workdir.parent.mkdir(parents=True, exist_ok=True)
+            self._git("clone", "--quiet", self.repo_url, str(self.workdir), cwd=self.workdir.parent)
+
+        if self._git("ls-remote", "--heads", "origin", self.branch):
+            self._git("fetch", "--quiet", "origin", self.branch)
+            self._git("checkout", "--quiet", "-B", self.branch, f"origin/{self.branch}")
+        else:
+            # Empty repository: the first batch creates the branch
+            self._git("symbolic-ref", "HEAD", f"refs/heads/{self.branch}")
+
+    def deployed_url(self, game_id: str) -> str:
+        path = f"{DEPLOY_GAMES_DIR}/{game_id}/index.html"
+        return f"{self.base_url}/{path}" if self.base_url else path
+
+    def queue_game(self, game_id: str, file_path: Path):
+        """Adds a generated game file to the next deployment batch."""
+        if not self._queue:
+            self._queued_since = time.monotonic()
+        self._queue.append((game_id, Path(file_path)))
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def oldest_wait(self) -> float:
+        """Seconds the oldest queued game has been waiting, 0 with an empty queue."""
+        return time.monotonic() - self._queued_since if self._queue else 0.0
+
+    def deploy_queued(self) -> Dict[str, str]:
+        """
+        Deploys every queued game with a single commit and push.
+
+        Returns:
+            A mapping of game_id to deployed URL. The queue is kept if the push fails.
+        """
+        if not self._queue:
+            return {}
+
+        if not self.repo_url:
+            self.logger.info(f"Mock deployment of {len(self._queue)} games, no GIT_DEPLOY_REPO configured")
+            deployed = {game_id: f"{game_id}/{file_path.name}" for game_id, file_path in self._queue}
+            self._queue.clear()
+            return deployed
+
+        self._ensure_clone()
+        deployed = {}
+        for game_id, file_path in self._queue:
+            target = self.workdir / DEPLOY_GAMES_DIR / game_id / "index.html"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(file_path, target)
+            deployed[game_id] = self.deployed_url(game_id)
+
+        self._git("add", "--", DEPLOY_GAMES_DIR)
+        # Re-deploying unchanged files leaves nothing to commit
+        if self._git("status", "--porcelain", "--", DEPLOY_GAMES_DIR):
+            self._git("commit", "--quiet", "-m", f"Deploy {len(deployed)} games")
+            self._git("push", "--quiet", "origin", f"HEAD:refs/heads/{self.branch}")
+
+        self.logger.info(f"Deployed {len(deployed)} games in one commit to {self.repo_url}")
+        self._queue.clear()
+        return deployed
 
-    def push_file_to_repo(self, file_path):
+    def push_file_to_repo(self, game_id: str, file_path: Path) -> str:
         """
-        This function will take file path for newly created game html file
-        then will push this file on specific GIT repo provide in config file
-        In return it will get depolyed URL which we can store it in the database
+        Deploys a single game file right away and returns its deployed URL.
+        Prefer queue_game() + deploy_queued() when generating several games.
         """
-        self.logger.info("Mock function called to push newly created html game file to git repo")
\ No newline at end of file
+        self.queue_game(game_id, file_path)
+        return self.deploy_queued()[game_id]
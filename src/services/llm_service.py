@@ -1,36 +1,158 @@
 # llm_service.py
+import atexit
 import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
 from langchain_openai import ChatOpenAI
-from langchain_core.language_models.chat_models import BaseChatModel
 from dotenv import load_dotenv
 
+from src.services.rate_limiter import LANE_INTERACTIVE, RateLimitedChatModel, get_llm_limiter
 from src.tools.logger import logger
+from src.utils.config import (
+    LLM_COMPLETION_TOKENS,
+    LLM_HTTP_KEEPALIVE_EXPIRY,
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_HTTP_MAX_KEEPALIVE,
+    LLM_HTTP_TIMEOUT,
+)
 load_dotenv()
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_registry_lock = threading.Lock()
+_chat_models: Dict[Tuple[str, float], ChatOpenAI] = {}
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_clients_pid = os.getpid()  # Process that opened the shared pools
+
+
+def _http_options() -> dict:
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "timeout": httpx.Timeout(LLM_HTTP_TIMEOUT, connect=10.0),
+        "limits": httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def _forget_inherited_clients():
+    """Drops pools and clients a forked worker inherited (call with _registry_lock held)."""
+    global _http_client, _async_http_client, _clients_pid
+    if _clients_pid != os.getpid():
+        _http_client = None
+        _async_http_client = None
+        _chat_models.clear()
+        _clients_pid = os.getpid()
+
+
+def get_http_client() -> httpx.Client:
+    """The keep-alive connection pool shared by every sync LLM client of the process."""
+    global _http_client
+    with _registry_lock:
+        _forget_inherited_clients()
+        if _http_client is None:
+            _http_client = httpx.Client(**_http_options())
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    The keep-alive connection pool shared by every async LLM client of the process.
+    Its connections belong to the event loop that opened them, so use it from one loop.
+    """
+    global _async_http_client
+    with _registry_lock:
+        _forget_inherited_clients()
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(**_http_options())
+        return _async_http_client
+
+
+def close_llm_clients():
+    """Closes the shared sync connection pool and forgets every cached client."""
+    global _http_client, _async_http_client
+    with _registry_lock:
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = None
+        # The async pool can only be closed from its event loop; dropping it releases the sockets
+        _async_http_client = None
+        _chat_models.clear()
+
+
+def _reset_after_fork():
+    """A forked worker must open its own connections instead of sharing the parent's sockets."""
+    global _http_client, _async_http_client, _clients_pid, _registry_lock
+    _registry_lock = threading.Lock()
+    _http_client = None
+    _async_http_client = None
+    _chat_models.clear()
+    _clients_pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(close_llm_clients)
+
+
 class LLMService:
     """
     A service class that acts as a factory to provide configured LLM clients.
     All high-level logic (prompts, structure enforcement) is delegated to the agents.
+
+    Chat models are cached per (model, temperature) for the whole process and all of
+    them share one keep-alive HTTP connection pool (HTTP/2 when 'h2' is installed),
+    so repeated calls and new agents reuse open connections instead of new TLS handshakes.
     """
-    
+
     def __init__(self, model_name: str = "gpt-4o-mini", temperature: float = 0.3):
         # Configuration details are stored here
         self.logger = logger
         self._model_name = model_name
         self._temperature = temperature
 
-    def get_client(self) -> BaseChatModel:
+    def _chat_model(self) -> ChatOpenAI:
+        key = (self._model_name, self._temperature)
+        with _registry_lock:
+            _forget_inherited_clients()
+            chat_model = _chat_models.get(key)
+        if chat_model is None:
+            http_client, async_http_client = get_http_client(), get_async_http_client()
+            with _registry_lock:
+                chat_model = _chat_models.get(key)
+                if chat_model is None:
+                    # Note: API key loading is handled automatically by LangChain if the key
+                    # is set in the environment variables (e.g., OPENAI_API_KEY).
+                    chat_model = ChatOpenAI(
+                        model=self._model_name,
+                        temperature=self._temperature,
+                        # The limiter retries 429s (backing off every caller) and transient errors
+                        max_retries=0,
+                        http_client=http_client,
+                        http_async_client=async_http_client,
+                    )
+                    _chat_models[key] = chat_model
+                    self.logger.info(f"LLM client created model: {self._model_name}")
+        return chat_model
+
+    def get_client(self, lane: int = LANE_INTERACTIVE,
+                   completion_tokens: int = LLM_COMPLETION_TOKENS) -> RateLimitedChatModel:
         """
-        Returns a configured instance of the LLM client (LangChain ChatModel).
-        
-        The agents will use this client for all interactions (structured output, 
-        tool calling, and chat).
+        Returns the shared LLM client (LangChain ChatModel) for this model and temperature,
+        wrapped in a RateLimitedChatModel.
+
+        The agents will use this client for all interactions (structured output,
+        tool calling, and chat), with invoke() or ainvoke(). Structured-output calls go
+        through the process-wide AdaptiveLimiter in the given priority lane
+        (see src/services/rate_limiter.py).
         """
-        # Note: API key loading is handled automatically by LangChain if the key
-        # is set in the environment variables (e.g., OPENAI_API_KEY).
-        self.logger.info(f"LLM client created model: {self._model_name}")
-        client = ChatOpenAI(
-            model=self._model_name,
-            temperature=self._temperature,
-        )
-        return client
\ No newline at end of file
+        return RateLimitedChatModel(self._chat_model(), get_llm_limiter(), lane, completion_tokens)
@@ -0,0 +1,52 @@
+# llm_simulator.py
+import threading
+import time
+from collections import deque
+
+
+class SimulatedRateLimitError(Exception):
+    """The 429 the simulated provider returns when a request exceeds its quotas."""
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit exceeded, retry after {retry_after:.2f}s")
+        self.retry_after = retry_after
+
+
+class SimulatedLLMProvider:
+    """
+    Local stand-in for an LLM API with per-window request and token quotas,
+    used to exercise the AdaptiveLimiter without calling (or paying) a real provider.
+    Every request takes `latency` seconds; requests over quota fail fast with a 429.
+    """
+
+    def __init__(self, tokens_per_minute: int, requests_per_minute: int, latency: float = 0.05,
+                 window: float = 60.0):
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self.latency = latency
+        self.window = window
+        self._lock = threading.Lock()
+        self._accepted: "deque[tuple]" = deque()  # (accepted_at, tokens)
+        self._window_tokens = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def complete(self, tokens: int) -> int:
+        """Serves one request of `tokens` total tokens and returns the tokens used."""
+        with self._lock:
+            now = time.monotonic()
+            while self._accepted and self._accepted[0][0] <= now - self.window:
+                self._window_tokens -= self._accepted.popleft()[1]
+            if (len(self._accepted) >= self.requests_per_minute
+                    or self._window_tokens + tokens > self.tokens_per_minute):
+                self.rejected += 1
+                retry_after = self._accepted[0][0] + self.window - now if self._accepted else 0.0
+                raise SimulatedRateLimitError(retry_after)
+            self._accepted.append((now, tokens))
+            self._window_tokens += tokens
+
+        time.sleep(self.latency)
+        with self._lock:
+            self.completed += 1
+        return tokens
@@ -0,0 +1,317 @@
+# rate_limiter.py
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+import httpx
+import openai
+from langchain_core.runnables import RunnableLambda
+
+from src.tools.logger import logger
+from src.utils.config import (
+    LLM_COMPLETION_TOKENS,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+)
+
+# Priority lanes: a waiting request of a lower lane is always admitted first
+LANE_INTERACTIVE = 0  # game generation
+LANE_BULK = 1  # marketing campaigns and other background work
+
+THROTTLE_BACKOFF = 1.0  # Seconds to pause admissions after a 429 that carries no Retry-After
+TRANSIENT_BACKOFF = 0.5  # Seconds before the first retry of a transient failure, doubled on each retry
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """True for provider rate-limit responses (HTTP 429)."""
+    return getattr(error, "status_code", None) == 429
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """True for failures worth retrying as they are: provider 5xx, timeouts and dropped connections."""
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code >= 500 or status_code == 408
+    return isinstance(error, (httpx.TransportError, openai.APIConnectionError))
+
+
+class _AcquireAbandoned(Exception):
+    """The caller waiting in acquire() went away (its task was cancelled)."""
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from the error or its Retry-After header."""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        response = getattr(error, "response", None)
+        retry_after = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    """
+    Admission control for calls to a rate-limited LLM provider, shared by every
+    client of the process.
+
+    A request is admitted once it is at the head of the priority queue, fewer than
+    `limit` requests are in flight, and the requests and (estimated) tokens admitted
+    during the last `window` seconds leave room for it under the provider quotas.
+    Estimates are corrected with the usage the provider reports. The concurrency
+    limit is adjusted AIMD-style: +1/limit per successful call, halved (at most once
+    per congestion event) when the provider throttles, and admissions pause for the
+    Retry-After the provider sent. Transient failures (5xx, timeouts, dropped
+    connections) are retried after an exponential backoff of their own caller only.
+    """
+
+    def __init__(self, tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+                 requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, min_concurrency: int = 1,
+                 max_retries: int = LLM_MAX_RETRIES, window: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.window = window
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._admitted: "deque[list]" = deque()  # [admitted_at, tokens] of the requests in the current window
+        self._window_tokens = 0
+        self._in_flight = 0
+        self._limit = float(max_concurrency)
+        self._queue: list = []  # heap of (lane, sequence)
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self.throttled = 0
+
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit."""
+        return int(self._limit)
+
+    def _expire(self, now: float):
+        while self._admitted and self._admitted[0][0] <= now - self.window:
+            self._window_tokens -= self._admitted.popleft()[1]
+
+    def _admission_delay(self, tokens: int) -> Optional[float]:
+        """0 when a request can be admitted now, else seconds to wait (None: until a release)."""
+        now = self._clock()
+        self._expire(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= self.limit:
+            return None
+        if len(self._admitted) >= self.requests_per_minute:
+            return self._admitted[0][0] + self.window - now
+        # A request larger than the whole quota still goes through once the window is empty
+        if self._admitted and self._window_tokens + tokens > self.tokens_per_minute:
+            return self._admitted[0][0] + self.window - now
+        return 0
+
+    def acquire(self, tokens: int, lane: int = LANE_INTERACTIVE, abandoned: Optional[threading.Event] = None) -> list:
+        """
+        Blocks until the request may be sent; returns the ticket to pass to release().
+        Gives up with _AcquireAbandoned once `abandoned` is set (and the condition notified).
+        """
+        with self._cond:
+            entry = (lane, next(self._sequence))
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    if abandoned is not None and abandoned.is_set():
+                        raise _AcquireAbandoned()
+                    delay = self._admission_delay(tokens) if self._queue[0] == entry else None
+                    if delay == 0:
+                        break
+                    self._cond.wait(delay)
+            except BaseException:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+                raise
+
+            heapq.heappop(self._queue)
+            self._in_flight += 1
+            ticket = [self._clock(), tokens]
+            self._admitted.append(ticket)
+            self._window_tokens += tokens
+            # The next request in line may fit as well
+            self._cond.notify_all()
+            return ticket
+
+    def release(self, ticket: list, used_tokens: Optional[int] = None, throttled: bool = False,
+                retry_after: Optional[float] = None, succeeded: bool = True):
+        """Ends a request admitted by acquire() and feeds its outcome back into the limits."""
+        with self._cond:
+            now = self._clock()
+            self._in_flight -= 1
+            if used_tokens is not None and ticket[0] > now - self.window:
+                self._window_tokens += used_tokens - ticket[1]
+                ticket[1] = used_tokens
+
+            if throttled:
+                self.throttled += 1
+                # Requests admitted before the last decrease saw the same congestion
+                if ticket[0] > self._last_decrease:
+                    self._limit = max(float(self.min_concurrency), self._limit / 2)
+                    self._last_decrease = now
+                    logger.warning(f"LLM provider throttled, concurrency limit lowered to {self.limit}")
+                self._paused_until = max(self._paused_until, now + (retry_after or THROTTLE_BACKOFF))
+            elif succeeded:
+                self._limit = min(float(self.max_concurrency), self._limit + 1 / self._limit)
+            self._cond.notify_all()
+
+    def _release_failed(self, ticket: list, error: BaseException, attempt: int) -> Optional[float]:
+        """Releases the ticket of a failed request; returns seconds to wait before retrying it, None to give up."""
+        if is_throttle_error(error):
+            self.release(ticket, used_tokens=0, throttled=True, retry_after=_retry_after(error))
+            delay = 0.0  # acquire() waits out the pause the throttle set, for every caller
+        else:
+            self.release(ticket, succeeded=False)
+            delay = TRANSIENT_BACKOFF * 2 ** attempt if is_transient_error(error) else None
+        return delay if attempt < self.max_retries else None
+
+    def call(self, request: Callable[[], Tuple[Any, Optional[int]]], tokens: int, lane: int = LANE_INTERACTIVE) -> Any:
+        """
+        Runs `request` (which returns (result, tokens used)) under the limiter,
+        retrying it when it is throttled or fails transiently.
+        """
+        for attempt in range(self.max_retries + 1):
+            ticket = self.acquire(tokens, lane)
+            try:
+                result, used_tokens = request()
+            except BaseException as e:
+                delay = self._release_failed(ticket, e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.release(ticket, used_tokens=used_tokens)
+            return result
+
+    async def _acquire_async(self, tokens: int, lane: int) -> list:
+        """acquire() off the event loop; a cancelled caller leaves the queue, or hands back the slot it got."""
+        abandoned = threading.Event()
+        admission = asyncio.ensure_future(asyncio.to_thread(self.acquire, tokens, lane, abandoned))
+        try:
+            # Shielded: cancelling the thread's future would lose a ticket it still returns
+            return await asyncio.shield(admission)
+        except asyncio.CancelledError:
+            abandoned.set()
+            with self._cond:
+                self._cond.notify_all()
+
+            def release_unused(done: "asyncio.Future"):
+                if not done.cancelled() and done.exception() is None:
+                    self.release(done.result(), used_tokens=0, succeeded=False)
+
+            admission.add_done_callback(release_unused)
+            raise
+
+    async def acall(self, request: Callable[[], Awaitable[Tuple[Any, Optional[int]]]], tokens: int,
+                    lane: int = LANE_INTERACTIVE) -> Any:
+        """Async variant of call(); waiting for admission happens off the event loop."""
+        for attempt in range(self.max_retries + 1):
+            ticket = await self._acquire_async(tokens, lane)
+            try:
+                result, used_tokens = await request()
+            except BaseException as e:
+                delay = self._release_failed(ticket, e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.release(ticket, used_tokens=used_tokens)
+            return result
+
+
+_shared_limiter: Optional[AdaptiveLimiter] = None
+_shared_pid = 0  # Process that created _shared_limiter
+_shared_lock = threading.Lock()
+
+
+def get_llm_limiter() -> AdaptiveLimiter:
+    """The limiter shared by every LLM client of this process (a forked worker gets its own)."""
+    global _shared_limiter, _shared_pid
+    with _shared_lock:
+        if _shared_limiter is None or _shared_pid != os.getpid():
+            _shared_limiter = AdaptiveLimiter()
+            _shared_pid = os.getpid()
+        return _shared_limiter
+
+
+def _reset_after_fork():
+    """The parent's limiter lock may have been held by one of its threads at fork time."""
+    global _shared_limiter, _shared_lock
+    _shared_lock = threading.Lock()
+    _shared_limiter = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class RateLimitedChatModel:
+    """
+    Wraps a LangChain chat model so that structured-output calls go through an
+    AdaptiveLimiter in the given lane. Everything else is delegated to the model.
+    """
+
+    def __init__(self, client, limiter: AdaptiveLimiter, lane: int = LANE_INTERACTIVE,
+                 completion_tokens: int = LLM_COMPLETION_TOKENS):
+        self.client = client
+        self.limiter = limiter
+        self.lane = lane
+        self.completion_tokens = completion_tokens
+
+    def with_structured_output(self, schema, include_raw: bool = False, **kwargs):
+        # The raw message is always requested: it carries the usage metadata
+        structured = self.client.with_structured_output(schema, include_raw=True, **kwargs)
+
+        def estimate(prompt_value) -> int:
+            text = prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value)
+            return estimate_tokens(text) + self.completion_tokens
+
+        def result(output):
+            if include_raw:
+                return output
+            if output.get("parsing_error") is not None:
+                raise output["parsing_error"]
+            return output["parsed"]
+
+        def usage(output) -> Optional[int]:
+            return (getattr(output.get("raw"), "usage_metadata", None) or {}).get("total_tokens")
+
+        def invoke(prompt_value):
+            def request():
+                output = structured.invoke(prompt_value)
+                return output, usage(output)
+            return result(self.limiter.call(request, estimate(prompt_value), self.lane))
+
+        async def ainvoke(prompt_value):
+            async def request():
+                output = await structured.ainvoke(prompt_value)
+                return output, usage(output)
+            return result(await self.limiter.acall(request, estimate(prompt_value), self.lane))
+
+        return RunnableLambda(invoke, afunc=ainvoke)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
@@ -1,9 +1,14 @@
+import hashlib
+import hmac
+
 from src.tools.logger import logger
+from src.utils.config import PAYMENT_WEBHOOK_SECRET
 
 class StripeService:
 
-    def __init__(self):
+    def __init__(self, webhook_secret: str = PAYMENT_WEBHOOK_SECRET):
         self.logger = logger
+        self._webhook_secret = webhook_secret.encode("utf-8")
 
 
     def verify_webhook_payment(self, user_id: str, game_id: str) -> bool:
@@ -12,4 +17,20 @@ class StripeService:
         """
         # In a real system, this would call the gateway API.
         self.logger.info("MOCK verify webhook initialized, actual stripe code goes here")
-        return True # Assume success for the mock
\ No newline at end of file
+        return True # Assume success for the mock
+
+    @property
+    def has_webhook_secret(self) -> bool:
+        return bool(self._webhook_secret)
+
+    def sign_webhook_payload(self, payload: bytes) -> str:
+        """HMAC-SHA256 signature of a webhook body (what the provider sends along with each event)."""
+        if not self._webhook_secret:
+            raise ValueError("PAYMENT_WEBHOOK_SECRET is not set")
+        return hmac.new(self._webhook_secret, payload, hashlib.sha256).hexdigest()
+
+    def verify_webhook_signature(self, payload: bytes, signature: str) -> bool:
+        """Checks that a webhook body was signed with our webhook secret. Without a secret nothing verifies."""
+        if not self._webhook_secret:
+            return False
+        return bool(signature) and hmac.compare_digest(self.sign_webhook_payload(payload), signature)
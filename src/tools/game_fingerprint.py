@@ -0,0 +1,177 @@
+# game_fingerprint.py
+import hashlib
+import random
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_SIGNATURE_MASK = (1 << 32) - 1  # signatures are stored as 32-bit values
+_TOKEN_RE = re.compile(r"[a-z_$][a-z0-9_$]*|\d+|[^\sa-z0-9_$]")
+_NUMBER_RE = re.compile(r"\d+")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Words of a category name that say nothing about the game itself
+_GENERIC_WORDS = {"game", "clone", "test"}
+
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 8  # 8 bands x 8 rows: pairs above ~0.77 Jaccard collide in at least one band
+SHINGLE_SIZE = 5
+
+# Fixed seed: signatures are persisted, so the hash family must be stable across processes.
+_rng = random.Random(0x9A3E)
+_COEFFICIENTS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def _category_phrases(category: str) -> List[str]:
+    """Names a category goes by: 'Breakout/Arkanoid' -> ['breakout', 'arkanoid'], qualifiers in () dropped."""
+    phrases = []
+    for name in category.split("(")[0].split("/"):
+        words = [word for word in _WORD_RE.findall(name.lower()) if word not in _GENERIC_WORDS]
+        if words:
+            phrases.append(" ".join(words))
+    return phrases
+
+
+def infer_category(categories: Sequence[str], title: str, description: str = "") -> Optional[str]:
+    """
+    Category of a game generated without one recorded (older or user-prompted games),
+    from its title, else its description: the category with the longest name found in it.
+    """
+    for text in (title, description):
+        words = f" {' '.join(_WORD_RE.findall((text or '').lower()))} "
+        matches = [
+            (len(phrase), category)
+            for category in categories
+            for phrase in _category_phrases(category)
+            if f" {phrase} " in words
+        ]
+        if matches:
+            return max(matches, key=lambda match: match[0])[1]
+    return None
+
+
+class GameFingerprint:
+    """MinHash signature of a game's normalized title and HTML."""
+
+    def __init__(self, signature: Sequence[int]):
+        self.signature = array("I", signature)
+
+    @staticmethod
+    def _shingles(title: str, html_code: str) -> Iterable[bytes]:
+        """Token shingles of the lower-cased page, with numbers normalized, plus the title words."""
+        tokens = _TOKEN_RE.findall(_NUMBER_RE.sub("0", html_code.lower()))
+        for start in range(max(len(tokens) - SHINGLE_SIZE + 1, 1)):
+            yield " ".join(tokens[start:start + SHINGLE_SIZE]).encode("utf-8")
+        for word in _TOKEN_RE.findall(title.lower()):
+            yield b"title:" + word.encode("utf-8")
+
+    @classmethod
+    def from_game(cls, title: str, html_code: str) -> "GameFingerprint":
+        hashes = {
+            int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "little")
+            for shingle in cls._shingles(title, html_code)
+        }
+        signature = [
+            min(((a * value + b) % _MERSENNE_PRIME) & _SIGNATURE_MASK for value in hashes)
+            for a, b in _COEFFICIENTS
+        ]
+        return cls(signature)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GameFingerprint":
+        signature = array("I")
+        signature.frombytes(data)
+        return cls(signature)
+
+    def to_bytes(self) -> bytes:
+        return self.signature.tobytes()
+
+    def similarity(self, other: "GameFingerprint") -> float:
+        """Estimated Jaccard similarity between the two games."""
+        matches = sum(1 for mine, theirs in zip(self.signature, other.signature) if mine == theirs)
+        return matches / NUM_PERMUTATIONS
+
+    def bands(self) -> List[int]:
+        """One 64-bit bucket key per LSH band (only used in-process, never persisted)."""
+        rows = NUM_PERMUTATIONS // NUM_BANDS
+        return [hash(self.signature[band * rows:(band + 1) * rows].tobytes()) for band in range(NUM_BANDS)]
+
+
+class GameFingerprintIndex:
+    """
+    In-memory LSH index over game fingerprints.
+
+    Signatures live in one flat array and every band is a sorted array of
+    (bucket key, game row) pairs, so a lookup is a handful of binary searches
+    and the index costs a few hundred bytes per game even with hundreds of
+    thousands of games.
+    """
+
+    def __init__(self, threshold: float = 0.8):
+        self.threshold = threshold
+        self._game_ids: List[str] = []
+        self._signatures = array("I")
+        self._band_keys = [array("q") for _ in range(NUM_BANDS)]
+        self._band_rows = [array("I") for _ in range(NUM_BANDS)]
+        self._category_counts: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._game_ids)
+
+    def add(self, game_id: str, fingerprint: GameFingerprint, category: Optional[str] = None):
+        row = len(self._game_ids)
+        self._game_ids.append(game_id)
+        self._signatures.extend(fingerprint.signature)
+        for keys, rows, band in zip(self._band_keys, self._band_rows, fingerprint.bands()):
+            position = bisect_right(keys, band)
+            keys.insert(position, band)
+            rows.insert(position, row)
+        if category:
+            self._category_counts[category] += 1
+
+    def load(self, entries: Iterable[Tuple[str, GameFingerprint, Optional[str]]]):
+        """Bulk-adds (game_id, fingerprint, category) entries, sorting each band once."""
+        for game_id, fingerprint, category in entries:
+            row = len(self._game_ids)
+            self._game_ids.append(game_id)
+            self._signatures.extend(fingerprint.signature)
+            for keys, rows, band in zip(self._band_keys, self._band_rows, fingerprint.bands()):
+                keys.append(band)
+                rows.append(row)
+            if category:
+                self._category_counts[category] += 1
+
+        for band in range(NUM_BANDS):
+            keys, rows = self._band_keys[band], self._band_rows[band]
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            self._band_keys[band] = array("q", (keys[i] for i in order))
+            self._band_rows[band] = array("I", (rows[i] for i in order))
+
+    def find_duplicate(self, fingerprint: GameFingerprint) -> Optional[Tuple[str, float]]:
+        """Returns (game_id, similarity) of the closest indexed game above the threshold, if any."""
+        candidates = set()
+        for keys, rows, band in zip(self._band_keys, self._band_rows, fingerprint.bands()):
+            position = bisect_left(keys, band)
+            while position < len(keys) and keys[position] == band:
+                candidates.add(rows[position])
+                position += 1
+
+        best = None
+        for row in candidates:
+            stored = GameFingerprint(self._signatures[row * NUM_PERMUTATIONS:(row + 1) * NUM_PERMUTATIONS])
+            score = fingerprint.similarity(stored)
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (self._game_ids[row], score)
+        return best
+
+    def pick_category(self, categories: Sequence[str], exclude: Iterable[str] = ()) -> str:
+        """Random category, weighted towards the ones with the fewest games."""
+        excluded = set(exclude)
+        choices = [category for category in categories if category not in excluded] or list(categories)
+        weights = [1.0 / (self._category_counts[category] + 1) for category in choices]
+        return random.choices(choices, weights=weights, k=1)[0]
@@ -0,0 +1,207 @@
+# html_minifier.py
+import re
+from typing import List
+
+# Blocks whose content must not be touched by the generic HTML whitespace pass.
+_RAW_BLOCK_RE = re.compile(
+    r"(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)",
+    re.IGNORECASE | re.DOTALL,
+)
+# Conditional comments (<!--[if IE]>) are kept, everything else is dropped.
+_HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+# A start tag; '>' inside quoted attribute values does not end it.
+_TAG_RE = re.compile(r"""<[a-zA-Z][^"'>]*(?:(?:"[^"]*"|'[^']*')[^"'>]*)*>""")
+# A quoted attribute value (kept verbatim) or a whitespace run
+_TAG_TOKEN_RE = re.compile(r"""("[^"]*"|'[^']*')|\s+""")
+_SCRIPT_TYPE_RE = re.compile(r"""\btype\s*=\s*["']?([^"'\s>]+)""", re.IGNORECASE)
+_JS_TYPES = {"", "text/javascript", "application/javascript", "module"}
+
+# Characters after which a '/' starts a regex literal rather than a division.
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = {"return", "typeof", "instanceof", "in", "of", "new", "delete", "void", "throw", "case", "do", "else"}
+
+
+def byte_size(text: str) -> int:
+    """Size of the text as it is stored and served (UTF-8 bytes)."""
+    return len(text.encode("utf-8"))
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char in "_$"
+
+
+def _collapse_whitespace(text: str) -> str:
+    """Collapse a whitespace run to a single newline or space."""
+    return re.sub(r"\s+", lambda m: "\n" if "\n" in m.group(0) else " ", text)
+
+
+def minify_css(css: str) -> str:
+    """
+    Removes comments and redundant whitespace from a CSS block, and the last ';'
+    of each rule. String literals are copied verbatim.
+    """
+    out: List[str] = []
+    i, n = 0, len(css)
+    while i < n:
+        char = css[i]
+        if char in "\"'":
+            end = i + 1
+            while end < n and css[end] != char:
+                end += 2 if css[end] == "\\" else 1
+            out.append(css[i:end + 1])
+            i = end + 1
+        elif css.startswith("/*", i):
+            end = css.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+        elif char.isspace():
+            end = i
+            while end < n and css[end].isspace():
+                end += 1
+            prev = out[-1][-1] if out and out[-1] else ""
+            nxt = css[end] if end < n else ""
+            # Whitespace is only significant between two tokens (e.g. "1px solid").
+            if prev and nxt and prev not in "{};:,>" and nxt not in "{};,>":
+                out.append(" ")
+            i = end
+        else:
+            if char == "}" and out and out[-1] == ";":
+                out.pop()  # String literals are single entries, so this is a real ';'
+            out.append(char)
+            i += 1
+    return "".join(out).strip()
+
+
+def minify_js(js: str) -> str:
+    """
+    Removes comments and redundant whitespace from an inline script.
+
+    Line breaks are preserved (collapsed to one) so automatic semicolon
+    insertion keeps working; strings, template literals and regex literals
+    are copied verbatim.
+    """
+    out: List[str] = []
+    last_token = ""  # last significant (non-whitespace) output, used for regex detection
+    i, n = 0, len(js)
+    while i < n:
+        char = js[i]
+        if char in "\"'`":
+            end = i + 1
+            while end < n and js[end] != char:
+                if char != "`" and js[end] == "\n":
+                    break  # unterminated string, stop at the line end
+                end += 2 if js[end] == "\\" else 1
+            out.append(js[i:end + 1])
+            last_token = char
+            i = end + 1
+        elif js.startswith("//", i):
+            end = js.find("\n", i)
+            i = n if end == -1 else end
+        elif js.startswith("/*", i):
+            end = js.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            # A block comment still separates two tokens.
+            out.append(" ")
+        elif char == "/" and (not last_token or last_token[-1] in _REGEX_PRECEDERS or last_token in _REGEX_KEYWORDS):
+            end, in_class = i + 1, False
+            while end < n and js[end] != "\n":
+                if js[end] == "\\":
+                    end += 2
+                    continue
+                if js[end] == "[":
+                    in_class = True
+                elif js[end] == "]":
+                    in_class = False
+                elif js[end] == "/" and not in_class:
+                    break
+                end += 1
+            end += 1
+            while end < n and _is_word_char(js[end]):  # flags
+                end += 1
+            out.append(js[i:end])
+            last_token = ")"  # a regex literal behaves like an operand
+            i = end
+        elif char.isspace():
+            end = i
+            while end < n and js[end].isspace():
+                end += 1
+            out.append("\n" if "\n" in js[i:end] else " ")
+            i = end
+        elif _is_word_char(char):
+            end = i
+            while end < n and _is_word_char(js[end]):
+                end += 1
+            out.append(js[i:end])
+            last_token = js[i:end]
+            i = end
+        else:
+            out.append(char)
+            last_token = char
+            i += 1
+    return _squeeze_js_whitespace(out)
+
+
+def _squeeze_js_whitespace(tokens: List[str]) -> str:
+    """Drops whitespace tokens that do not separate two tokens which would otherwise merge."""
+    # First character of the next significant token, for every position.
+    following = [""] * (len(tokens) + 1)
+    for index in range(len(tokens) - 1, -1, -1):
+        token = tokens[index]
+        following[index] = following[index + 1] if token in (" ", "\n") else token[:1]
+
+    result: List[str] = []
+    for index, token in enumerate(tokens):
+        if token not in (" ", "\n"):
+            result.append(token)
+            continue
+        prev = result[-1][-1] if result and result[-1] else ""
+        nxt = following[index + 1]
+        if not prev or not nxt or prev == "\n":
+            continue
+        if token == "\n":
+            if prev in "{;,(" or nxt in "});,":
+                continue
+            result.append("\n")
+        elif (_is_word_char(prev) and _is_word_char(nxt)) or (prev in "+-/" and nxt == prev):
+            result.append(" ")
+    return "".join(result)
+
+
+def _collapse_tag(tag: str) -> str:
+    """Collapses whitespace between the attributes of a tag, not inside quoted values."""
+    return _TAG_TOKEN_RE.sub(lambda m: m.group(1) or ("\n" if "\n" in m.group(0) else " "), tag)
+
+
+def _minify_markup(html: str) -> str:
+    """Strips comments and collapses whitespace in plain markup (no raw blocks); attribute values are kept."""
+    parts: List[str] = []
+    position = 0
+    html = _HTML_COMMENT_RE.sub("", html)
+    for match in _TAG_RE.finditer(html):
+        parts.append(_collapse_whitespace(html[position:match.start()]))
+        parts.append(_collapse_tag(match.group(0)))
+        position = match.end()
+    parts.append(_collapse_whitespace(html[position:]))
+    return "".join(parts)
+
+
+def minify_html(html: str) -> str:
+    """
+    Minifies a self-contained game page: strips HTML comments, collapses
+    markup whitespace and minifies inline <style> and <script> blocks.
+    <pre>/<textarea> content and non-JavaScript scripts are left untouched.
+    """
+    parts: List[str] = []
+    position = 0
+    for match in _RAW_BLOCK_RE.finditer(html):
+        parts.append(_minify_markup(html[position:match.start()]))
+        open_tag, tag, content, close_tag = match.group(1), match.group(2).lower(), match.group(3), match.group(4)
+        if tag == "style":
+            content = minify_css(content)
+        elif tag == "script":
+            type_match = _SCRIPT_TYPE_RE.search(open_tag)
+            if (type_match.group(1).lower() if type_match else "") in _JS_TYPES:
+                content = minify_js(content)
+        parts.append(open_tag + content + close_tag)
+        position = match.end()
+    parts.append(_minify_markup(html[position:]))
+    return "".join(parts).strip()
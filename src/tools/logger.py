@@ -1,6 +1,8 @@
 # logger.py
 import inspect
+import os
 import sys
+import threading
 
 from src.tools.logs_db_manager import LogsDBManager
 
@@ -8,13 +10,31 @@ from src.tools.logs_db_manager import LogsDBManager
 
 class Logger:
     """
-    A centralized logger utility that routes messages to the MySQL 'logs' table.
+    A centralized logger utility that routes messages to the 'logs' table.
     It automatically determines the calling class and method.
     """
     def __init__(self):
         """Initializes the Logger without instantiating DBManager."""
         self._db_manager = None
+        # Requests log from the event loop and from the gateway's DB thread
+        self._lock = threading.Lock()
         print("Logger initialized.")
+        # A forked worker must open its own logs connection instead of sharing the parent's socket
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        """Forgets the parent's logs connection; the child reconnects lazily on its first log."""
+        self._lock = threading.Lock()
+        if self._db_manager is not None:
+            self._db_manager.detach_connection()
+            self._db_manager = None
+
+    def close(self):
+        """Closes the logs DB connection (e.g. on worker shutdown)."""
+        if self._db_manager is not None:
+            self._db_manager.close()
+            self._db_manager = None
 
     def _get_db_manager(self):
         """
@@ -26,7 +46,7 @@ class Logger:
             try:
                 self._db_manager = LogsDBManager()
                 # Check if connection failed in DBManager's __init__
-                if not self._db_manager.conn or not self._db_manager.conn.is_connected():
+                if not self._db_manager.is_connected():
                     print("CRITICAL: DBManager initialized but connection is inactive.", file=sys.stderr)
                     self._db_manager = None # Mark as None if connection failed
                     
@@ -75,9 +95,14 @@ class Logger:
         :type message: str
         """
         location = self._get_caller_info()
-        if self._db_manager is None: #Lazy loading
-            self._db_manager = self._get_db_manager()
-        self._db_manager.insert_log(level, location, message)
+        with self._lock:
+            if self._db_manager is None: #Lazy loading
+                self._db_manager = self._get_db_manager()
+            if self._db_manager is None:
+                # No logs DB available: keep the message on the console instead of losing it
+                print(f'[{level}.{location}.{message}]', file=sys.stderr)
+                return
+            self._db_manager.insert_log(level, location, message)
     
     def info(self, message: str):
         """Log an info message."""
@@ -1,35 +1,37 @@
 # logs_db_manager.py
-import atexit
 import sys
-import mysql.connector
-from mysql.connector import Error as MySQLError
-from src.utils.config import DB_HOST, DB_USER, DB_PASSWORD, DB_NAME
+from typing import Optional
+
+from src.data.backends import StorageBackend, get_backend, register_connection_owner
+from src.utils.config import SQLITE_LOGS_PATH
+
+# Connections inherited from a parent process across fork(), see detach_connection()
+_inherited_connections = []
 
 class LogsDBManager:
     """
     Dedicated db manager for logging operations to prevent circular dependencies.
     """
-    def __init__(self):
+    def __init__(self, backend: Optional[StorageBackend] = None):
         """
         Initialize a database connection for logging and register cleanup on exit
 
         :param self: Instance of LogsDBManager being initialized
+        :param backend: Storage backend to connect with, defaults to the one selected by DB_BACKEND
+            (SQLite logs go to their own file, SQLITE_LOGS_PATH)
+        :type backend: StorageBackend
         """
         self.conn = None
+        self.backend = backend or get_backend(sqlite_path=SQLITE_LOGS_PATH)
         try:
-            self.conn = mysql.connector.connect(
-                host=DB_HOST,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                database=DB_NAME 
-            )
-        except MySQLError as err:
+            self.conn = self.backend.connect()
+        except self.backend.Error as err:
             # Note: Can't log this to the DB, so we print to console
             print(f"❌ LogsDBManager: Connection Error in __init__: {err}", file=sys.stderr)
             self.conn = None
 
-        # Register cleanup on application exit
-        atexit.register(self._close_connection)
+        # Register cleanup on application exit (without keeping this instance alive)
+        register_connection_owner(self)
     
     def _close_connection(self):
         """
@@ -37,22 +39,41 @@ class LogsDBManager:
 
         :param self: Instance of LogsDBManager whose connection will be closed
         """
-        if self.conn and self.conn.is_connected():
+        if self.is_connected():
             self.conn.close()
 
+    def is_connected(self) -> bool:
+        """Whether the logs connection is open and usable."""
+        return self.conn is not None and self.backend.is_connected(self.conn)
+
+    def close(self):
+        """Closes the connection now instead of at exit."""
+        self._close_connection()
+
+    def open_connections(self) -> int:
+        return 1 if self.is_connected() else 0
+
+    def detach_connection(self):
+        """
+        Drops the connection without closing it. Used in a forked child: the socket
+        belongs to the parent, closing it from the child would break the parent's session.
+        """
+        _inherited_connections.append(self.conn)  # keep it referenced so it is never finalized here
+        self.conn = None
+
     def _execute_query(self, query: str, params=None, fetch_one=False):
         """
         A general purpose method to execute a query (SELECT, INSERT, UPDATE, DELETE).
         Uses the instance's persistent connection.
         """
-        if not self.conn or not self.conn.is_connected():
+        if not self.is_connected():
             print("❌ DBManager: Cannot execute query. Connection is closed or invalid.")
             return None
 
         result = None
         try:
-            cursor = self.conn.cursor(dictionary=True) # Use dictionary=True for column name access
-            cursor.execute(query, params or ())
+            cursor = self.backend.cursor(self.conn) # Rows are dictionaries for column name access
+            cursor.execute(self.backend.prepare(query), params or ())
             
             if query.strip().upper().startswith("SELECT"):
                 result = cursor.fetchone() if fetch_one else cursor.fetchall()
@@ -67,7 +88,7 @@ class LogsDBManager:
 
             cursor.close()
         
-        except MySQLError as err:
+        except self.backend.Error as err:
             print(f"❌ DBManager Query Error: {err}")
             self.conn.rollback()
         
@@ -88,7 +109,7 @@ class LogsDBManager:
         :rtype: bool
         """
         result = False
-        if not self.conn or not self.conn.is_connected():
+        if not self.is_connected():
             return False # Cannot log if connection is dead
 
         query = "INSERT INTO logs (level, service, message) VALUES (%s, %s, %s)"
@@ -104,7 +125,7 @@ class LogsDBManager:
             print(f'[{level}.{service}.{message}]')
             result = True
         
-        except MySQLError as err:
+        except self.backend.Error as err:
             print(f"CRITICAL LOG FAILURE: DB Write Error: {err}", file=sys.stderr)
             self.conn.rollback()
         return result
\ No newline at end of file
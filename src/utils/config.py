@@ -1,6 +1,118 @@
 
+import os
+
+# Storage backend: "mysql" (server) or "sqlite" (embedded, single node / tests)
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+
 # IMPORTANT: Replace these with your actual MySQL credentials
 DB_HOST = "localhost"
 DB_USER = "root"  # e.g., "root"
 DB_PASSWORD = "7878"
-DB_NAME = "game_company"
\ No newline at end of file
+DB_NAME = "game_company"
+
+# Read replicas: reads go to a healthy replica (round-robin), writes to the primary above.
+# MySQL replicas are host names with the same credentials; SQLite replicas are file paths (local testing).
+DB_READ_REPLICAS = [host for host in os.getenv("DB_READ_REPLICAS", "").split(",") if host]
+SQLITE_READ_REPLICAS = [path for path in os.getenv("SQLITE_READ_REPLICAS", "").split(",") if path]
+DB_REPLICA_CHECK_INTERVAL = 5.0  # Seconds between health checks of a replica
+DB_REPLICA_MAX_LAG = 10.0  # Replicas further behind the primary (seconds) are skipped
+DB_REPLICA_STICKINESS = 10.0  # Seconds a user's reads stay on the primary after they paid
+
+# Purchase shards: purchases live on one of these databases, picked by a stable hash of
+# user_id (src/data/shards.py); empty keeps them in the main database above. MySQL shards
+# are host names with the same credentials, SQLite shards are file paths (local testing).
+DB_SHARDS = [host for host in os.getenv("DB_SHARDS", "").split(",") if host]
+SQLITE_SHARDS = [path for path in os.getenv("SQLITE_SHARDS", "").split(",") if path]
+# While resharding: the number of shards users were spread over before (0 when not resharding).
+# Writes go to the new shard and reads check both until src/data/shard_migration.py is done.
+DB_SHARDS_PREVIOUS_COUNT = int(os.getenv("DB_SHARDS_PREVIOUS_COUNT", "0"))
+DB_SHARD_MIGRATION_BATCH = 500  # Users moved per batch by the migration tool
+
+# Embedded SQLite files. Logs use their own file so log writes never wait on a data transaction.
+SQLITE_PATH = os.getenv("SQLITE_PATH", "./game_company.sqlite")
+SQLITE_LOGS_PATH = os.getenv("SQLITE_LOGS_PATH", "./game_company_logs.sqlite")
+
+# Game generation
+GAME_HTML_BYTE_BUDGET = 64 * 1024  # Max size of a minified game page; larger games are regenerated
+GAME_GENERATION_MAX_ATTEMPTS = 3
+GAME_DUPLICATE_THRESHOLD = 0.8  # Estimated similarity above which a new game is rejected as a near-duplicate
+# Seconds after which a game still pending in the journal of a running process is considered abandoned
+GAME_STORE_PENDING_TIMEOUT = 3600.0
+
+# Game deployment (git)
+GIT_DEPLOY_REPO = ""  # Path or URL of the repository games are pushed to; empty keeps the mock deployment
+GIT_DEPLOY_BRANCH = "main"
+GIT_DEPLOY_WORKDIR = "./.deploy"  # Local clone used to stage batch commits
+GIT_DEPLOY_BASE_URL = ""  # Public URL the repository is served from (e.g. GitHub Pages)
+GIT_DEPLOY_BATCH_SIZE = 50  # Queued games are deployed automatically once this many are pending
+GIT_DEPLOY_MAX_DELAY = 1800.0  # Seconds the oldest queued game waits for a full batch before the queue is deployed anyway
+
+# LLM provider limits (per process), enforced by src/services/rate_limiter.py
+LLM_TOKENS_PER_MINUTE = 200000
+LLM_REQUESTS_PER_MINUTE = 500
+LLM_MAX_CONCURRENCY = 16  # Upper bound of the adaptive concurrency limit
+LLM_MAX_RETRIES = 5  # Retries of a throttled (429) or transiently failed (5xx, timeout, connection) request
+LLM_COMPLETION_TOKENS = 1500  # Completion tokens assumed for a request until the provider reports its usage
+
+# Shared HTTP connection pool of the LLM clients (src/services/llm_service.py)
+LLM_HTTP_MAX_CONNECTIONS = 64
+LLM_HTTP_MAX_KEEPALIVE = 32  # Idle connections kept open for reuse
+LLM_HTTP_KEEPALIVE_EXPIRY = 90.0  # Seconds an idle connection stays in the pool
+LLM_HTTP_TIMEOUT = 300.0  # Read timeout; a full game page can take minutes to generate
+
+# Payment webhook inbox (src/agents/payment_reconciler.py)
+PAYMENT_WEBHOOK_SECRET = os.getenv("PAYMENT_WEBHOOK_SECRET", "")  # HMAC-SHA256 key of webhook signatures; required
+PAYMENT_INBOX_WORKERS = 2  # Reconciler threads, each with its own DB connection
+PAYMENT_INBOX_BATCH_SIZE = 200  # Events verified and applied per transaction
+PAYMENT_INBOX_POLL_INTERVAL = 0.2  # Seconds an idle reconciler thread waits before polling again
+PAYMENT_INBOX_MAX_ATTEMPTS = 5  # Failed or abandoned batches are retried this many times before events are marked failed
+PAYMENT_INBOX_CLAIM_TIMEOUT = 300  # Seconds after which a claimed but unfinished batch is reclaimed
+PAYMENT_RECONCILER_IN_GATEWAY = True  # Run the reconciler inside one gateway worker per host
+PAYMENT_RECONCILER_LOCK_PATH = "./payment_reconciler.lock"  # Held by the worker that runs it
+
+# Batched marketing content generation
+MARKETING_BATCH_TOKEN_BUDGET = 12000  # Estimated prompt + completion tokens of one multi-game LLM request
+MARKETING_BATCH_MAX_GAMES = 10
+MARKETING_CAMPAIGN_TOKENS = 700  # Estimated completion tokens of one game's campaign (3 platform posts)
+
+# Purchased-games (library) cache
+LIBRARY_CACHE_MAX_ENTRIES = 10000  # Users kept in each worker's in-process LRU
+LIBRARY_CACHE_SHARED_PATH = ""  # SQLite file shared by all workers on the host; empty disables the shared tier
+# Shared tier used when the gateway runs several workers and LIBRARY_CACHE_SHARED_PATH is empty:
+# without it a purchase recorded by one worker would never reach the others' caches
+LIBRARY_CACHE_WORKERS_SHARED_PATH = "./library_cache.sqlite"
+LIBRARY_CACHE_TTL = 300.0  # Seconds a library read from the DB is served from the cache
+
+# Billing gateway (app.py) workers
+GATEWAY_WORKERS = 0  # 0 sizes the worker pool to the CPU cores available to the process
+GATEWAY_GRACEFUL_TIMEOUT = 30  # Seconds a worker keeps draining in-flight requests on shutdown
+
+# Billing gateway admission control (per worker)
+GATEWAY_USER_RATE = 5.0  # Sustained requests per second per user (X-User-ID, or the charge form's user_id)
+GATEWAY_USER_BURST = 20.0
+GATEWAY_RATE_LIMIT_SLOTS = 1 << 18  # Token-bucket slots shared by all users (12 bytes each)
+GATEWAY_MAX_IN_FLIGHT = 64  # Requests running or queued for the DB before new ones get a 503
+GATEWAY_DB_LATENCY_SHED = 0.25  # Smoothed DB call latency (seconds) above which reads start being shed
+
+# Storefront catalogue (src/data/game_catalog.py), kept in memory by every gateway worker
+CATALOG_REFRESH_INTERVAL = 5.0  # Seconds between polls for new games; also the Cache-Control max-age of pages
+CATALOG_REFRESH_OVERLAP = 60  # Seconds of already indexed games re-read per poll, for inserts committed late
+CATALOG_LOAD_BATCH = 1000  # Games read per keyset query
+CATALOG_PAGE_SIZE = 20
+CATALOG_MAX_PAGE_SIZE = 100
+CATALOG_MAX_CACHED_PAGES = 4096  # Rendered pages kept per worker (LRU)
+CATALOG_MAX_QUERY_TERMS = 8
+
+# Long-running orchestrator (GameCreationOrchestrator.run_forever)
+ORCHESTRATOR_INTERVAL = 60.0  # Seconds between pipeline runs
+ORCHESTRATOR_BATCH_SIZE = 1  # Games per run; above 1 uses the batch pipeline (one deploy, one marketing batch)
+ORCHESTRATOR_REPORT_INTERVAL = 600.0  # Seconds between resource reports
+RESOURCE_MONITOR_TOP = 10  # Source lines listed in each allocation growth report
+RESOURCE_MONITOR_FRAMES = 1  # Stack frames tracemalloc keeps per allocation
+
+# "Players also bought" recommendations (src/agents/recommendation_agent.py)
+RECOMMENDATION_TOP_K = 10  # Related games stored per game
+RECOMMENDATION_MAX_USER_GAMES = 500  # Users with more purchases are left out: their pairs grow quadratically
+RECOMMENDATION_BATCH = 10000  # Purchase rows read per keyset query
+RECOMMENDATION_STATE_PATH = "./recommendations_state.npz"  # Co-purchase counts kept between incremental runs
+RELATED_GAMES_REFRESH_INTERVAL = 60.0  # Seconds between checks of each gateway worker for a new job run
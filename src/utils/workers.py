@@ -0,0 +1,64 @@
+# workers.py
+import os
+from typing import IO, Callable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, the (single, development) worker always gets it
+    fcntl = None
+
+from src.utils.config import GATEWAY_WORKERS, LIBRARY_CACHE_SHARED_PATH, LIBRARY_CACHE_WORKERS_SHARED_PATH
+
+# Read by LibraryCache in every worker; set by share_library_cache() before the workers start
+LIBRARY_CACHE_PATH_ENV = "LIBRARY_CACHE_SHARED_PATH"
+
+_worker_init_hooks: List[Callable[[], None]] = []
+
+
+def default_worker_count() -> int:
+    """GATEWAY_WORKERS if set, otherwise one worker per CPU core this process may run on."""
+    if GATEWAY_WORKERS > 0:
+        return GATEWAY_WORKERS
+    try:
+        return max(len(os.sched_getaffinity(0)), 1)
+    except AttributeError:  # not available on Windows/macOS
+        return os.cpu_count() or 1
+
+
+def share_library_cache(workers: int):
+    """
+    Gives several workers one shared library cache tier (LIBRARY_CACHE_WORKERS_SHARED_PATH)
+    unless one is configured, so a purchase in one worker invalidates the others' copies.
+    Call it before the worker processes create their caches.
+    """
+    if workers > 1 and not LIBRARY_CACHE_SHARED_PATH and not os.getenv(LIBRARY_CACHE_PATH_ENV):
+        os.environ[LIBRARY_CACHE_PATH_ENV] = LIBRARY_CACHE_WORKERS_SHARED_PATH
+
+
+def claim_worker_lock(path: str) -> Optional[IO]:
+    """
+    Lets one worker process on the host take a role, e.g. running a background job.
+    Returns the open lock file (keep it open while holding the role) or None when
+    another process holds it. The OS releases the lock when its holder exits, so a
+    worker started to replace it takes over.
+    """
+    handle = open(path, "a")
+    if fcntl is None:
+        return handle
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def on_worker_start(hook: Callable[[], None]) -> Callable[[], None]:
+    """Registers a hook run once in every worker process, after the fork and before serving."""
+    _worker_init_hooks.append(hook)
+    return hook
+
+
+def run_worker_start_hooks():
+    for hook in _worker_init_hooks:
+        hook()
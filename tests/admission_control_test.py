@@ -0,0 +1,99 @@
+import random
+
+from fastapi.testclient import TestClient
+
+import app as gateway
+from src.services.admission_control import AdmissionController, UserRateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    limiter = UserRateLimiter(rate=2.0, burst=3, slots=1024, clock=clock)
+
+    assert [limiter.acquire("user") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("user") == 0.5
+
+    clock.now += 0.5
+    assert limiter.acquire("user") == 0.0
+
+
+def test_light_user_is_not_starved_by_a_colliding_heavy_user():
+    limiter = UserRateLimiter(rate=1.0, burst=2, slots=64, clock=FakeClock())
+    heavy_slots = set(limiter._slots_of("heavy"))
+    # A user sharing exactly one slot with the heavy user
+    light = next(
+        key for key in (f"user-{i}" for i in range(10000))
+        if len(set(limiter._slots_of(key)) & heavy_slots) == 1 and len(set(limiter._slots_of(key))) == 2
+    )
+    while limiter.acquire("heavy") == 0.0:
+        pass
+
+    assert limiter.acquire(light) == 0.0
+
+
+def test_memory_is_bounded_by_slots():
+    limiter = UserRateLimiter(slots=4096)
+    for user in range(100000):
+        limiter.acquire(str(user))
+
+    assert len(limiter._tokens) == len(limiter._refilled) == 4096
+
+
+def test_concurrency_cap_and_latency_shedding():
+    controller = AdmissionController(
+        UserRateLimiter(rate=1000, burst=1000), max_in_flight=2, latency_threshold=0.1, rng=random.Random(1)
+    )
+    assert controller.admit("a") is None
+    assert controller.admit("b") is None
+    assert controller.admit("c") == (503, 1, "Server is busy.")
+    controller.release()
+    controller.release()
+
+    for _ in range(50):
+        controller.observe_latency(1.0)
+    shed = 0
+    for _ in range(100):
+        if controller.admit("reader") is None:
+            controller.release()
+        else:
+            shed += 1
+    assert shed > 80
+    assert controller.admit("payer", is_write=True) is None
+
+
+def test_gateway_rejects_a_polling_client(monkeypatch):
+    monkeypatch.setattr(gateway, "admission", AdmissionController(UserRateLimiter(rate=0.001, burst=3)))
+    with TestClient(gateway.app) as client:
+        statuses = [
+            client.get("/api/v1/access/some-game", headers={"X-User-ID": "poller"}).status_code
+            for _ in range(5)
+        ]
+        other = client.get("/api/v1/access/some-game", headers={"X-User-ID": "someone-else"})
+
+    assert statuses == [200, 200, 200, 429, 429]
+    assert other.status_code == 200
+    assert gateway.admission.in_flight == 0
+
+
+def test_charges_are_limited_per_form_user(monkeypatch):
+    monkeypatch.setattr(gateway, "admission", AdmissionController(UserRateLimiter(rate=0.001, burst=2)))
+    with TestClient(gateway.app) as client:
+        # All clients arrive from the same (proxy) address without an X-User-ID header
+        def charge(user_id):
+            form = {"user_id": user_id, "game_id": "some-game", "payment_token": "tok_test"}
+            return client.post("/api/v1/charge", data=form)
+
+        statuses = [charge("buyer").status_code for _ in range(3)]
+        other = charge("another-buyer")
+
+    assert statuses[2] == 429 and 429 not in statuses[:2]
+    assert other.status_code != 429
+    assert gateway.admission.in_flight == 0
@@ -1,33 +1,59 @@
+import uuid
+
+import pytest
+
 from src.agents.billing_agent import BillingAgent
 
 
-def initiate_payment_test():
-    
-    billing_agent = BillingAgent()
+@pytest.fixture
+def billing_agent():
+    return BillingAgent()
+
+
+@pytest.fixture
+def user_id(billing_agent):
+    email = f"{uuid.uuid4()}@test.com"
+    return billing_agent.db_manager._execute_query(
+        "INSERT INTO users (name, email, password) VALUES (%s, %s, %s)", ("Test User", email, "hashed")
+    )
+
 
-    user_id = '' #Get user_id from db
-    game_id = '' #Get game_id from db
-    result = billing_agent.initiate_payment(user_id=user_id, game_id=game_id)
+@pytest.fixture
+def game_id(billing_agent):
+    game_id = str(uuid.uuid4())
+    billing_agent.db_manager.insert_new_game({
+        "id": game_id,
+        "title": "Test Game",
+        "description": "A game for tests.",
+        "html_code": "<html></html>",
+        "file_url": f"{game_id}/index.html",
+        "deployed_url": f"games/{game_id}/index.html",
+    })
+    return game_id
+
+
+def test_initiate_payment(billing_agent, user_id, game_id):
+    result = billing_agent.initiate_payment(user_id=user_id, game_id=game_id, payment_token="tok_test")
 
     assert result['status'] == "ACCESS_GRANTED" 
 
-def get_access_status_test():
-    
-    billing_agent = BillingAgent()
 
-    user_id = '' #Get user_id from db
-    game_id = '' #Get game_id from db
+def test_get_access_status(billing_agent, user_id, game_id):
+    assert billing_agent.get_access_status(user_id=user_id, game_id=game_id)['status'] == "ACCESS_DENIED"
+
+    billing_agent.initiate_payment(user_id=user_id, game_id=game_id, payment_token="tok_test")
     result = billing_agent.get_access_status(user_id=user_id, game_id=game_id)
 
     assert result['status'] == "ACCESS_GRANTED" 
+    assert result['deployed_url'] == f"games/{game_id}/index.html"
 
-def get_purchased_games_test():
-    
-    billing_agent = BillingAgent()
 
-    user_id = '' #Get user_id from db
+def test_get_purchased_games(billing_agent, user_id, game_id):
+    assert billing_agent.get_purchased_games(user_id=user_id) == []
+
+    billing_agent.initiate_payment(user_id=user_id, game_id=game_id, payment_token="tok_test")
     result = billing_agent.get_purchased_games(user_id=user_id)
 
     assert result is not None
-    assert isinstance(result, dict) 
-
+    assert isinstance(result, list) 
+    assert [game["game_id"] for game in result] == [game_id]
@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# Run the suite on the embedded SQLite backend unless DB_BACKEND is set explicitly
+# (e.g. DB_BACKEND=mysql to run against the server configured in src/utils/config.py).
+# Must happen before src.utils.config is imported.
+_db_dir = tempfile.mkdtemp(prefix="game-platform-tests-")
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", os.path.join(_db_dir, "game_company.sqlite"))
+os.environ.setdefault("SQLITE_LOGS_PATH", os.path.join(_db_dir, "game_company_logs.sqlite"))
+# The payment reconciler refuses to run without a webhook secret
+os.environ.setdefault("PAYMENT_WEBHOOK_SECRET", "whsec_test")
@@ -0,0 +1,126 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as gateway
+from src.data.backends import SQLiteBackend
+from src.data.db_manager import DBManager
+from src.data.game_catalog import GameCatalog, decode_cursor
+
+
+def _insert_game(db, number, title, description, created):
+    game_id = f"00000000-0000-0000-0000-{number:012d}"
+    db._execute_query(
+        "INSERT INTO games (id, title, description, html_code, created) VALUES (%s, %s, %s, %s, %s)",
+        (game_id, title, description, "<html></html>", created),
+    )
+    return game_id
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DBManager(SQLiteBackend(str(tmp_path / "catalog.sqlite")), replicas=[])
+    yield db
+    db.close()
+
+
+def _page(catalog, query="", cursor=None, limit=2):
+    body, etag = catalog.page(query, cursor, limit)
+    return json.loads(body), etag
+
+
+def test_pages_walk_every_game_newest_first(db):
+    ids = [_insert_game(db, n, f"Game {n}", "", f"2024-01-01 00:00:0{n // 2}") for n in range(5)]
+    catalog = GameCatalog(db)
+    catalog.refresh(force=True)
+
+    seen, cursor = [], None
+    while True:
+        page, _ = _page(catalog, cursor=cursor)
+        seen += [game["game_id"] for game in page["games"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ids[::-1]
+
+
+def test_search_matches_every_word(db):
+    space = _insert_game(db, 1, "Space Runner", "Dodge asteroids.", "2024-01-01 00:00:00")
+    _insert_game(db, 2, "Space Farm", "Grow crops.", "2024-01-01 00:00:01")
+    catalog = GameCatalog(db)
+    catalog.refresh(force=True)
+
+    page, _ = _page(catalog, "space ASTEROIDS")
+    assert [game["game_id"] for game in page["games"]] == [space]
+    assert _page(catalog, "space")[0]["games"][0]["title"] == "Space Farm"
+    assert _page(catalog, "missing")[0]["games"] == []
+
+
+def test_refresh_adds_new_and_late_committed_games(db):
+    _insert_game(db, 1, "First", "", "2024-01-01 00:00:10")
+    catalog = GameCatalog(db, overlap=60)
+    catalog.refresh(force=True)
+    _, first_etag = _page(catalog, limit=3)
+
+    _insert_game(db, 2, "Newer", "", "2024-01-01 00:00:20")
+    assert catalog.refresh() == 0  # Not due yet
+    assert catalog.refresh(force=True) == 1
+    # Committed after the newer game was indexed, but stamped before it
+    _insert_game(db, 3, "Late", "", "2024-01-01 00:00:15")
+    assert catalog.refresh(force=True) == 1
+
+    page, etag = _page(catalog, limit=3)
+    assert [game["title"] for game in page["games"]] == ["Newer", "Late", "First"]
+    assert etag != first_etag
+    assert len(catalog) == 3
+
+
+def test_refresh_sees_games_inserted_through_another_connection(db, tmp_path):
+    _insert_game(db, 1, "First", "", "2024-01-01 00:00:10")
+    catalog = GameCatalog(db)
+    catalog.refresh(force=True)
+
+    # The generator's connection; the catalogue's one has already read
+    generator_db = DBManager(SQLiteBackend(str(tmp_path / "catalog.sqlite")), replicas=[])
+    _insert_game(generator_db, 2, "Second", "", "2024-01-01 00:00:20")
+    generator_db.close()
+
+    assert catalog.refresh(force=True) == 1
+    assert _page(catalog)[0]["games"][0]["title"] == "Second"
+
+
+def test_cursor_pages_keep_their_etag_as_games_arrive(db):
+    for n in range(3):
+        _insert_game(db, n, f"Game {n}", "", f"2024-01-01 00:00:0{n}")
+    catalog = GameCatalog(db)
+    catalog.refresh(force=True)
+    first, _ = _page(catalog)
+    _, etag = _page(catalog, cursor=first["next_cursor"])
+
+    _insert_game(db, 9, "Game 9", "", "2024-01-01 00:00:09")
+    catalog.refresh(force=True)
+    assert _page(catalog, cursor=first["next_cursor"])[1] == etag
+
+
+def test_invalid_cursor_is_rejected(db):
+    catalog = GameCatalog(db)
+    catalog.refresh(force=True)
+    with pytest.raises(ValueError):
+        catalog.page(cursor="not a cursor")
+    with pytest.raises(ValueError):
+        decode_cursor("bm8tc2VwYXJhdG9y")
+
+
+def test_catalog_endpoint_revalidates_with_etag(monkeypatch):
+    monkeypatch.setattr(gateway, "PAYMENT_RECONCILER_IN_GATEWAY", False)
+    with TestClient(gateway.app) as client:
+        response = client.get("/api/v1/games", params={"limit": 5})
+        assert response.status_code == 200
+        assert "games" in response.json()
+
+        etag = response.headers["ETag"]
+        response = client.get("/api/v1/games", params={"limit": 5}, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        assert client.get("/api/v1/games", params={"cursor": "%%%"}).status_code == 400
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from src.tools.game_fingerprint import GameFingerprint, GameFingerprintIndex, infer_category
+
+GAMES_DIR = Path(__file__).resolve().parent.parent / "server" / "games"
+
+
+def _load_games():
+    return {path.parent.name: path.read_text(encoding="utf-8") for path in sorted(GAMES_DIR.glob("*/index.html"))}
+
+
+def test_near_duplicate_is_detected():
+    games = _load_games()
+    index = GameFingerprintIndex(threshold=0.8)
+    index.load((game_id, GameFingerprint.from_game("game", html), None) for game_id, html in games.items())
+
+    game_id, html = next(iter(games.items()))
+    tweaked = html.replace("40px", "42px").replace("#ddd", "#ccc")
+    duplicate = index.find_duplicate(GameFingerprint.from_game("game", tweaked))
+
+    assert duplicate is not None
+    assert duplicate[0] == game_id
+
+
+def test_distinct_games_are_not_duplicates():
+    games = list(_load_games().values())
+    index = GameFingerprintIndex(threshold=0.8)
+    index.add("first", GameFingerprint.from_game("game", games[0]))
+
+    assert index.find_duplicate(GameFingerprint.from_game("game", games[1])) is None
+
+
+def test_signature_round_trips_through_bytes():
+    fingerprint = GameFingerprint.from_game("Snake", "<html><body>snake</body></html>")
+
+    assert GameFingerprint.from_bytes(fingerprint.to_bytes()).similarity(fingerprint) == 1.0
+
+
+def test_pick_category_prefers_under_represented():
+    index = GameFingerprintIndex()
+    index.load(
+        (f"snake-{n}", GameFingerprint.from_game("Snake", f"<p>{n}</p>"), "Snake") for n in range(500)
+    )
+
+    picks = [index.pick_category(["Snake", "Hangman"]) for _ in range(200)]
+
+    assert picks.count("Hangman") > picks.count("Snake")
+    assert index.pick_category(["Snake", "Hangman"], exclude=["Hangman"]) == "Snake"
+
+
+def test_infer_category_from_title_then_description():
+    categories = ["Snake", "Space Shooter (Top-Down)", "Breakout/Arkanoid", "Memory Card Match", "Flappy Bird Clone"]
+
+    assert infer_category(categories, "Neon Arkanoid", "Break every brick") == "Breakout/Arkanoid"
+    assert infer_category(categories, "Flappy Bird", "") == "Flappy Bird Clone"
+    assert infer_category(categories, "Galaxy Run", "A retro space shooter with a snake boss") == "Space Shooter (Top-Down)"
+    assert infer_category(categories, "Snakes and Ladders", "A board game") is None
@@ -0,0 +1,112 @@
+from contextlib import contextmanager
+
+import pytest
+
+from src.data.game_store import GameStore
+
+
+class InMemoryGames:
+    """Minimal stand-in for the DBManager calls GameStore makes."""
+
+    def __init__(self, fail_insert=False):
+        self.rows = {}
+        self.fail_insert = fail_insert
+
+    @contextmanager
+    def transaction(self):
+        snapshot = dict(self.rows)
+        try:
+            yield self
+        except Exception:
+            self.rows = snapshot
+            raise
+
+    def insert_new_game(self, data):
+        if self.fail_insert:
+            raise RuntimeError("insert failed")
+        self.rows[data["id"]] = data
+        return True
+
+    def get_existing_game_ids(self, game_ids):
+        return {game_id for game_id in game_ids if game_id in self.rows}
+
+    def get_game_files(self):
+        return [{"id": game_id, "file_url": row["file_url"]} for game_id, row in self.rows.items()]
+
+
+def _record(game_id):
+    return {"id": game_id, "title": "t", "file_url": f"{game_id}/index.html"}
+
+
+def test_persist_writes_file_and_row(tmp_path):
+    db = InMemoryGames()
+    store = GameStore(db, tmp_path / "games")
+
+    path = store.persist("g1", "<html></html>", _record("g1"))
+
+    assert path.read_text() == "<html></html>"
+    assert "g1" in db.rows
+    assert store.check_consistency() == {"missing_files": [], "orphan_dirs": []}
+
+
+def test_failed_insert_removes_file(tmp_path):
+    db = InMemoryGames(fail_insert=True)
+    store = GameStore(db, tmp_path / "games")
+
+    with pytest.raises(RuntimeError):
+        store.persist("g1", "<html></html>", _record("g1"))
+
+    assert not (tmp_path / "games" / "g1").exists()
+
+
+def _crashed_store(db, tmp_path, pid):
+    """A store whose journal looks like the one of process `pid`."""
+    store = GameStore(db, tmp_path / "games")
+    store.journal_path = store.journal_dir / f"{pid}-deadbeef.journal"
+    return store
+
+
+def test_reconcile_resolves_pending_games_of_dead_processes(tmp_path, monkeypatch):
+    db = InMemoryGames()
+    crashed = _crashed_store(db, tmp_path, 999999)
+    # Crash after the DB commit: file and row exist, journal still says pending.
+    crashed._journal("kept", "pending")
+    crashed._write_atomic(crashed.game_path("kept"), "<html></html>")
+    db.rows["kept"] = _record("kept")
+    # Crash before the DB insert: only the file exists.
+    crashed._journal("lost", "pending")
+    crashed._write_atomic(crashed.game_path("lost"), "<html></html>")
+    monkeypatch.setattr("src.data.game_store._process_alive", lambda pid: pid != 999999)
+
+    report = GameStore(db, tmp_path / "games").reconcile()
+
+    assert report == {"recovered": ["kept"], "removed": ["lost"]}
+    assert crashed.game_path("kept").exists()
+    assert not (tmp_path / "games" / "lost").exists()
+    assert not crashed.journal_path.exists()
+
+
+def test_reconcile_leaves_running_processes_alone(tmp_path, monkeypatch):
+    db = InMemoryGames()
+    running = GameStore(db, tmp_path / "games", pending_timeout=60)
+    running._journal("in-flight", "pending")
+    running._write_atomic(running.game_path("in-flight"), "<html></html>")
+
+    other = GameStore(db, tmp_path / "games", pending_timeout=60)
+    assert other.reconcile() == {"recovered": [], "removed": []}
+    assert running.game_path("in-flight").exists()
+
+    # Abandoned for longer than the timeout: reclaimed once, and marked resolved in the journal
+    monkeypatch.setattr("src.data.game_store.time.time", lambda: 1e12)
+    assert other.reconcile() == {"recovered": [], "removed": ["in-flight"]}
+    assert other.reconcile() == {"recovered": [], "removed": []}
+    assert running.journal_path.exists()
+
+
+def test_check_consistency_reports_both_sides(tmp_path):
+    db = InMemoryGames()
+    store = GameStore(db, tmp_path / "games")
+    db.rows["no-file"] = _record("no-file")
+    store._write_atomic(store.game_path("no-row"), "<html></html>")
+
+    assert store.check_consistency() == {"missing_files": ["no-file"], "orphan_dirs": ["no-row"]}
@@ -0,0 +1,127 @@
+import subprocess
+from types import SimpleNamespace
+
+from src.agents.game_generator import GameGeneratorAgent
+from src.data.backends import SQLiteBackend
+from src.data.db_manager import DBManager
+from src.orchestrator.scheduler import GameCreationOrchestrator
+from src.services.git_handler import GitHandler
+from src.tools.logger import logger
+
+
+def _bare_repo(tmp_path):
+    remote = tmp_path / "remote.git"
+    subprocess.run(["git", "init", "--quiet", "--bare", str(remote)], check=True)
+    return remote
+
+
+def _commit_count(remote, branch="main"):
+    result = subprocess.run(
+        ["git", "--git-dir", str(remote), "rev-list", "--count", branch],
+        capture_output=True, text=True, check=True,
+    )
+    return int(result.stdout)
+
+
+def _game_file(tmp_path, game_id):
+    path = tmp_path / "games" / game_id / "index.html"
+    path.parent.mkdir(parents=True)
+    path.write_text(f"<html>{game_id}</html>")
+    return path
+
+
+def test_queued_games_are_deployed_in_one_commit(tmp_path):
+    remote = _bare_repo(tmp_path)
+    handler = GitHandler(str(remote), "main", str(tmp_path / "work"), "https://games.example.com/")
+
+    for game_id in ("g1", "g2", "g3"):
+        handler.queue_game(game_id, _game_file(tmp_path, game_id))
+    deployed = handler.deploy_queued()
+
+    assert deployed == {
+        game_id: f"https://games.example.com/games/{game_id}/index.html" for game_id in ("g1", "g2", "g3")
+    }
+    assert _commit_count(remote) == 1
+    assert handler.pending() == 0
+
+
+def test_later_batches_build_on_the_remote_branch(tmp_path):
+    remote = _bare_repo(tmp_path)
+    handler = GitHandler(str(remote), "main", str(tmp_path / "work"), "")
+
+    handler.queue_game("g1", _game_file(tmp_path, "g1"))
+    handler.deploy_queued()
+    url = handler.push_file_to_repo("g2", _game_file(tmp_path, "g2"))
+
+    assert url == "games/g2/index.html"
+    assert _commit_count(remote) == 2
+
+
+def test_mock_deployment_without_repository(tmp_path):
+    handler = GitHandler("", "main", str(tmp_path / "work"), "")
+    handler.queue_game("g1", _game_file(tmp_path, "g1"))
+
+    assert handler.deploy_queued() == {"g1": "g1/index.html"}
+
+
+def test_games_left_undeployed_are_queued_again(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.agents.game_generator.OUTPUT_DIR", tmp_path / "games")
+    db = DBManager(SQLiteBackend(str(tmp_path / "games.sqlite")), replicas=[])
+    for game_id, deployed_url in (("g1", "g1/index.html"), ("g2", "games/g2/index.html")):
+        _game_file(tmp_path, game_id)
+        db.insert_new_game({
+            "id": game_id, "title": game_id, "description": "", "html_code": "<html></html>",
+            "file_url": f"{game_id}/index.html", "deployed_url": deployed_url,
+        })
+    agent = SimpleNamespace(
+        db_manager=db, logger=logger, git_handler=GitHandler(str(_bare_repo(tmp_path)), "main", str(tmp_path / "work"), ""),
+    )
+
+    GameGeneratorAgent._queue_undeployed_games(agent)
+
+    assert agent.git_handler.deploy_queued() == {"g1": "games/g1/index.html"}
+    db.close()
+
+
+def test_single_game_runs_share_a_deployment(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.agents.game_generator.GIT_DEPLOY_BATCH_SIZE", 3)
+    remote = _bare_repo(tmp_path)
+    db = DBManager(SQLiteBackend(str(tmp_path / "games.sqlite")), replicas=[])
+
+    class QueueingGenerator:
+        """GameGeneratorAgent's deployment, with games generated without the LLM."""
+        deploy_if_due = GameGeneratorAgent.deploy_if_due
+        deploy_pending_games = GameGeneratorAgent.deploy_pending_games
+        pending_deployments = GameGeneratorAgent.pending_deployments
+
+        def __init__(self):
+            self.db_manager, self.logger, self.generated = db, logger, 0
+            self.git_handler = GitHandler(str(remote), "main", str(tmp_path / "work"), "")
+
+        def generate_game(self):
+            self.generated += 1
+            game_id = f"g{self.generated}"
+            db.insert_new_game({
+                "id": game_id, "title": game_id, "description": "", "html_code": "<html></html>",
+                "file_url": f"{game_id}/index.html", "deployed_url": f"{game_id}/index.html",
+            })
+            self.git_handler.queue_game(game_id, _game_file(tmp_path, game_id))
+            return game_id
+
+    campaigns = []
+    marketing = SimpleNamespace(run_campaign=lambda game_id: campaigns.append([game_id]), run_batch_campaign=campaigns.append)
+    orchestrator = GameCreationOrchestrator(QueueingGenerator(), marketing, db)
+
+    for _ in range(2):
+        assert orchestrator.run_pipeline()["status"] == "SUCCESS"
+    assert orchestrator.game_generator.pending_deployments() == 2
+    assert campaigns == []  # Not deployed yet, the posts would link a local path
+
+    orchestrator.run_pipeline()
+    assert _commit_count(remote) == 1
+    assert campaigns == [["g1", "g2", "g3"]]
+
+    orchestrator.run_pipeline()
+    orchestrator.close()  # Deploys the partial batch and runs its campaign
+    assert _commit_count(remote) == 2
+    assert campaigns[-1] == ["g4"]
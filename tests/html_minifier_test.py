@@ -0,0 +1,56 @@
+from src.tools.html_minifier import byte_size, minify_css, minify_html, minify_js
+
+
+def test_minify_html_strips_comments_and_whitespace():
+    html = (
+        "<!DOCTYPE html>\n<html>\n  <!-- generated -->\n  <body>\n"
+        "    <h1>Snake</h1>\n    <pre>  keep   this  </pre>\n  </body>\n</html>\n"
+    )
+    result = minify_html(html)
+
+    assert "generated" not in result
+    assert "<pre>  keep   this  </pre>" in result
+    assert byte_size(result) < byte_size(html)
+
+
+def test_minify_css_keeps_strings_and_value_spaces():
+    css = "body {\n  margin: 0 auto; /* center */\n  font-family: 'Comic  Sans';\n}\n"
+
+    assert minify_css(css) == "body{margin:0 auto;font-family:'Comic  Sans'}"
+
+
+def test_minify_js_keeps_literals_and_line_breaks():
+    js = (
+        "// setup\n"
+        "let a = 1 + +b; /* note */\n"
+        "const re = /a\\/b[/]/g;\n"
+        "const s = 'x // not a comment';\n"
+        "return\n"
+        "value\n"
+    )
+    result = minify_js(js)
+
+    assert "setup" not in result and "note" not in result
+    assert "a=1+ +b;" in result
+    assert "/a\\/b[/]/g" in result
+    assert "'x // not a comment'" in result
+    # A line break after `return` is significant (automatic semicolon insertion).
+    assert "return\nvalue" in result
+
+
+def test_minify_html_skips_non_javascript_scripts():
+    html = '<script type="application/json">{ "a" :  1 }</script><script> var  x = 1; </script>'
+
+    assert minify_html(html) == '<script type="application/json">{ "a" :  1 }</script><script>var x=1;</script>'
+
+
+def test_minify_css_drops_last_semicolon_outside_strings_only():
+    css = "a::after { content: ' ;} '; color: red; }"
+
+    assert minify_css(css) == "a::after{content:' ;} ';color:red}"
+
+
+def test_minify_html_keeps_attribute_values():
+    html = '<input  value="two  spaces"\n  data-note=\'a > b\'>  text   here  '
+
+    assert minify_html(html) == '<input value="two  spaces"\ndata-note=\'a > b\'> text here'
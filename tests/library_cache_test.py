@@ -0,0 +1,94 @@
+from src.data.library_cache import LibraryCache
+from src.utils.workers import LIBRARY_CACHE_PATH_ENV, share_library_cache
+
+GAME = {"game_id": "g1", "deployed_url": "games/g1/index.html"}
+NEW_GAME = {"game_id": "g2", "deployed_url": "games/g2/index.html"}
+
+
+def test_local_tier_fill_and_write_through():
+    cache = LibraryCache(max_entries=10, shared_path="")
+
+    games, version = cache.get("1")
+    assert games is None
+    cache.fill("1", [GAME], version)
+    cache.add_purchase("1", NEW_GAME)
+
+    assert cache.get("1")[0] == [GAME, NEW_GAME]
+
+
+def test_local_tier_is_bounded():
+    cache = LibraryCache(max_entries=2, shared_path="")
+    for user_id in ("1", "2", "3"):
+        cache.fill(user_id, [GAME], 0)
+
+    assert cache.get("1")[0] is None
+    assert cache.get("3")[0] == [GAME]
+
+
+def test_shared_tier_propagates_purchases_between_workers(tmp_path):
+    shared_path = str(tmp_path / "library.sqlite")
+    worker_a = LibraryCache(shared_path=shared_path)
+    worker_b = LibraryCache(shared_path=shared_path)
+
+    worker_a.fill("1", [GAME], worker_a.get("1")[1])
+    assert worker_b.get("1")[0] == [GAME]
+
+    worker_a.add_purchase("1", NEW_GAME)
+
+    # worker_b's LRU copy is stale (older version) and is replaced from the shared tier
+    assert worker_b.get("1")[0] == [GAME, NEW_GAME]
+
+
+def test_fill_racing_a_purchase_is_dropped(tmp_path):
+    shared_path = str(tmp_path / "library.sqlite")
+    worker_a = LibraryCache(shared_path=shared_path)
+    worker_b = LibraryCache(shared_path=shared_path)
+
+    _, version = worker_b.get("1")  # worker_b misses and starts reading the DB...
+    worker_a.add_purchase("1", NEW_GAME)  # ...while worker_a records a purchase
+    worker_b.fill("1", [GAME], version)  # the DB read may predate the purchase
+
+    assert worker_b.get("1")[0] is None
+    assert worker_a.get("1")[0] is None
+
+
+def test_local_fill_racing_a_purchase_is_dropped():
+    cache = LibraryCache(shared_path="")
+
+    _, version = cache.get("1")  # A miss starts reading the DB...
+    cache.add_purchase("1", NEW_GAME)  # ...while the reconciler records a purchase
+    cache.fill("1", [GAME], version)  # the DB read may predate the purchase
+
+    assert cache.get("1")[0] is None
+    _, version = cache.get("1")
+    cache.fill("1", [GAME, NEW_GAME], version)
+    assert cache.get("1")[0] == [GAME, NEW_GAME]
+
+
+def test_entries_expire(tmp_path):
+    now = [0.0]
+    for shared_path in ("", str(tmp_path / "library.sqlite")):
+        cache = LibraryCache(shared_path=shared_path, ttl=60, clock=lambda: now[0])
+        cache.fill("1", [GAME], cache.get("1")[1])
+        cache.add_purchase("1", NEW_GAME)
+        assert cache.get("1")[0] == [GAME, NEW_GAME]
+
+        now[0] += 61
+        assert cache.get("1")[0] is None
+        now[0] = 0.0
+
+
+def test_several_workers_get_a_shared_tier(tmp_path, monkeypatch):
+    shared_path = str(tmp_path / "library.sqlite")
+    monkeypatch.delenv(LIBRARY_CACHE_PATH_ENV, raising=False)
+    monkeypatch.setattr("src.utils.workers.LIBRARY_CACHE_WORKERS_SHARED_PATH", shared_path)
+
+    share_library_cache(1)
+    assert LibraryCache()._shared is None
+
+    share_library_cache(4)
+    worker_a, worker_b = LibraryCache(), LibraryCache()
+    worker_a.fill("1", [GAME], worker_a.get("1")[1])
+    worker_b.get("1")
+    worker_a.add_purchase("1", NEW_GAME)
+    assert worker_b.get("1")[0] == [GAME, NEW_GAME]
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+from src.services import llm_service
+from src.services.llm_service import LLMService
+from src.services.rate_limiter import AdaptiveLimiter, RateLimitedChatModel
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    yield
+    llm_service.close_llm_clients()
+
+
+def test_clients_are_shared_per_model_and_temperature():
+    first = LLMService().get_client()
+    second = LLMService().get_client(completion_tokens=100)
+    other = LLMService(temperature=0.9).get_client()
+
+    assert first.client is second.client
+    assert other.client is not first.client
+    assert first.client.http_client is llm_service.get_http_client()
+    assert other.client.http_client is llm_service.get_http_client()
+
+
+def test_fork_reset_drops_shared_connections():
+    client = LLMService().get_client().client
+    llm_service._reset_after_fork()
+
+    assert LLMService().get_client().client is not client
+
+
+class Answer(BaseModel):
+    text: str
+
+
+class FakeChatModel:
+    def with_structured_output(self, schema, include_raw=False):
+        async def answer(prompt_value):
+            raw = AIMessage(content="", usage_metadata={"input_tokens": 7, "output_tokens": 5, "total_tokens": 12})
+            return {"raw": raw, "parsed": schema(text="hello"), "parsing_error": None}
+        return RunnableLambda(lambda prompt_value: None, afunc=answer)
+
+
+def test_async_calls_go_through_the_limiter():
+    limiter = AdaptiveLimiter(tokens_per_minute=10**6, requests_per_minute=100)
+    client = RateLimitedChatModel(FakeChatModel(), limiter, completion_tokens=50)
+
+    answer = asyncio.run(client.with_structured_output(Answer).ainvoke("Say hello"))
+
+    assert answer.text == "hello"
+    assert limiter._window_tokens == 12  # estimate replaced by the reported usage
+
+
+def test_worker_does_not_reuse_inherited_clients(monkeypatch):
+    # As seen by a worker forked without running the at-fork hooks
+    client = LLMService().get_client()
+    monkeypatch.setattr(llm_service.os, "getpid", lambda: -1)
+
+    forked = LLMService().get_client()
+    assert forked.client is not client.client
+    assert forked.client.http_client is not client.client.http_client
+    assert forked.limiter is not client.limiter
@@ -0,0 +1,103 @@
+import json
+import re
+import uuid
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.agents.marketing_agent import MarketingAgent
+from src.schemas.marketing_schemas import MarketingBatchSchema, MarketingCampaignSchema
+from src.utils.config import MARKETING_CAMPAIGN_TOKENS
+
+
+def _campaign(title):
+    post = {"headline": title, "body": "Play now", "hashtags": "#game", "call_to_action": "Click!"}
+    return {"twitter_x": post, "reddit": post, "linkedin": post}
+
+
+class FakeLLMClient:
+    """Answers batch requests with raw JSON where the first game's entry is malformed."""
+
+    def __init__(self):
+        self.batch_calls = 0
+        self.single_calls = 0
+
+    def with_structured_output(self, schema, include_raw=False):
+        def answer(prompt_value):
+            text = prompt_value.to_string()
+            if schema is MarketingBatchSchema:
+                self.batch_calls += 1
+                game_ids = re.findall(r"GAME ID: (\S+)", text)
+                entries = [{"game_id": game_ids[0], "campaign": {"twitter_x": {}}}]
+                entries += [{"game_id": game_id, "campaign": _campaign(game_id)} for game_id in game_ids[1:]]
+                return {"raw": AIMessage(content=json.dumps({"campaigns": entries})), "parsed": None}
+            assert schema is MarketingCampaignSchema
+            self.single_calls += 1
+            return MarketingCampaignSchema.model_validate(_campaign("single"))
+        return RunnableLambda(answer)
+
+
+class FakeLLMService:
+    def __init__(self):
+        self.client = FakeLLMClient()
+        self.completion_tokens = []
+
+    def get_client(self, **kwargs):
+        self.completion_tokens.append(kwargs["completion_tokens"])
+        return self.client
+
+
+@pytest.fixture
+def agent():
+    return MarketingAgent(FakeLLMService())
+
+
+@pytest.fixture
+def game_ids(agent):
+    game_ids = [str(uuid.uuid4()) for _ in range(5)]
+    for game_id in game_ids:
+        agent.db_manager.insert_new_game({
+            "id": game_id,
+            "title": "Test Game",
+            "description": "A game for tests.",
+            "html_code": "<html></html>",
+            "file_url": f"{game_id}/index.html",
+            "deployed_url": f"games/{game_id}/index.html",
+        })
+    return game_ids
+
+
+def _saved_posts(agent, game_id):
+    return agent.db_manager._execute_query(
+        "SELECT platform, payload_json FROM marketing_post WHERE game_id = %s ORDER BY platform", (game_id,)
+    )
+
+
+def test_batch_campaign_falls_back_for_invalid_entries(agent, game_ids, monkeypatch):
+    monkeypatch.setattr("src.agents.marketing_agent.MARKETING_BATCH_MAX_GAMES", 3)
+    result = agent.run_batch_campaign(game_ids + ["missing-game"])
+
+    client = agent.llm_client
+    assert client.batch_calls == 2  # chunks of 3 and 2 games
+    assert agent.llm_service.completion_tokens[1:] == [3 * MARKETING_CAMPAIGN_TOKENS, 2 * MARKETING_CAMPAIGN_TOKENS]
+    assert client.single_calls == 2  # the malformed first entry of each chunk
+    assert result["status"] == "PARTIAL"
+    assert all(result["campaigns"][game_id]["status"] == "COMPLETED" for game_id in game_ids)
+    assert result["campaigns"]["missing-game"]["status"] == "FAILED"
+
+    posts = _saved_posts(agent, game_ids[1])
+    assert [post["platform"] for post in posts] == ["linkedin", "reddit", "twitter"]
+    assert json.loads(posts[0]["payload_json"])["headline"] == game_ids[1]
+    assert agent.db_manager.get_game_rollup(game_ids[1])["marketing_posts"] == 3
+
+
+def test_chunks_respect_token_budget(agent, monkeypatch):
+    monkeypatch.setattr("src.agents.marketing_agent.MARKETING_BATCH_TOKEN_BUDGET", 2000)
+    monkeypatch.setattr("src.agents.marketing_agent.MARKETING_CAMPAIGN_TOKENS", 500)
+    games = [{"id": str(i), "title": "T", "description": "D"} for i in range(7)]
+
+    chunks = agent._chunk_games(games)
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert [game["id"] for chunk in chunks for game in chunk] == [str(i) for i in range(7)]
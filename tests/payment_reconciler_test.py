@@ -0,0 +1,139 @@
+import json
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as gateway
+from src.agents.payment_reconciler import PaymentReconciler
+from src.data.db_manager import DBManager
+from src.data.library_cache import LibraryCache
+from src.services.stripe_service import StripeService
+from src.utils.workers import claim_worker_lock
+
+
+@pytest.fixture
+def db_manager():
+    return DBManager()
+
+
+@pytest.fixture
+def user_id(db_manager):
+    return db_manager._execute_query(
+        "INSERT INTO users (name, email, password) VALUES (%s, %s, %s)", ("Test User", f"{uuid.uuid4()}@test.com", "x")
+    )
+
+
+@pytest.fixture
+def game_id(db_manager):
+    game_id = str(uuid.uuid4())
+    db_manager.insert_new_game({
+        "id": game_id,
+        "title": "Test Game",
+        "description": "A game for tests.",
+        "html_code": "<html></html>",
+        "file_url": f"{game_id}/index.html",
+        "deployed_url": f"games/{game_id}/index.html",
+    })
+    return game_id
+
+
+def _event(user_id, game_id, event_type="payment.succeeded"):
+    event_id = f"evt_{uuid.uuid4().hex}"
+    payload = json.dumps({"id": event_id, "type": event_type, "data": {"user_id": user_id, "game_id": game_id}})
+    return event_id, payload, StripeService().sign_webhook_payload(payload.encode("utf-8"))
+
+
+def test_batch_is_verified_deduplicated_and_applied(db_manager, user_id, game_id):
+    first = _event(user_id, game_id)
+    second_purchase = _event(user_id, game_id)
+    forged = _event(user_id, game_id)
+    for event in (first, first, second_purchase):  # `first` is delivered twice
+        db_manager.enqueue_payment_event(*event)
+    db_manager.enqueue_payment_event(forged[0], forged[1], "bad-signature")
+
+    cache = LibraryCache(shared_path="")
+    cache.fill(str(user_id), [], 0)
+    processed = PaymentReconciler(batch_size=2, library_cache=cache).drain(db_manager)
+
+    assert processed == 3
+    statuses = [db_manager.get_payment_event_status(event[0])["status"] for event in (first, second_purchase, forged)]
+    assert statuses == ["applied", "duplicate", "rejected"]
+    assert db_manager.get_purchased_games(user_id) == [{"game_id": game_id, "deployed_url": f"games/{game_id}/index.html"}]
+    assert db_manager.get_game_rollup(game_id)["purchases"] == 1
+    assert cache.get(str(user_id))[0] == [{"game_id": game_id, "deployed_url": f"games/{game_id}/index.html"}]
+
+
+def test_failed_batch_is_retried(db_manager, user_id, game_id, monkeypatch):
+    event = _event(user_id, game_id)
+    db_manager.enqueue_payment_event(*event)
+    reconciler = PaymentReconciler(library_cache=LibraryCache(shared_path=""))
+
+    def broken(outcomes, purchases):
+        raise RuntimeError("DB down")
+    monkeypatch.setattr(db_manager, "complete_payment_events", broken)
+    reconciler.process_batch(db_manager)
+    assert db_manager.get_payment_event_status(event[0])["status"] == "pending"
+
+    monkeypatch.undo()
+    reconciler.drain(db_manager)
+    assert db_manager.get_payment_event_status(event[0])["status"] == "applied"
+
+
+def test_webhook_is_acknowledged_before_it_is_applied(user_id, game_id, monkeypatch):
+    monkeypatch.setattr(gateway, "PAYMENT_RECONCILER_IN_GATEWAY", False)
+    event_id, payload, signature = _event(user_id, game_id)
+    with TestClient(gateway.app) as client:
+        response = client.post("/api/v1/webhooks/payments", content=payload, headers={"X-Webhook-Signature": signature})
+        assert response.status_code == 202
+        assert client.get(f"/api/v1/webhooks/payments/{event_id}").json()["status"] == "pending"
+
+        PaymentReconciler(library_cache=gateway.billing_agent.library_cache).drain()
+        assert client.get(f"/api/v1/webhooks/payments/{event_id}").json()["status"] == "applied"
+        access = client.get(f"/api/v1/access/{game_id}", headers={"X-User-ID": str(user_id)}).json()
+        assert access["status"] == "ACCESS_GRANTED"
+
+        assert client.post("/api/v1/webhooks/payments", content="not json").status_code == 400
+
+
+def test_stale_claims_count_as_attempts(db_manager, user_id, game_id):
+    event = _event(user_id, game_id)
+    db_manager.enqueue_payment_event(*event)
+    for _ in range(3):
+        # A worker claims the event and crashes before finishing the batch
+        assert db_manager.claim_payment_events(uuid.uuid4().hex, 1000)
+        db_manager.release_stale_payment_claims(-1, max_attempts=3)
+    assert db_manager.get_payment_event_status(event[0])["status"] == "failed"
+
+
+def test_webhooks_fail_closed_without_a_secret(user_id, game_id):
+    payload = _event(user_id, game_id)[1].encode("utf-8")
+    unsigned = StripeService(webhook_secret="")
+    assert not unsigned.verify_webhook_signature(payload, StripeService(webhook_secret="x").sign_webhook_payload(payload))
+    with pytest.raises(ValueError):
+        unsigned.sign_webhook_payload(payload)
+    with pytest.raises(ValueError):
+        PaymentReconciler(payment_service=unsigned, library_cache=LibraryCache(shared_path=""))
+
+
+def test_one_worker_holds_the_reconciler_lock(tmp_path):
+    path = str(tmp_path / "reconciler.lock")
+    holder = claim_worker_lock(path)
+    assert holder is not None
+    assert claim_worker_lock(path) is None
+    holder.close()
+    claim_worker_lock(path).close()
+
+
+def test_long_lived_connection_sees_purchases_applied_elsewhere(db_manager, user_id, game_id):
+    # The gateway's connection has already read, as it has after serving any request
+    assert not db_manager.check_payment_status(user_id, game_id)
+    assert db_manager.get_purchased_games(user_id) == []
+
+    db_manager.enqueue_payment_event(*_event(user_id, game_id))
+    reconciler_db = DBManager()  # The reconciler thread's own connection
+    PaymentReconciler(library_cache=LibraryCache(shared_path="")).drain(reconciler_db)
+    reconciler_db.close()
+
+    assert db_manager.check_payment_status(user_id, game_id)
+    assert [game["game_id"] for game in db_manager.get_purchased_games(user_id)] == [game_id]
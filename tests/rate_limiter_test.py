@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.services import rate_limiter
+from src.services.llm_simulator import SimulatedLLMProvider, SimulatedRateLimitError
+from src.services.rate_limiter import LANE_BULK, LANE_INTERACTIVE, AdaptiveLimiter
+
+
+def _wait_for_queue(limiter, size):
+    while len(limiter._queue) < size:
+        time.sleep(0.001)
+
+
+def test_interactive_lane_is_admitted_before_bulk():
+    limiter = AdaptiveLimiter(tokens_per_minute=10**6, requests_per_minute=1000, max_concurrency=1)
+    ticket = limiter.acquire(10)
+    order = []
+
+    def request(lane, name):
+        limiter.release(limiter.acquire(10, lane))
+        order.append(name)
+
+    bulk = threading.Thread(target=request, args=(LANE_BULK, "bulk"))
+    bulk.start()
+    _wait_for_queue(limiter, 1)
+    interactive = threading.Thread(target=request, args=(LANE_INTERACTIVE, "interactive"))
+    interactive.start()
+    _wait_for_queue(limiter, 2)
+
+    limiter.release(ticket)
+    bulk.join()
+    interactive.join()
+    assert order == ["interactive", "bulk"]
+
+
+def test_concurrency_limit_is_aimd():
+    limiter = AdaptiveLimiter(tokens_per_minute=10**6, requests_per_minute=1000, max_concurrency=8)
+    first, second = limiter.acquire(10), limiter.acquire(10)
+
+    limiter.release(first, throttled=True, retry_after=0.0)
+    limiter.release(second, throttled=True, retry_after=0.0)
+    assert limiter.limit == 4  # both saw the same congestion, halved once
+
+    for _ in range(8):
+        limiter.release(limiter.acquire(10))
+    assert limiter.limit == 5
+
+
+def test_throughput_stays_near_quota_without_errors():
+    window, duration = 1.0, 2.5
+    provider = SimulatedLLMProvider(tokens_per_minute=2000, requests_per_minute=20, latency=0.02, window=window)
+    # Configured a little under the provider quota, as in production
+    limiter = AdaptiveLimiter(tokens_per_minute=1800, requests_per_minute=18, max_concurrency=8, window=window)
+    deadline = time.monotonic() + duration
+    errors = []
+
+    def client():
+        while time.monotonic() < deadline:
+            try:
+                limiter.call(lambda: (None, provider.complete(50)), tokens=50)
+            except SimulatedRateLimitError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=client) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert provider.rejected <= 2
+    # 18 requests per window over 2.5 windows (plus the request started just before the deadline)
+    assert provider.completed >= 45
+
+
+def test_cancelled_acall_releases_its_slot():
+    limiter = AdaptiveLimiter(tokens_per_minute=10**6, requests_per_minute=1000, max_concurrency=1)
+
+    async def scenario():
+        ticket = limiter.acquire(10)
+        waiting = asyncio.ensure_future(limiter.acall(lambda: asyncio.sleep(0, (None, 10)), tokens=10))
+        while not limiter._queue:
+            await asyncio.sleep(0.001)
+        waiting.cancel()
+        limiter.release(ticket)
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        while limiter._queue or limiter._in_flight:
+            await asyncio.sleep(0.001)
+        # The slot is free again for the next caller
+        return await asyncio.wait_for(limiter.acall(lambda: asyncio.sleep(0, ("ok", 10)), tokens=10), timeout=2)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert limiter._in_flight == 0
+
+
+def test_transient_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "TRANSIENT_BACKOFF", 0.0)
+    limiter = AdaptiveLimiter(tokens_per_minute=10**6, requests_per_minute=1000, max_concurrency=4, max_retries=3)
+    failures = [httpx.ConnectTimeout("timed out"), httpx.ConnectError("reset")]
+
+    def request():
+        if failures:
+            raise failures.pop()
+        return "ok", 10
+
+    assert limiter.call(request, tokens=10) == "ok"
+    assert limiter._in_flight == 0
+
+    def invalid():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):  # Not transient: raised on the first attempt
+        limiter.call(invalid, tokens=10)
+    assert limiter._in_flight == 0
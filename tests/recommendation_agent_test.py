@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app as gateway
+from src.agents.recommendation_agent import RecommendationAgent, copurchase_pairs, count_pairs
+from src.data.backends import SQLiteBackend
+from src.data.db_manager import DBManager
+from src.data.related_games import RelatedGamesIndex
+
+GAMES = [f"00000000-0000-0000-0000-{n:012d}" for n in range(6)]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DBManager(SQLiteBackend(str(tmp_path / "recommendations.sqlite")), replicas=[])
+    for game_id in GAMES:
+        db.insert_new_game({
+            "id": game_id, "title": f"Game {game_id[-1]}", "description": "", "html_code": "<html></html>",
+            "deployed_url": f"games/{game_id}/index.html",
+        })
+    for user_id in range(1, 6):
+        db._execute_query(
+            "INSERT INTO users (id, name, email, password) VALUES (%s, %s, %s, %s)",
+            (user_id, f"User {user_id}", f"user{user_id}@test.com", "x"),
+        )
+    yield db
+    db.close()
+
+
+def _buy(db, purchases):
+    for user_id, game in purchases:
+        db.update_payments(user_id, GAMES[game])
+
+
+def _agent(db, tmp_path, **kwargs):
+    return RecommendationAgent(db, state_path=str(tmp_path / "state.npz"), **kwargs)
+
+
+def _related_table(db):
+    rows = db._execute_query("SELECT game_id, position, related_game_id, purchases FROM game_related")
+    return sorted((row["game_id"], row["position"], row["related_game_id"], row["purchases"]) for row in rows)
+
+
+def test_pairs_count_each_user_once():
+    users = np.array([1, 1, 1, 2, 2, 3, 4, 4, 4, 4])
+    games = np.array([0, 1, 1, 0, 1, 2, 0, 1, 2, 3])
+    left, right = copurchase_pairs(users, games, max_user_games=3)
+    rows, cols, counts = count_pairs(left, right, 4)
+
+    # User 3 bought a single game and user 4 more than max_user_games
+    assert list(zip(rows.tolist(), cols.tolist(), counts.tolist())) == [(0, 1, 2), (1, 0, 2)]
+
+
+def test_rebuild_ranks_neighbours(db, tmp_path):
+    _buy(db, [(1, 0), (1, 1), (2, 0), (2, 1), (3, 0), (3, 2), (4, 3)])
+    assert _agent(db, tmp_path, top_k=2).rebuild() == 3
+
+    index = RelatedGamesIndex(db, top_k=2)
+    assert index.refresh(force=True)
+    assert index.related(GAMES[0]) == [{"game_id": GAMES[1], "purchases": 2}, {"game_id": GAMES[2], "purchases": 1}]
+    assert index.related(GAMES[0], limit=1) == [{"game_id": GAMES[1], "purchases": 2}]
+    assert index.related(GAMES[2]) == [{"game_id": GAMES[0], "purchases": 1}]
+    assert index.related(GAMES[3]) == []
+    assert not index.refresh(force=True)  # Same build, nothing to reload
+
+
+def test_refresh_matches_a_full_rebuild(db, tmp_path):
+    _buy(db, [(1, 0), (1, 1), (2, 1), (2, 2), (3, 3)])
+    agent = _agent(db, tmp_path, max_user_games=3)
+    agent.refresh()  # No saved counts yet: rebuilds
+    assert agent.refresh() == 0
+
+    # New buyers, returning buyers and one user going over max_user_games
+    _buy(db, [(3, 4), (4, 0), (4, 4), (2, 3), (1, 2), (1, 5)])
+    assert agent.refresh() > 0
+    incremental = _related_table(db)
+
+    _agent(db, tmp_path, max_user_games=3).rebuild()
+    assert incremental == _related_table(db)
+
+
+def test_deleting_neighbours_is_a_new_build(db):
+    index = RelatedGamesIndex(db, top_k=2)
+    first = db.save_related_games({GAMES[0]: [(GAMES[1], 2)], GAMES[1]: [(GAMES[0], 2)]})
+    assert index.refresh(force=True)
+    assert index.related(GAMES[0]) == [{"game_id": GAMES[1], "purchases": 2}]
+
+    # Rows are only deleted: the newest build number left in game_related would not change
+    assert db.save_related_games({GAMES[0]: []}) == first + 1
+    assert index.refresh(force=True)
+    assert index.related(GAMES[0]) == []
+
+
+def test_index_reads_build_and_rows_from_the_primary(db, tmp_path):
+    db.save_related_games({GAMES[0]: [(GAMES[1], 2)]})
+    # An empty replica, as if it had not replicated the job's rows yet
+    lagging = DBManager(SQLiteBackend(str(tmp_path / "recommendations.sqlite")),
+                        replicas=[SQLiteBackend(str(tmp_path / "replica.sqlite"))])
+    index = RelatedGamesIndex(lagging, top_k=2)
+
+    assert index.refresh(force=True)
+    assert index.related(GAMES[0]) == [{"game_id": GAMES[1], "purchases": 2}]
+    lagging.close()
+
+
+def test_related_endpoint(monkeypatch):
+    monkeypatch.setattr(gateway, "PAYMENT_RECONCILER_IN_GATEWAY", False)
+    with TestClient(gateway.app) as client:
+        response = client.get(f"/api/v1/games/{GAMES[0]}/related", params={"limit": 3})
+        assert response.status_code == 200
+        assert response.json()["game_id"] == GAMES[0]
+        assert isinstance(response.json()["related"], list)
+
+        assert client.get(f"/api/v1/games/{GAMES[0]}/related", params={"limit": 0}).status_code == 422
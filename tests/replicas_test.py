@@ -0,0 +1,95 @@
+import uuid
+
+import pytest
+
+from src.data.backends import SQLiteBackend
+from src.data.db_manager import DBManager
+from src.data.replicas import RecentWrites
+
+GAME_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def _seed(db, title):
+    """The rows replication would have copied: one user and one game."""
+    user_id = db._execute_query(
+        "INSERT INTO users (name, email, password) VALUES (%s, %s, %s)", ("Test User", "user@test.com", "x")
+    )
+    db.insert_new_game({
+        "id": GAME_ID, "title": title, "description": "A game for tests.", "html_code": "<html></html>",
+        "file_url": f"{GAME_ID}/index.html", "deployed_url": f"games/{GAME_ID}/index.html",
+    })
+    return user_id
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """A primary and a replica file; the replica only changes when a test writes to it directly."""
+    # Forget writes other tests made with the same user ids in their own databases
+    monkeypatch.setattr("src.data.db_manager.recent_writes", RecentWrites())
+    replica = DBManager(SQLiteBackend(str(tmp_path / "replica.sqlite")), replicas=[])
+    primary = DBManager(
+        SQLiteBackend(str(tmp_path / "primary.sqlite")), replicas=[SQLiteBackend(str(tmp_path / "replica.sqlite"))]
+    )
+    user_id = _seed(primary, "Primary")
+    _seed(replica, "Replica")
+    return primary, replica, user_id
+
+
+def test_reads_go_to_the_replica(databases):
+    primary, _, _ = databases
+
+    assert primary.get_game_details(GAME_ID)["title"] == "Replica"
+
+
+def test_user_reads_their_own_payment(databases):
+    primary, _, user_id = databases
+
+    primary.update_payments(user_id, GAME_ID)
+
+    assert primary.check_payment_status(user_id, GAME_ID)
+    assert [game["game_id"] for game in primary.get_purchased_games(user_id)] == [GAME_ID]
+
+
+def test_denied_access_is_confirmed_on_the_primary(databases):
+    primary, _, _ = databases
+    # A purchase recorded by another process, not yet replicated
+    other_user = primary._execute_query(
+        "INSERT INTO users (name, email, password) VALUES (%s, %s, %s)", ("Other", f"{uuid.uuid4()}@test.com", "x")
+    )
+    primary._execute_query(
+        "INSERT INTO purchases (user_id, game_id, payment_method, amount, status) VALUES (%s, %s, 'stripe', 1.0, 'paid')",
+        (other_user, GAME_ID),
+    )
+
+    assert primary.check_payment_status(other_user, GAME_ID)
+    assert [game["game_id"] for game in primary.get_purchased_games(other_user)] == [GAME_ID]
+
+
+def test_cache_fills_read_the_primary(databases):
+    primary, replica, user_id = databases
+    second_game = "00000000-0000-0000-0000-000000000002"
+    for db in (primary, replica):
+        db.insert_new_game({
+            "id": second_game, "title": "Second", "description": "", "html_code": "<html></html>",
+            "deployed_url": f"games/{second_game}/index.html",
+        })
+    sql = "INSERT INTO purchases (user_id, game_id, payment_method, amount, status) VALUES (%s, %s, 'stripe', 1.0, 'paid')"
+    replica._execute_query(sql, (user_id, GAME_ID))
+    # Bought through another process: the primary has both purchases, the replica one
+    for game_id in (GAME_ID, second_game):
+        primary._execute_query(sql, (user_id, game_id))
+
+    assert [game["game_id"] for game in primary.get_purchased_games(user_id)] == [GAME_ID]
+    library = primary.get_purchased_games(user_id, from_primary=True)
+    assert sorted(game["game_id"] for game in library) == [GAME_ID, second_game]
+
+
+def test_unreachable_replica_falls_back_to_the_primary(tmp_path):
+    db = DBManager(
+        SQLiteBackend(str(tmp_path / "primary.sqlite")),
+        replicas=[SQLiteBackend(str(tmp_path / "missing" / "replica.sqlite"))],
+    )
+    _seed(db, "Primary")
+
+    assert db.get_game_details(GAME_ID)["title"] == "Primary"
+    assert db.replicas.acquire() is None
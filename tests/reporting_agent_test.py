@@ -0,0 +1,94 @@
+import uuid
+
+import pytest
+
+from src.agents.reporting_agent import ReportingAgent
+from src.data.db_manager import DBManager
+
+
+@pytest.fixture
+def db_manager():
+    return DBManager()
+
+
+@pytest.fixture
+def game_ids(db_manager):
+    game_ids = [str(uuid.uuid4()) for _ in range(2)]
+    for game_id in game_ids:
+        db_manager.insert_new_game({
+            "id": game_id,
+            "title": "Test Game",
+            "description": "A game for tests.",
+            "html_code": "<html></html>",
+            "file_url": f"{game_id}/index.html",
+            "deployed_url": None,
+        })
+    return game_ids
+
+
+def _add_user(db_manager):
+    return db_manager._execute_query(
+        "INSERT INTO users (name, email, password) VALUES (%s, %s, %s)",
+        ("Test User", f"{uuid.uuid4()}@test.com", "hashed"),
+    )
+
+
+def _snapshot(db_manager, game_ids):
+    return (
+        [db_manager.get_game_rollup(game_id) for game_id in game_ids],
+        db_manager.get_daily_rollups("2000-01-01", "2999-12-31"),
+        db_manager.get_platform_rollups(),
+    )
+
+
+def test_incremental_rollups_match_backfill(db_manager, game_ids):
+    first, second = game_ids
+    for _ in range(3):
+        db_manager.update_payments(_add_user(db_manager), first)
+    db_manager.update_payments(_add_user(db_manager), second)
+    db_manager.save_marketing_posts([(first, "twitter", {"tweet": "Play it"}), (first, "reddit", {"title": "New game"})])
+
+    incremental = _snapshot(db_manager, game_ids)
+    db_manager.rebuild_rollups()
+
+    assert _snapshot(db_manager, game_ids) == incremental
+    assert incremental[0][0]["purchases"] == 3
+    assert incremental[0][0]["marketing_posts"] == 2
+    assert incremental[0][1]["marketing_posts"] == 0
+
+
+def test_game_report_conversion(db_manager, game_ids):
+    game_id = game_ids[0]
+    agent = ReportingAgent(db_manager)
+    assert agent.get_game_report(game_id)["conversion"] is None
+
+    db_manager.save_marketing_posts([(game_id, "twitter", {"tweet": "Play it"}), (game_id, "linkedin", {"post": "Play it"})])
+    db_manager.update_payments(_add_user(db_manager), game_id)
+
+    report = agent.get_game_report(game_id)
+    assert report["purchases"] == 1
+    assert report["conversion"] == 0.5
+
+
+def test_campaign_status_and_generated_columns(db_manager, game_ids):
+    game_id = game_ids[0]
+    agent = ReportingAgent(db_manager)
+    assert agent.get_campaign_status(game_id) == {"game_id": game_id, "platforms": {}}
+
+    hashtags = f"#{uuid.uuid4().hex}, #indie"
+    posts = [
+        (game_id, platform, {"headline": f"{platform} launch", "body": "Play it", "hashtags": hashtags})
+        for platform in ("twitter", "reddit", "twitter")
+    ]
+    assert db_manager.save_marketing_posts(posts, chunk_size=2) == 3
+
+    assert agent.get_campaign_status(game_id)["platforms"] == {"reddit": {"posted": 1}, "twitter": {"posted": 2}}
+    columns = db_manager._execute_query(
+        "SELECT headline, hashtags FROM marketing_post WHERE game_id = %s AND platform = 'reddit'", (game_id,), fetch_one=True
+    )
+    assert columns == {"headline": "reddit launch", "hashtags": hashtags}
+    assert db_manager._execute_query(
+        "SELECT COUNT(*) AS posts FROM marketing_post WHERE hashtags = %s", (hashtags,), fetch_one=True
+    ) == {"posts": 3}
+    report = agent.get_hashtag_report(1000)["hashtags"]
+    assert 0 < len(report) <= 100 and report[0]["posts"] >= 3
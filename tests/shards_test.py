@@ -0,0 +1,128 @@
+from contextlib import contextmanager
+
+import pytest
+
+from src.data.backends import SQLITE_SHARD_SCHEMA_PATH, SQLiteBackend
+from src.data.db_manager import DBManager
+from src.data.shard_migration import ShardMigrator
+from src.data.shards import ShardSet, jump_hash, user_key
+
+GAME_ID = "00000000-0000-0000-0000-000000000042"
+USERS = range(1, 61)
+
+
+def test_jump_hash_moves_only_keys_for_the_new_shard():
+    keys = [user_key(user_id) for user_id in range(10000)]
+    before = [jump_hash(key, 3) for key in keys]
+    after = [jump_hash(key, 4) for key in keys]
+
+    moved = [new for old, new in zip(before, after) if old != new]
+    assert set(moved) == {3}
+    assert 0.2 < len(moved) / len(keys) < 0.3
+    assert user_key(42) == user_key("42")
+
+
+def test_shards_can_only_be_added():
+    with pytest.raises(ValueError):
+        ShardSet(["a", "b"], previous_count=3)
+
+
+@pytest.fixture
+def make_db(tmp_path):
+    """DBManager with `count` SQLite shard stand-ins (the same files on every call)."""
+    managers = []
+
+    def make(count, previous_count=0):
+        db = DBManager(
+            SQLiteBackend(str(tmp_path / "main.sqlite")), replicas=[],
+            shards=[SQLiteBackend(str(tmp_path / f"shard{i}.sqlite"), SQLITE_SHARD_SCHEMA_PATH) for i in range(count)],
+            previous_shard_count=previous_count,
+        )
+        if not managers:
+            db.insert_new_game({
+                "id": GAME_ID, "title": "Sharded Game", "description": "", "html_code": "<html></html>",
+                "deployed_url": f"games/{GAME_ID}/index.html",
+            })
+        managers.append(db)
+        return db
+
+    yield make
+    for db in managers:
+        db.close()
+
+
+def _shard_users(db):
+    return [
+        {row["user_id"] for row in shard._execute_query("SELECT user_id FROM purchases")}
+        for shard in db.shards
+    ]
+
+
+def test_purchases_are_routed_by_user(make_db):
+    db = make_db(2)
+    for user_id in USERS:
+        db.update_payments(str(user_id), GAME_ID)
+
+    for index, users in enumerate(_shard_users(db)):
+        assert users and all(db.shards.index_for(user_id) == index for user_id in users)
+    assert db._execute_query("SELECT COUNT(*) AS n FROM purchases", fetch_one=True)["n"] == 0
+    assert db.check_payment_status("7", GAME_ID)
+    assert not db.check_payment_status("1000", GAME_ID)
+    assert db.get_purchased_games("7") == [{"game_id": GAME_ID, "deployed_url": f"games/{GAME_ID}/index.html"}]
+    assert db.get_paid_pairs([(7, GAME_ID), (1000, GAME_ID)]) == {(7, GAME_ID)}
+
+    assert db.get_game_rollup(GAME_ID)["purchases"] == len(USERS)
+    db.rebuild_rollups()
+    assert db.get_game_rollup(GAME_ID)["purchases"] == len(USERS)
+
+
+def test_resharding_moves_users_online(make_db):
+    old = make_db(2)
+    for user_id in USERS:
+        old.update_payments(user_id, GAME_ID)
+
+    db = make_db(3, previous_count=2)
+    # Before and during the migration, every user still sees their purchases
+    assert all(db.check_payment_status(user_id, GAME_ID) for user_id in USERS)
+    db.update_payments(1000, GAME_ID)
+    assert 1000 in _shard_users(db)[db.shards.index_for(1000)]
+
+    ShardMigrator(db, batch_size=7).run()
+    assert ShardMigrator(db, batch_size=7).run() == 0  # Nothing left to move
+
+    for index, users in enumerate(_shard_users(db)):
+        assert all(db.shards.index_for(user_id) == index for user_id in users)
+    done = make_db(3)
+    assert all(done.check_payment_status(user_id, GAME_ID) for user_id in list(USERS) + [1000])
+    assert sum(len(users) for users in _shard_users(done)) == len(USERS) + 1
+
+
+def test_interrupted_move_keeps_identical_purchases(make_db, monkeypatch):
+    old = make_db(2)
+    db = make_db(3, previous_count=2)
+    moving = next(user_id for user_id in range(1, 1000)
+                  if old.shards.index_for(user_id) == 0 and db.shards.index_for(user_id) == 2)
+    source, target = db.shards.members[0], db.shards.members[2]
+    # Two real purchases that look the same (same game, amount and second)
+    for _ in range(2):
+        source._execute_query(
+            "INSERT INTO purchases (user_id, game_id, payment_method, amount, status, created) "
+            "VALUES (%s, %s, 'stripe', 1.0, 'paid', '2024-01-01 00:00:00')",
+            (moving, GAME_ID),
+        )
+
+    @contextmanager
+    def crash():
+        raise RuntimeError("crashed before the delete")
+        yield
+
+    # The first run copies the rows but dies before deleting them from the old shard
+    monkeypatch.setattr(source, "transaction", crash)
+    with pytest.raises(RuntimeError):
+        ShardMigrator(db)._move(0, [moving])
+    monkeypatch.undo()
+    ShardMigrator(db)._move(0, [moving])
+
+    count = "SELECT COUNT(*) AS n FROM purchases WHERE user_id = %s"
+    assert target._execute_query(count, (moving,), fetch_one=True)["n"] == 2
+    assert source._execute_query(count, (moving,), fetch_one=True)["n"] == 0